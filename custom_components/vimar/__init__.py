@@ -36,7 +36,10 @@ from .const import (
     CONF_GLOBAL_CHANNEL_ID,
     CONF_IGNORE_PLATFORM,
     CONF_OVERRIDE,
+    CONF_POLL_INTERVAL,
+    CONF_POOL_MAXSIZE,
     CONF_SCHEMA,
+    CONF_WRITE_DELAY,
     DEFAULT_CERTIFICATE,
     DEFAULT_PORT,
     DEFAULT_SCHEMA,
@@ -45,7 +48,7 @@ from .const import (
     DOMAIN,
     DOMAIN_CONFIG_YAML,
 )
-from .vimar_coordinator import VimarDataUpdateCoordinator
+from .vimar_coordinator import VimarDataUpdateCoordinator, get_discovery_store
 
 log = _LOGGER
 
@@ -60,6 +63,13 @@ CONFIG_DOMAIN_SCHEMA = {
     vol.Optional(CONF_GLOBAL_CHANNEL_ID): vol.Range(min=1, max=99999),
     vol.Optional(CONF_IGNORE_PLATFORM, default=[]): vol.All(cv.ensure_list, [cv.string]),
     vol.Optional(CONF_OVERRIDE, default=[]): cv.ensure_list,
+    vol.Optional(CONF_WRITE_DELAY, default={}): {
+        cv.string: vol.All(vol.Coerce(float), vol.Range(min=0, max=10))
+    },
+    vol.Optional(CONF_POLL_INTERVAL, default={}): {
+        cv.string: vol.All(vol.Coerce(float), vol.Range(min=1, max=3600))
+    },
+    vol.Optional(CONF_POOL_MAXSIZE): vol.All(vol.Coerce(int), vol.Range(min=1, max=16)),
 }
 CONFIG_SCHEMA = vol.Schema(
     {DOMAIN: vol.Schema(CONFIG_DOMAIN_SCHEMA)},
@@ -128,7 +138,7 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
 
     # Set default values on conf from yaml, that not can specified with flow
     yamlconf = hass.data.get(DOMAIN_CONFIG_YAML, {})
-    for cfg in [CONF_OVERRIDE]:
+    for cfg in [CONF_OVERRIDE, CONF_WRITE_DELAY, CONF_POLL_INTERVAL, CONF_POOL_MAXSIZE]:
         vimarconfig[cfg] = yamlconf.get(cfg)
 
     coordinator = VimarDataUpdateCoordinator(hass, entry=entry, vimarconfig=vimarconfig)
@@ -158,9 +168,7 @@ async def add_services(hass: HomeAssistant):
         forced = call.data.get("forced")
         for item in hass.data[DOMAIN].values():
             coordinator: VimarDataUpdateCoordinator = item
-            await coordinator.validate_vimar_credentials()
-            if coordinator.vimarproject:
-                await hass.async_add_executor_job(coordinator.vimarproject.update, forced)
+            await coordinator.async_poll(forced)
 
     hass.services.async_register(DOMAIN, SERVICE_UPDATE, service_update_call, SERVICE_UPDATE_SCHEMA)
 
@@ -171,9 +179,7 @@ async def add_services(hass: HomeAssistant):
             coordinator: VimarDataUpdateCoordinator = item
             await coordinator.validate_vimar_credentials()
             if coordinator.vimarconnection:
-                payload = await hass.async_add_executor_job(
-                    coordinator.vimarconnection._request_vimar_sql, sql
-                )
+                payload = await coordinator.vimarconnection.async_request_vimar_sql(sql)
                 _LOGGER.info(
                     SERVICE_EXEC_VIMAR_SQL + " done: SQL: %s . Result: %s",
                     sql,
@@ -219,10 +225,17 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     )
     if unloaded and entry.entry_id in hass.data[DOMAIN]:
         hass.data[DOMAIN].pop(entry.entry_id)
+        # release the pooled keep-alive connections to the webserver
+        await coordinator.async_close()
 
     return unloaded
 
 
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Remove the discovery cache of a deleted entry."""
+    await get_discovery_store(hass, entry.entry_id).async_remove()
+
+
 async def async_reload_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
     """Reload config entry."""
     await async_unload_entry(hass, entry)
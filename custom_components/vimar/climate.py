@@ -46,6 +46,8 @@ async def async_setup_entry(hass, entry, async_add_devices):
 class VimarClimate(VimarEntity, ClimateEntity):
     """Provides a Vimar climates."""
 
+    _debounced_states = ("setpoint",)
+
     # {'status_id': '2129', 'status_value': '0', 'status_range': 'min=0|max=1'},
     # 'regolazione': {'status_id': '2131', 'status_value': '2', 'status_range': ''},
     # 'modalita_fancoil': {'status_id': '2135', 'status_value': '0', 'status_range': 'min=0|max=1'},
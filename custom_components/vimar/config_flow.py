@@ -84,6 +84,7 @@ class VimarFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
                 or user_input.get(CONF_USERNAME)
             )
             unique_id = slugify(title)
+            coordinator = None
             try:
                 coordinator = VimarDataUpdateCoordinator(
                     self.hass, entry=None, vimarconfig=user_input
@@ -91,6 +92,10 @@ class VimarFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
                 await coordinator.validate_vimar_credentials()
             except BaseException as ex:
                 set_errors_from_ex(ex, errors)
+            finally:
+                if coordinator is not None:
+                    # only used to validate the config, entry setup creates its own
+                    await coordinator.async_close()
 
             if not errors:
                 await self.async_set_unique_id(unique_id)
@@ -194,6 +199,7 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
         self._ensure_options_initialized()
         self._init_schema(user_input, get_schema_options_init(user_input or self.options))
         if user_input is not None:
+            coordinator = None
             try:
                 coordinator = VimarDataUpdateCoordinator(
                     self.hass, entry=self.config_entry, vimarconfig=self.options_with_user_input
@@ -201,6 +207,9 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
                 await coordinator.validate_vimar_credentials()
             except BaseException as ex:
                 set_errors_from_ex(ex, self.errors)
+            finally:
+                if coordinator is not None:
+                    await coordinator.async_close()
 
         if user_input is not None and not self.errors:
             self._options_update()
@@ -216,14 +225,18 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
             self._validate_regex(CONF_DEVICES_LIGHTS_RE)
             self._validate_regex(CONF_DEVICES_BINARY_SENSOR_RE)
         if user_input is not None and not self.errors:
+            coordinator = None
             try:
                 coordinator = VimarDataUpdateCoordinator(
                     self.hass, entry=self.config_entry, vimarconfig=self.options_with_user_input
                 )
                 await coordinator.validate_vimar_credentials()
-                await self.hass.async_add_executor_job(coordinator.vimarproject.update, True)
+                await coordinator.vimarproject.async_update(True)
             except BaseException as ex:
                 set_errors_from_ex(ex, self.errors)
+            finally:
+                if coordinator is not None:
+                    await coordinator.async_close()
 
         if user_input is not None and not self.errors:
             self._options_update()
@@ -263,15 +276,16 @@ def set_errors_from_ex(ex: BaseException, errors: dict[str, str]):
     exstr = str(ex)
     if "Log In Fallito" in exstr:  # message returned from vimar
         errors["base"] = "invalid_auth"
+    elif "SSLError" in exstr or "CERTIFICATE_VERIFY_FAILED" in exstr:
+        errors["base"] = "invalid_cert"
     elif (
         "HTTP error occurred" in exstr
         or "Client Error:" in exstr
         or "ConnectTimeoutError" in exstr
         or "NewConnectionError" in exstr
+        or "Cannot connect to host" in exstr
     ) or "HTTP timeout occurred" in exstr:
         errors["base"] = "cannot_connect"
-    elif "SSLError" in exstr:
-        errors["base"] = "invalid_cert"
     elif "Saving certificate failed" in exstr:
         errors["base"] = "save_cert_failed"
     else:
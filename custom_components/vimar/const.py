@@ -15,6 +15,9 @@ CONF_SECURE = "secure"
 CONF_CERTIFICATE = "certificate"
 CONF_GLOBAL_CHANNEL_ID = "global_channel_id"
 CONF_IGNORE_PLATFORM = "ignore"
+CONF_WRITE_DELAY = "write_delay"
+CONF_POLL_INTERVAL = "poll_interval"
+CONF_POOL_MAXSIZE = "pool_maxsize"
 
 DEFAULT_USERNAME = "admin"
 DEFAULT_SCHEMA = "https"
@@ -95,5 +98,32 @@ PLATFORMS = [
     DEVICE_TYPE_SENSORS,
 ]
 
+# discovered devices are stored per config entry and restored on the next start
+DISCOVERY_STORAGE_VERSION = 1
+DISCOVERY_STORAGE_KEY = DOMAIN + ".discovery.{}"
+
+# seconds to wait for further slider values before writing, per platform
+DEFAULT_WRITE_DELAY = {
+    DEVICE_TYPE_LIGHTS: 0.3,
+    DEVICE_TYPE_COVERS: 0.5,
+    DEVICE_TYPE_CLIMATES: 1.0,
+    DEVICE_TYPE_MEDIA_PLAYERS: 0.3,
+}
+
+# seconds after a write until the states of the written devices are read again
+WRITE_REFRESH_DELAY = 0.3
+
+# seconds between two checks of the session, and how long before its learned
+# lifetime ends a session is renewed
+SESSION_KEEPALIVE_INTERVAL = 60
+SESSION_REFRESH_MARGIN = 30
+
+# seconds between two polls of the states, per platform or vimar object_type,
+# all others are polled every scan_interval
+DEFAULT_POLL_INTERVAL = {
+    DEVICE_TYPE_SCENES: 60,
+    DEVICE_TYPE_CLIMATES: 30,
+}
+
 
 # VIMAR_UNIQUE_ID = "vimar_unique_id"
@@ -24,6 +24,8 @@ async def async_setup_entry(hass, entry, async_add_devices):
 class VimarCover(VimarEntity, CoverEntity):
     """Provides a Vimar cover."""
 
+    _debounced_states = ("position", "slat_position")
+
     # see:
     # https://developers.home-assistant.io/docs/entity_index/#generic-properties
     # Return True if the state is based on our assumption instead of reading it from the device. this will ignore is_closed state
@@ -0,0 +1,35 @@
+"""Diagnostics support for Vimar."""
+
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_HOST, CONF_PASSWORD, CONF_USERNAME
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN
+from .vimar_coordinator import VimarDataUpdateCoordinator
+
+TO_REDACT = {CONF_HOST, CONF_PASSWORD, CONF_USERNAME}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    coordinator: VimarDataUpdateCoordinator = hass.data[DOMAIN][entry.entry_id]
+    diagnostics: dict[str, Any] = {
+        "config": async_redact_data(coordinator.vimarconfig, TO_REDACT),
+        "last_update_success": coordinator.last_update_success,
+        "poll_groups": coordinator.poll_scheduler.get_metrics(),
+        "cancelled_polls": coordinator.cancelled_polls,
+    }
+    if coordinator.vimarproject is not None:
+        diagnostics["devices"] = len(coordinator.vimarproject.devices or {})
+    if coordinator.vimarconnection is not None:
+        diagnostics["request_scheduler"] = coordinator.vimarconnection.get_scheduler_metrics()
+        diagnostics["page_sizes"] = coordinator.vimarconnection.get_page_size_metrics()
+        diagnostics["session"] = coordinator.vimarconnection.get_session_metrics()
+    if coordinator.write_queue is not None:
+        diagnostics["superseded_writes"] = coordinator.write_queue.superseded_count
+    return diagnostics
@@ -25,6 +25,8 @@ async def async_setup_entry(hass, entry, async_add_devices):
 class VimarLight(VimarEntity, LightEntity):
     """Provides a Vimar lights."""
 
+    _debounced_states = ("value",)
+
     def __init__(self, coordinator, device_id: int):
         """Initialize the light."""
         VimarEntity.__init__(self, coordinator, device_id)
@@ -97,18 +99,18 @@ class VimarLight(VimarEntity, LightEntity):
         if not kwargs:
             self.change_state("on/off", "1")
         else:
+            # brightness and color are written as one batch
+            changes = []
             if ATTR_BRIGHTNESS in kwargs and self.has_state("value"):
                 brightness_value = self.calculate_brightness(kwargs[ATTR_BRIGHTNESS])
-                self.change_state(
-                    "value",
-                    brightness_value,
-                    "on/off",
-                    ("0", "1")[brightness_value > 0],
-                )
+                changes += ["value", brightness_value, "on/off", ("0", "1")[brightness_value > 0]]
 
             if ATTR_HS_COLOR in kwargs and self.has_state("red"):
                 rgb = color_util.color_hs_to_RGB(*kwargs[ATTR_HS_COLOR])
-                self.change_state("red", rgb[0], "green", rgb[1], "blue", rgb[2])
+                changes += ["red", rgb[0], "green", rgb[1], "blue", rgb[2]]
+
+            if changes:
+                self.change_state(*changes)
 
     async def async_turn_off(self, **kwargs: Any) -> None:
         """Turn the Vimar light off."""
@@ -23,6 +23,8 @@ async def async_setup_entry(hass, entry, async_add_devices):
 class VimarMediaplayer(VimarEntity, MediaPlayerEntity):
     """Provide Vimar media player."""
 
+    _debounced_states = ("volume",)
+
     _last_volume = 0.1
     _channel_source_id = 0
     _global_channel_id = 1545
@@ -190,12 +192,13 @@ class VimarMediaplayer(VimarEntity, MediaPlayerEntity):
         if channel > 8:
             channel = 0
         _LOGGER.debug("Vimar media player setting next channel: %d", channel)
-        self.change_state("source", str(channel))
+        changes = ["source", str(channel)]
         if self.has_state("global_channel"):
             _LOGGER.info("Vimar media player setting global channel: %d", channel)
             # self.change_state('global_channel', str(channel))
             # according to docs, choosing next track, needs to send 0
-            self.change_state("global_channel", "0")
+            changes += ["global_channel", "0"]
+        self.change_state(*changes)
 
     # no longer available
     async def async_media_previous_track(self):
@@ -204,18 +207,18 @@ class VimarMediaplayer(VimarEntity, MediaPlayerEntity):
         if channel < 0:
             channel = 8
         _LOGGER.info("Vimar media player setting previous channel: %d", channel)
-        self.change_state("source", str(channel))
+        changes = ["source", str(channel)]
         if self.has_state("global_channel"):
             _LOGGER.info("Vimar media player setting global channel: %d", channel)
-            self.change_state("global_channel", str(channel))
+            changes += ["global_channel", str(channel)]
+        self.change_state(*changes)
 
     async def async_select_source(self, source):
         """Select input source."""
         _LOGGER.debug("Vimar media player setting source: %s", source)
         # self.change_state('source', str(source))
-        self.change_state("channel", str(source))
-        # according to docs, choosing next channel, needs to send 1
-        self.change_state("global_channel", "1")
+        # according to docs, choosing next channel, needs to send 1 to global_channel
+        self.change_state("channel", str(source), "global_channel", "1")
 
     # def turn_on(self):
     #     """Turn the Vimar media player on."""
@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+import asyncio
 import hashlib
 import json
 from datetime import timedelta
@@ -18,10 +19,12 @@ from homeassistant.const import (
     CONF_USERNAME,
     CONF_VERIFY_SSL,
 )
-from homeassistant.core import HomeAssistant
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
 from homeassistant.exceptions import PlatformNotReady
 from homeassistant.helpers import device_registry as dr
 from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers.event import async_call_later
+from homeassistant.helpers.storage import Store
 from homeassistant.helpers.typing import ConfigType
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
 
@@ -31,33 +34,78 @@ from .const import (
     CONF_GLOBAL_CHANNEL_ID,
     CONF_IGNORE_PLATFORM,
     CONF_OVERRIDE,
+    CONF_POLL_INTERVAL,
+    CONF_POOL_MAXSIZE,
     CONF_SECURE,
+    CONF_WRITE_DELAY,
     DEFAULT_CERTIFICATE,
+    DEFAULT_POLL_INTERVAL,
     DEFAULT_SCAN_INTERVAL,
     DEFAULT_TIMEOUT,
+    DEFAULT_WRITE_DELAY,
     DEVICE_TYPE_BINARY_SENSOR,
+    DISCOVERY_STORAGE_KEY,
+    DISCOVERY_STORAGE_VERSION,
     DOMAIN,
     PLATFORMS,
+    SESSION_KEEPALIVE_INTERVAL,
+    SESSION_REFRESH_MARGIN,
+    WRITE_REFRESH_DELAY,
 )
 from .vimar_device_customizer import VimarDeviceCustomizer
-from .vimarlink.vimarlink import VimarLink, VimarProject
+from .vimarlink.vimarlink import VimarApiError
+from .vimarlink.vimarlink_async import VimarLinkAsync, VimarProjectAsync, VimarWriteQueue
+from .vimarlink.vimarlink_deadline import VimarDeadline
+from .vimarlink.vimarlink_polling import VimarPollScheduler
 
 log = _LOGGER
 
+# options that do not change the discovered devices
+DISCOVERY_IGNORED_OPTIONS = (
+    CONF_PASSWORD,
+    CONF_SCAN_INTERVAL,
+    CONF_TIMEOUT,
+    CONF_POLL_INTERVAL,
+    CONF_POOL_MAXSIZE,
+    "fake_update_value",
+)
+
+
+def get_discovery_store(hass: HomeAssistant, entry_id: str) -> Store:
+    """Return the store holding the last discovery of a config entry."""
+    return Store(hass, DISCOVERY_STORAGE_VERSION, DISCOVERY_STORAGE_KEY.format(entry_id))
+
 
 class VimarDataUpdateCoordinator(DataUpdateCoordinator):
     """Class to manage fetching data from the API."""
 
-    vimarconnection: VimarLink | None = None
-    vimarproject: VimarProject | None = None
+    vimarconnection: VimarLinkAsync | None = None
+    vimarproject: VimarProjectAsync | None = None
+    write_queue: VimarWriteQueue | None = None
     _timeout: float = DEFAULT_TIMEOUT
     webserver_id = ""
     entity_unique_id_prefix = ""
     _first_update_data_executed = False
     _platforms_registered = False
-    _last_devices_hash = ""
-    _device_state_hashes: dict[str, str] = {}
-    _changed_device_ids: set[str] = set()
+    _last_devices_digest = ""
+    # object_ids whose entities have to be notified with the next poll
+    _invalidated_device_ids: set[str] = set()
+    # object_ids changed by the last poll, None notifies all entities
+    _changed_device_ids: set[str] | None = None
+    _listeners_update_success = True
+    # device_ids whose entities write their state with the current listener update, None for all
+    _notify_device_ids: set[str] | None = None
+    # devices were restored from the discovery cache and not yet checked against the webserver
+    _discovery_cache_loaded = False
+    _discovery_requested = False
+    _discovery_store: Store | None = None
+    _scan_interval: float = DEFAULT_SCAN_INTERVAL
+    # object_ids written since the last refresh of written devices
+    _refresh_device_ids: set[str] = set()
+    _refresh_timer: CALLBACK_TYPE | None = None
+    _keepalive_timer: CALLBACK_TYPE | None = None
+    # polls cancelled by the timeout or by unloading the entry
+    cancelled_polls = 0
 
     def __init__(self, hass: HomeAssistant, entry: ConfigEntry, vimarconfig: ConfigType) -> None:
         """Initialize."""
@@ -65,14 +113,25 @@ class VimarDataUpdateCoordinator(DataUpdateCoordinator):
         self.entry = entry
         self.vimarconfig = vimarconfig
         self.devices_for_platform = {}
+        self._invalidated_device_ids = set()
+        self._refresh_device_ids = set()
+        self._poll_lock = asyncio.Lock()
+        self._write_delays = {**DEFAULT_WRITE_DELAY, **(vimarconfig.get(CONF_WRITE_DELAY) or {})}
+        self._poll_intervals = {
+            **DEFAULT_POLL_INTERVAL,
+            **(vimarconfig.get(CONF_POLL_INTERVAL) or {}),
+        }
+        self.poll_scheduler = VimarPollScheduler()
         if entry:
             self.entity_unique_id_prefix = entry.unique_id or ""
+            self._discovery_store = get_discovery_store(hass, entry.entry_id)
         timeout = vimarconfig.get(CONF_TIMEOUT) or DEFAULT_TIMEOUT
         if timeout > 0:
             self._timeout = float(timeout)
         uptade_interval = float(vimarconfig.get(CONF_SCAN_INTERVAL) or DEFAULT_SCAN_INTERVAL)
         if uptade_interval < 1:
             uptade_interval = DEFAULT_SCAN_INTERVAL
+        self._scan_interval = uptade_interval
         super().__init__(
             hass, _LOGGER, name=DOMAIN, update_interval=timedelta(seconds=uptade_interval)
         )
@@ -83,6 +142,23 @@ class VimarDataUpdateCoordinator(DataUpdateCoordinator):
         This is the place to pre-process the data to lookup tables
         so entities can quickly look up their data.
         """
+        # a refresh requested while a poll runs waits for it, polls never overlap
+        async with self._poll_lock:
+            return await self._async_poll()
+
+    async def async_poll(self, forced: bool = False) -> None:
+        """Poll right away, forced runs a full discovery - waits for a poll already running."""
+        if forced:
+            self._discovery_requested = True
+        await self.async_refresh()
+
+    async def _async_poll(self):
+        """Poll the webserver within the timeout, keeping what was read once it is used up.
+
+        All requests of a poll share a deadline of one timeout. If it expires
+        the project keeps the values read so far. The hard timeout only
+        cancels a poll that overruns its deadline anyway.
+        """
         _LOGGER.debug("Updating coordinator..")
 
         try:
@@ -94,16 +170,50 @@ class VimarDataUpdateCoordinator(DataUpdateCoordinator):
                 async with async_timeout.timeout(self._timeout):
                     await self.validate_vimar_credentials()
 
-            async with async_timeout.timeout(self._timeout):
-                forced = not self._first_update_data_executed or not self._platforms_registered
-                devices = await self.hass.async_add_executor_job(self.vimarproject.update, forced)
+            forced = self._discovery_requested or (
+                not self._discovery_cache_loaded
+                and (not self._first_update_data_executed or not self._platforms_registered)
+            )
+            # merge the status groups that are due into one poll
+            poll_groups = []
+            status_ids = None
+            if not forced and self.poll_scheduler.has_groups():
+                poll_groups = self.poll_scheduler.get_due()
+                status_ids = self.poll_scheduler.get_status_ids(poll_groups)
+            try:
+                async with async_timeout.timeout(self._timeout * 2):
+                    devices = await self.vimarproject.async_update(
+                        forced, status_ids, VimarDeadline(self._timeout)
+                    )
+            except (TimeoutError, asyncio.CancelledError):
+                # pending page requests were cancelled with the update
+                self.cancelled_polls += 1
+                log.debug("Poll cancelled, %d so far", self.cancelled_polls)
+                raise
 
             if not devices or len(devices) == 0:
                 raise UpdateFailed("Could not find any devices on Vimar Webserver")
+            # a partial update is no complete discovery, it is repeated by the next poll
+            partial = self.vimarproject.last_update_partial
+            # the project runs a discovery on its own when the installation fingerprint changed
+            discovered = (forced or self.vimarproject.last_update_discovered) and not partial
+            changed_ids = self._detect_state_changes()
+            # after a discovery names, rooms and types may have changed as well
+            self._changed_device_ids = None if discovered else changed_ids
             if not self._first_update_data_executed:
                 self._first_update_data_executed = True
-            # if last update failed, check devices changes and reload if need
-            if not self.last_update_success or self._last_devices_hash == "":
+            if discovered or not self.poll_scheduler.has_groups():
+                self._set_poll_groups()
+            elif not partial:
+                self.poll_scheduler.mark_polled(poll_groups)
+            if forced and partial:
+                self._discovery_requested = True
+            if discovered:
+                self._discovery_requested = False
+                self._discovery_cache_loaded = False
+                await self._async_save_discovery_cache()
+            # if last update failed or devices were discovered, check devices changes and reload if need
+            if discovered or not self.last_update_success or self._last_devices_digest == "":
                 self._reload_entry_if_devices_changed()
             return devices
         # Note: asyncio.TimeoutError and aiohttp.ClientError are already
@@ -112,6 +222,9 @@ class VimarDataUpdateCoordinator(DataUpdateCoordinator):
             raise
         except aiohttp.ClientError:
             raise
+        # unloading the entry cancels the poll, it must not end up as a failed update
+        except asyncio.CancelledError:
+            raise
         # except ApiAuthError as err:
         #    # Raising ConfigEntryAuthFailed will cancel future updates
         #    # and start a config flow with SOURCE_REAUTH (async_step_reauth)
@@ -120,12 +233,80 @@ class VimarDataUpdateCoordinator(DataUpdateCoordinator):
         except BaseException as err:
             raise UpdateFailed(f"Error communicating with API: {err}")
 
+    @callback
+    def async_update_listeners(self) -> None:
+        """Update all listeners, entities skip the update unless their device changed."""
+        self._notify_device_ids = self._changed_device_ids
+        if self.last_update_success != self._listeners_update_success:
+            # availability changed - every entity has to write its state
+            self._listeners_update_success = self.last_update_success
+            self._notify_device_ids = None
+        super().async_update_listeners()
+
+    def is_device_changed(self, device_id) -> bool:
+        """Check if the entities of a device have to write their state with this listener update."""
+        return self._notify_device_ids is None or device_id in self._notify_device_ids
+
+    def invalidate_device_state(self, device_id: str) -> None:
+        """Mark a device as changed, so the next poll notifies its entities."""
+        self._invalidated_device_ids.add(device_id)
+
+    @callback
+    def async_schedule_device_refresh(self, device_id: str) -> None:
+        """Read the states of a written device shortly after the write, not with the next poll."""
+        self._refresh_device_ids.add(device_id)
+        if self._refresh_timer is None:
+            self._refresh_timer = async_call_later(
+                self.hass, WRITE_REFRESH_DELAY, self._async_refresh_written_devices
+            )
+
+    async def _async_refresh_written_devices(self, _now=None) -> None:
+        """Read the states of all devices written since the last refresh with one request."""
+        self._refresh_timer = None
+        # a device with writes still waiting gets refreshed after those
+        device_ids = {
+            device_id
+            for device_id in self._refresh_device_ids
+            if self.write_queue is None or not self.write_queue.has_pending(device_id)
+        }
+        self._refresh_device_ids -= device_ids
+        if not device_ids or self.vimarproject is None or not self.last_update_success:
+            return
+        # a poll running meanwhile would apply its older rows after the refreshed ones
+        async with self._poll_lock:
+            try:
+                await self.vimarproject.async_refresh_devices(device_ids)
+            except Exception as err:
+                log.debug("Could not refresh written devices, the next poll will: %s", err)
+                return
+            self._changed_device_ids = self._detect_state_changes()
+            self.async_update_listeners()
+
+    def get_write_delay(self, platform: str) -> float:
+        """Return how long writes of a platform wait for further values."""
+        return self._write_delays.get(platform, 0)
+
+    def _set_poll_groups(self) -> None:
+        """Group the status ids by poll interval, the coordinator ticks with the shortest one."""
+        if self.vimarproject is None:
+            return
+        self.poll_scheduler.set_groups(
+            self.vimarproject.get_status_poll_intervals(self._poll_intervals, self._scan_interval)
+        )
+        interval = min(
+            self._scan_interval, self.poll_scheduler.get_min_interval() or self._scan_interval
+        )
+        self.update_interval = timedelta(seconds=max(1.0, interval))
+
     async def init_vimarproject(self) -> None:
         """Init VimarLink and VimarProject from entry config."""
-        self._last_devices_hash = ""
+        self._last_devices_digest = ""
+        self._invalidated_device_ids = set()
+        self._changed_device_ids = None
         self._first_update_data_executed = False
         self._platforms_registered = False
         self.devices_for_platform = {}
+        self.poll_scheduler = VimarPollScheduler()
         vimarconfig = self.vimarconfig
         schema = "https" if vimarconfig.get(CONF_SECURE) else "http"
         host = vimarconfig.get(CONF_HOST)
@@ -136,13 +317,19 @@ class VimarDataUpdateCoordinator(DataUpdateCoordinator):
         if schema == "https" and vimarconfig.get(CONF_VERIFY_SSL):
             certificate = vimarconfig.get(CONF_CERTIFICATE, DEFAULT_CERTIFICATE)
         timeout = vimarconfig.get(CONF_TIMEOUT)
+        # connections kept open to the webserver, None keeps the default of vimarlink
+        pool_maxsize = vimarconfig.get(CONF_POOL_MAXSIZE)
         global_channel_id = vimarconfig.get(CONF_GLOBAL_CHANNEL_ID)
         # ignored_platforms = vimarconfig.get(CONF_IGNORE_PLATFORM)
         # spunto per override: https://github.com/teharris1/insteon2/blob/master/__init__.py
         device_overrides = vimarconfig.get(CONF_OVERRIDE, [])
 
+        await self.async_close()
+
         # initialize a new VimarLink object
-        vimarconnection = VimarLink(schema, host, port, username, password, certificate, timeout)
+        vimarconnection = VimarLinkAsync(
+            schema, host, port, username, password, certificate, timeout, pool_maxsize
+        )
 
         device_customizer = VimarDeviceCustomizer(vimarconfig, device_overrides)
 
@@ -150,13 +337,54 @@ class VimarDataUpdateCoordinator(DataUpdateCoordinator):
             device_customizer.customize_device(device)
 
         # will hold all the devices and their states
-        vimarproject = VimarProject(vimarconnection, device_customizer_fn)
+        vimarproject = VimarProjectAsync(vimarconnection, device_customizer_fn)
 
         if global_channel_id is not None:
             vimarproject.global_channel_id = global_channel_id
 
         self.vimarconnection = vimarconnection
         self.vimarproject = vimarproject
+        self.write_queue = VimarWriteQueue(vimarconnection)
+        self._discovery_requested = False
+        self._discovery_cache_loaded = await self._async_load_discovery_cache()
+
+    async def _async_load_discovery_cache(self) -> bool:
+        """Restore devices of the last discovery, so entities are set up without waiting for it."""
+        if self._discovery_store is None or self.vimarproject is None:
+            return False
+        try:
+            discovery = await self._discovery_store.async_load()
+        except Exception as err:
+            log.warning("Could not load the discovery cache: %s", err)
+            return False
+        if not discovery or discovery.get("config") != self._get_discovery_config_key():
+            return False
+        if not self.vimarproject.import_discovery(discovery):
+            return False
+        log.info("Restored %d devices from the discovery cache", len(self.vimarproject.devices))
+        return True
+
+    async def _async_save_discovery_cache(self) -> None:
+        """Store the devices of the last discovery for the next start.
+
+        Saved right away, an entry reloaded because of changed devices reads it again.
+        """
+        if self._discovery_store is None or self.vimarproject is None:
+            return
+        discovery = self.vimarproject.export_discovery()
+        discovery["config"] = self._get_discovery_config_key()
+        await self._discovery_store.async_save(discovery)
+
+    def _get_discovery_config_key(self) -> str:
+        """Return a hash of the options a cached discovery was parsed with."""
+        config = {
+            key: value
+            for key, value in self.vimarconfig.items()
+            if key not in DISCOVERY_IGNORED_OPTIONS
+        }
+        return hashlib.sha256(
+            json.dumps(config, sort_keys=True, default=str).encode("utf-8")
+        ).hexdigest()
 
     async def validate_vimar_credentials(self) -> None:
         """Validate Vimar credential config."""
@@ -168,10 +396,11 @@ class VimarDataUpdateCoordinator(DataUpdateCoordinator):
         try:
             if self.vimarconnection is None:
                 raise PlatformNotReady
-            valid_login = await self.hass.async_add_executor_job(self.vimarconnection.check_login)
+            valid_login = await self.vimarconnection.async_check_login()
             if not valid_login:
                 raise PlatformNotReady
-            # res = await self.hass.async_add_executor_job(self.vimarconnection.check_session)
+            self._schedule_session_keepalive(None)
+            # res = await self.vimarconnection.async_check_session()
             # res1 = res
         # except VimarApiError as err:
         #    _LOGGER.error("Webserver %s: %s", host, str(err))
@@ -183,6 +412,45 @@ class VimarDataUpdateCoordinator(DataUpdateCoordinator):
         # if not valid_login:
         #    raise PlatformNotReady
 
+    def _schedule_session_keepalive(self, refresh_delay: float | None) -> None:
+        """Check the session every keepalive interval, or renew it once refresh_delay passed."""
+        if self._keepalive_timer is not None:
+            self._keepalive_timer()
+        delay = SESSION_KEEPALIVE_INTERVAL
+        if refresh_delay is not None:
+            delay = min(delay, refresh_delay)
+        self._keepalive_timer = async_call_later(self.hass, delay, self._async_keep_session_alive)
+
+    async def _async_keep_session_alive(self, _now=None) -> None:
+        """Keep the session valid, so neither polls nor writes wait for a login."""
+        self._keepalive_timer = None
+        if self.vimarconnection is None:
+            return
+        refresh_delay = None
+        try:
+            refresh_delay = await self.vimarconnection.async_keep_session_alive(
+                SESSION_REFRESH_MARGIN
+            )
+        except VimarApiError as err:
+            # the next poll logs in again
+            log.debug("Session keep-alive failed: %s", err)
+        self._schedule_session_keepalive(refresh_delay)
+
+    async def async_close(self) -> None:
+        """Close the connections to the webserver."""
+        if self._refresh_timer is not None:
+            self._refresh_timer()
+            self._refresh_timer = None
+        if self._keepalive_timer is not None:
+            self._keepalive_timer()
+            self._keepalive_timer = None
+        self._refresh_device_ids = set()
+        if self.write_queue is not None:
+            # do not lose the last slider value
+            await self.write_queue.async_flush_all()
+        if self.vimarconnection is not None:
+            await self.vimarconnection.async_close()
+
     async def async_register_devices_platforms(self):
         """Execute async_forward_entry_setup for each platform."""
         self.devices_for_platform = {}
@@ -196,27 +464,26 @@ class VimarDataUpdateCoordinator(DataUpdateCoordinator):
         self._platforms_registered = True
         if len(self.devices_for_platform) > 0:
             await self.async_remove_old_devices()
+        if (
+            self._discovery_cache_loaded
+            and self.vimarproject is not None
+            and not self.vimarproject.has_fingerprint()
+        ):
+            # entities were set up from the cache, the webserver has no fingerprint
+            # to compare it with - check the devices with a full discovery
+            self._discovery_requested = True
+            await self.async_request_refresh()
 
     def _reload_entry_if_devices_changed(self):
         if self.vimarproject:
             devices = self.vimarproject.devices
             if devices is not None and len(devices) > 0:
-                devices_hash = ""
-                for device_id, device in devices.items():
-                    device_hash = (
-                        str(device["object_id"])
-                        + "_"
-                        + str(device["room_ids"])
-                        + device["object_type"]
-                        + device["object_name"]
-                        + device["room_name"]
-                    )
-                    devices_hash = devices_hash + "_" + device_hash
-                if devices_hash != self._last_devices_hash:
-                    if self._last_devices_hash == "":
-                        self._last_devices_hash = devices_hash
+                devices_digest = self.vimarproject.get_devices_digest()
+                if devices_digest != self._last_devices_digest:
+                    if self._last_devices_digest == "":
+                        self._last_devices_digest = devices_digest
                     else:
-                        self._last_devices_hash = devices_hash
+                        self._last_devices_digest = devices_digest
                         if self._platforms_registered:
                             self.reload_entry()
 
@@ -274,46 +541,18 @@ class VimarDataUpdateCoordinator(DataUpdateCoordinator):
         for device_id in devices_to_be_removed:
             device_registry.async_remove_device(device_id)
 
-    def _hash_device_state(self, device: dict) -> str:
-        """Generate hash of device state for change detection.
+    def _detect_state_changes(self) -> set[str]:
+        """Return object_ids whose status values changed since the last poll.
 
-        Only includes dynamic state values, not static properties.
-        object_id is included to prevent hash collisions.
+        VimarProject records changes while ingesting values, so this does
+        not depend on the number of devices.
         """
-        state_data = {
-            "object_id": device["object_id"],
-            "status": device.get("status", {}),
-        }
-        state_json = json.dumps(state_data, sort_keys=True)
-        return hashlib.md5(state_json.encode()).hexdigest()
-
-    def _detect_state_changes(self, devices: dict[str, dict]) -> set[str]:
-        """Detect which devices have changed states.
-
-        Returns:
-            Set of object_ids that changed
-        """
-        changed_ids = set()
-
-        for device_id, device in devices.items():
-            new_hash = self._hash_device_state(device)
-            old_hash = self._device_state_hashes.get(device_id)
-
-            if old_hash is None:
-                # New device
-                changed_ids.add(device_id)
-                log.debug("New device detected: %s", device_id)
-            elif new_hash != old_hash:
-                # State changed
-                changed_ids.add(device_id)
-                if log.isEnabledFor(10):  # DEBUG level
-                    log.debug(
-                        "Device %s (%s) state changed",
-                        device_id,
-                        device.get("device_friendly_name", "unknown"),
-                    )
+        changed_ids = set(self._invalidated_device_ids)
+        self._invalidated_device_ids = set()
+        if self.vimarproject is not None:
+            changed_ids |= self.vimarproject.pop_changed_object_ids()
 
-            # Update hash
-            self._device_state_hashes[device_id] = new_hash
+        if changed_ids and log.isEnabledFor(10):  # DEBUG level
+            log.debug("Devices with changed state: %s", sorted(changed_ids))
 
         return changed_ids
@@ -4,7 +4,7 @@ import logging
 
 from homeassistant.components.binary_sensor import BinarySensorDeviceClass, BinarySensorEntity
 from homeassistant.const import CONF_VERIFY_SSL
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.device_registry import DeviceInfo
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
@@ -16,7 +16,8 @@ from .const import (
     PACKAGE_NAME,
 )
 from .vimar_coordinator import VimarDataUpdateCoordinator
-from .vimarlink.vimarlink import VimarDevice, VimarLink, VimarProject
+from .vimarlink.vimarlink import VimarApiError, VimarDevice
+from .vimarlink.vimarlink_async import VimarLinkAsync, VimarProjectAsync
 
 
 class VimarEntity(CoordinatorEntity):
@@ -26,16 +27,18 @@ class VimarEntity(CoordinatorEntity):
     _logger_is_debug = False
     _device: VimarDevice | None = None
     _device_id = 0
-    _vimarconnection: VimarLink | None = None
-    _vimarproject: VimarProject | None = None
+    _vimarconnection: VimarLinkAsync | None = None
+    _vimarproject: VimarProjectAsync | None = None
     _coordinator: VimarDataUpdateCoordinator | None = None
     _attributes = {}
+    # states set by sliders, their writes wait for further values before being sent
+    _debounced_states: tuple[str, ...] = ()
 
     ICON = "mdi:checkbox-marked"
 
     def __init__(self, coordinator: VimarDataUpdateCoordinator, device_id: int):
         """Initialize the base entity."""
-        super().__init__(coordinator)
+        super().__init__(coordinator, context=device_id)
         self._coordinator = coordinator
         self._device_id = device_id
         self._vimarconnection = coordinator.vimarconnection
@@ -51,6 +54,12 @@ class VimarEntity(CoordinatorEntity):
 
         # self.entity_id = self._platform + "." + self.name.lower().replace(" ", "_") + "_" + self._device_id
 
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Write the state only if the device changed with the last poll."""
+        if self.coordinator.is_device_changed(self._device_id):
+            super()._handle_coordinator_update()
+
     @property
     def device_name(self):
         """Return the name of the device."""
@@ -95,56 +104,71 @@ class VimarEntity(CoordinatorEntity):
     # def change_state(self, state: str, value: str,  *args):
     def change_state(self, *args, **kwargs):
         """Change state on bus system and the local device state."""
-        state_changed = False
         if "status" in self._device and self._device["status"]:
-
+            changes = []
             if args and len(args) > 0:
                 iter_args = iter(args)
-                for state, value in zip(iter_args, iter_args, strict=False):
-                    if state in self._device["status"]:
-                        state_changed = True
-                        optionals = self._vimarconnection.get_optionals_param(state)
-                        self.hass.async_add_executor_job(
-                            self._vimarconnection.set_device_status,
-                            self._device["status"][state]["status_id"],
-                            str(value),
-                            optionals,
-                        )
-                        self._device["status"][state]["status_value"] = str(value)
-                    else:
-                        self._logger.warning(
-                            "Could not find state %s in device %s - %s - could not change value to: %s",
-                            state,
-                            self.name,
-                            self._device_id,
-                            value,
-                        )
-
+                changes += list(zip(iter_args, iter_args, strict=False))
             if kwargs and len(kwargs) > 0:
-                for state, value in kwargs.items():
-                    if state in self._device["status"]:
-                        state_changed = True
-                        optionals = self._vimarconnection.get_optionals_param(state)
-                        self.hass.async_add_executor_job(
-                            self._vimarconnection.set_device_status,
-                            self._device["status"][state]["status_id"],
-                            str(value),
-                            optionals,
-                        )
-                        self._device["status"][state]["status_value"] = str(value)
-                    else:
-                        self._logger.warning(
-                            "Could not find state %s in device %s - %s - could not change value to: %s",
-                            state,
-                            self.name,
-                            self._device_id,
-                            value,
-                        )
-
-            if state_changed:
+                changes += list(kwargs.items())
+
+            # status_id -> (status_id, value, optionals), a later value for the same status wins
+            writes = {}
+            for state, value in changes:
+                if state in self._device["status"]:
+                    status_id = self._device["status"][state]["status_id"]
+                    optionals = self._vimarconnection.get_optionals_param(state)
+                    writes.pop(status_id, None)
+                    writes[status_id] = (status_id, str(value), optionals)
+                    self._device["status"][state]["status_value"] = str(value)
+                else:
+                    self._logger.warning(
+                        "Could not find state %s in device %s - %s - could not change value to: %s",
+                        state,
+                        self.name,
+                        self._device_id,
+                        value,
+                    )
+
+            if writes:
+                delay = 0.0
+                if any(state in self._debounced_states for state, value in changes):
+                    delay = self._coordinator.get_write_delay(self.entity_platform)
+                # all writes of one action are sent together
+                self.hass.async_create_task(self._async_write_states(list(writes.values()), delay))
+                # local value is optimistic - the next poll has to confirm or revert it
+                self._coordinator.invalidate_device_state(self._device_id)
                 self.request_statemachine_update()
 
-        # TODO - call async_add_executor_job with asyncio.gather maybe?
+    async def _async_write_states(self, writes, delay=0.0):
+        """Send a batch of status writes and log one combined result.
+
+        Runs as a task of its own, so errors are logged here instead of being
+        raised to nobody.
+        """
+        try:
+            errors = await self._coordinator.write_queue.async_write(self._device_id, writes, delay)
+        except (VimarApiError, TimeoutError) as err:
+            self._logger.error(
+                "Could not change %d states of device %s - %s: %s",
+                len(writes),
+                self.name,
+                self._device_id,
+                err,
+            )
+            return
+        finally:
+            # confirm or revert the optimistic local values right away
+            self._coordinator.async_schedule_device_refresh(self._device_id)
+        if errors:
+            self._logger.warning(
+                "Could not change %d of %d states of device %s - %s: %s",
+                len(errors),
+                len(writes),
+                self.name,
+                self._device_id,
+                errors,
+            )
 
     def get_state(self, state):
         """Get state of the local device state."""
@@ -2,13 +2,18 @@
 
 from __future__ import annotations
 
+import copy
+import hashlib
 import logging
 import os
+import re
 import ssl
-import sys
+import threading
+import time
 import xml.etree.ElementTree as xmlTree
 from collections.abc import Callable
-from typing import TypedDict
+from functools import partial
+from typing import TYPE_CHECKING, TypedDict
 from xml.etree import ElementTree
 
 import requests
@@ -16,6 +21,14 @@ import urllib3
 from requests import adapters
 from requests.exceptions import HTTPError
 
+from .vimarlink_auth import VimarAuth
+from .vimarlink_deadline import VimarDeadline
+from .vimarlink_pagesize import VimarPageSizeTuner
+from .vimarlink_polling import get_poll_interval
+
+if TYPE_CHECKING:
+    from .vimarlink_trace import VimarTracePlayer, VimarTraceRecorder
+
 # Suppress InsecureRequestWarning when using self-signed certificates
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
@@ -45,6 +58,8 @@ except ImportError:
 _LOGGER = logging.getLogger(__name__)
 _LOGGER_isDebug = _LOGGER.isEnabledFor(logging.DEBUG)
 MAX_ROWS_PER_REQUEST = 300
+# keep-alive connections held open to the webserver (polling + concurrent writes)
+DEFAULT_POOL_MAXSIZE = 4
 
 # from homeassistant/components/switch/__init__.py
 DEVICE_CLASS_OUTLET = "outlet"
@@ -59,6 +74,72 @@ DEVICE_CLASS_PRESSURE = "pressure"
 
 SSL_IGNORED = False
 
+SOAP_HEADERS = {
+    "SOAPAction": "dbSoapRequest",
+    "SOAPServer": "",
+    # 'X-Requested-With' => 'XMLHttpRequest',
+    "Content-Type": 'text/xml; charset="UTF-8"',
+    # needs to be set to overcome:
+    # 'Expect' => '100-continue'
+    # otherwise header and payload is send in two requests if payload
+    # is bigger then 1024byte
+    "Expect": "",
+}
+
+FORM_HEADERS = {
+    "Content-Type": "application/x-www-form-urlencoded",
+    # see SOAP_HEADERS
+    "Expect": "",
+}
+
+# characters weighted by their position in the fingerprint of object names
+FINGERPRINT_CHARS = " 0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz_-.,:/()"
+
+# answers op=getjScriptEnvironment for a valid session id
+CHECK_SESSION_PATH = "vimarbyweb/modules/system/dpadaction.php"
+
+
+class ResumingSSLContext(ssl.SSLContext):
+    """SSL context that offers the last negotiated TLS session on new connections.
+
+    The embedded webserver is slow to complete a full handshake, resuming the
+    previous session skips the key exchange whenever the pool opens a new socket.
+    """
+
+    _last_session: ssl.SSLSession | None = None
+
+    def wrap_socket(self, sock, *args, **kwargs):
+        """Wrap socket and try to resume the previous TLS session."""
+        if kwargs.get("session") is None and self._last_session is not None:
+            kwargs["session"] = self._last_session
+        ssl_sock = super().wrap_socket(sock, *args, **kwargs)
+        try:
+            if ssl_sock.session is not None:
+                self._last_session = ssl_sock.session
+        except (ssl.SSLError, ValueError):
+            self._last_session = None
+        return ssl_sock
+
+
+def create_vimar_ssl_context() -> ssl.SSLContext:
+    """Create the ssl context used to talk with the vimar webserver."""
+    ssl_context = ResumingSSLContext(ssl.PROTOCOL_TLS_CLIENT)
+    ssl_context.load_default_certs()
+
+    # Sets up old and insecure TLSv1.
+    ssl_context.options &= ~ssl.OP_NO_TLSv1_3 & ~ssl.OP_NO_TLSv1_2 & ~ssl.OP_NO_TLSv1_1
+    ssl_context.minimum_version = ssl.TLSVersion.TLSv1
+    ssl_context.check_hostname = False
+
+    # Also you could try to set ciphers manually as it was in my case.
+    # On other ciphers their server was reset the connection with:
+    # [Errno 104] Connection reset by peer
+    # ssl_context.set_ciphers("ECDHE-RSA-AES256-SHA")
+    # https://stackoverflow.com/questions/38715570/restrieve-up-to-date-tls-cipher-suite-with-python
+    # table https://testssl.sh/openssl-iana.mapping.html
+    ssl_context.set_ciphers("AES256-SHA")
+    return ssl_context
+
 
 class HTTPAdapter(adapters.HTTPAdapter):
     """Override the default request method to support old SSL."""
@@ -67,38 +148,95 @@ class HTTPAdapter(adapters.HTTPAdapter):
 
     def __init__(self, *args, **kwargs):
         """Initialize the HTTPAdapter."""
+        # the context is shared by all connections of this adapter, so tls sessions can be resumed
+        self._ssl_context = create_vimar_ssl_context()
         super().__init__(*args, **kwargs)
 
-    # def init_poolmanager(self, *args, **kwargs):
-    #     """Initialize the connection pool."""
-    #     ssl_context = ssl.create_default_context()
-    #     ssl_context.minimum_version = ssl.TLSVersion.TLSv1
-    #     kwargs["ssl_context"] = ssl_context
-    #     return super().init_poolmanager(*args, **kwargs)
-
     def init_poolmanager(self, *args, **kwargs):
         """Initialize the connection pool."""
-        ssl_context = ssl.create_default_context()
-
-        # Sets up old and insecure TLSv1.
-        ssl_context.options &= ~ssl.OP_NO_TLSv1_3 & ~ssl.OP_NO_TLSv1_2 & ~ssl.OP_NO_TLSv1_1
-        ssl_context.minimum_version = ssl.TLSVersion.TLSv1
-        ssl_context.check_hostname = False
-
-        # Also you could try to set ciphers manually as it was in my case.
-        # On other ciphers their server was reset the connection with:
-        # [Errno 104] Connection reset by peer
-        # ssl_context.set_ciphers("ECDHE-RSA-AES256-SHA")
-        # https://stackoverflow.com/questions/38715570/restrieve-up-to-date-tls-cipher-suite-with-python
-        # table https://testssl.sh/openssl-iana.mapping.html
-        ssl_context.set_ciphers("AES256-SHA")
-
         # See urllib3.poolmanager.SSL_KEYWORDS for all available keys.
-        kwargs["ssl_context"] = ssl_context
+        kwargs["ssl_context"] = self._ssl_context
         # kwargs["assert_hostname"] = False
         return super().init_poolmanager(*args, **kwargs)
 
 
+_XML_ENTITY_RE = re.compile(r"&(#x[0-9a-fA-F]+|#[0-9]+|lt|gt|amp|quot|apos);")
+_XML_ENTITIES = {"lt": "<", "gt": ">", "amp": "&", "quot": '"', "apos": "'"}
+
+
+def _unescape_xml_entity(match):
+    name = match.group(1)
+    if name[0] == "#":
+        return chr(int(name[2:], 16) if name[1] in "xX" else int(name[1:]))
+    return _XML_ENTITIES[name]
+
+
+def extract_soap_payload(response: str) -> str | None:
+    """Cut the text of the <payload> element out of a soap response.
+
+    Returns None if there is no payload, more than one, or one holding
+    markup, the whole document has to be parsed then.
+    """
+    start = response.find("<payload>")
+    if start == -1:
+        return None
+    start += len("<payload>")
+    end = response.find("</payload>", start)
+    if end == -1 or response.find("<payload", end) != -1:
+        return None
+
+    payload = response[start:end]
+    if not payload or "<" in payload:
+        return None
+    if "\r" in payload:
+        payload = payload.replace("\r\n", "\n").replace("\r", "\n")
+    if "&" in payload:
+        payload = _XML_ENTITY_RE.sub(_unescape_xml_entity, payload)
+    return payload
+
+
+def parse_sql_columns(payload: str) -> tuple[tuple[str, ...], list[tuple[str, ...]]]:
+    """Parse a DML-SQL payload into the header and the rows as tuples.
+
+    Example payload string:
+    Response: DBMG-000
+    NextRows: 2
+    Row000001: 'MAIN_GROUPS'
+    Row000002: '435,439,454,458,473,494'
+
+    Values are quoted but not escaped, so only the sequence ',' separates
+    them. Quotes and commas inside a value are kept, a line that does not
+    start with Row belongs to the value of the previous line.
+    """
+    parts = payload.split("\nRow")
+    if parts[0].startswith("Row"):
+        parts[0] = parts[0][3:]
+    else:
+        # Response and NextRows lines are not needed
+        for line in parts.pop(0).split("\n"):
+            if line.strip() and line.find(":") == -1:
+                raise ValueError("Missing :-character in response line: %s" % line)
+    if not parts:
+        return (), []
+
+    # split each "000002: 'a','b'" part into its values
+    rows = [tuple(part.partition(": '")[2].rstrip()[:-1].split("','")) for part in parts]
+    header = rows.pop(0)
+    if rows and set(map(len, rows)) != {len(header)}:
+        raise ValueError("Rows do not match the %d fields of: %s" % (len(header), header))
+    return header, rows
+
+
+def is_invalid_session_payload(payload: str | None) -> bool:
+    """Check if a payload is the answer to a request sent with an unknown or expired session id.
+
+    Instead of a result list the webserver sends a single line error text
+    that mentions the session. Other errors, like an unknown object of a
+    SETVALUE, are not taken as an expired session.
+    """
+    return bool(payload) and "\n" not in payload.strip() and "session" in payload.lower()
+
+
 class VimarApiError(Exception):
     """Vimar API General Exception."""
 
@@ -126,6 +264,18 @@ class VimarConnectionError(VimarApiError):
     pass
 
 
+class VimarDeadlineExceeded(VimarConnectionError):
+    """The time budget of a poll is used up."""
+
+    pass
+
+
+class VimarSessionExpired(VimarConnectionError):
+    """The webserver did not accept the session id of a request."""
+
+    pass
+
+
 # single device
 #   'room_ids': number[] (maybe empty, ids of rooms)
 #   'object_id': number (unique id of entity)
@@ -161,11 +311,16 @@ class VimarLink:
     _port = 443
     _username = ""
     _password = ""
-    _session_id = None
     _room_ids = None
     _rooms = None
     _certificate = None
     _timeout = 6
+    _pool_maxsize = DEFAULT_POOL_MAXSIZE
+    # page device selects after the last status id instead of LIMIT offset,
+    # turned off if the webserver only answers offset paged selects
+    keyset_paging = True
+    # a keyset select returned rows, an empty first page is no reason to try offset paging
+    _keyset_confirmed = False
 
     def __init__(
         self,
@@ -176,6 +331,7 @@ class VimarLink:
         password=None,
         certificate=None,
         timeout=None,
+        pool_maxsize=None,
     ):
         """Prepare connections instance for vimar webserver."""
         _LOGGER.info("Vimar link initialized")
@@ -197,6 +353,50 @@ class VimarLink:
             self._certificate = certificate
         if timeout is not None:
             self._timeout = timeout
+        if pool_maxsize is not None and pool_maxsize > 0:
+            self._pool_maxsize = pool_maxsize
+
+        self._auth = VimarAuth(
+            self._schema,
+            self._host,
+            self._port,
+            self._username,
+            self._password,
+            self._certificate,
+        )
+        self._http_session: requests.Session | None = None
+        self._http_session_lock = threading.Lock()
+        # object_ids that were added or got a new status value while parsing device lists
+        self._changed_object_ids: set[str] = set()
+        self._page_sizes = VimarPageSizeTuner(self._timeout)
+
+    def _get_http_session(self) -> requests.Session:
+        """Return the keep-alive session shared by all requests of this link."""
+        with self._http_session_lock:
+            if self._http_session is None:
+                session = requests.Session()
+                session.mount(
+                    "https://",
+                    HTTPAdapter(pool_connections=1, pool_maxsize=self._pool_maxsize),
+                )
+                session.mount(
+                    "http://",
+                    adapters.HTTPAdapter(pool_connections=1, pool_maxsize=self._pool_maxsize),
+                )
+                self._http_session = session
+            return self._http_session
+
+    def _reset_http_session(self):
+        """Drop all pooled connections, next request will open a fresh one."""
+        with self._http_session_lock:
+            session = self._http_session
+            self._http_session = None
+        if session is not None:
+            session.close()
+
+    def close(self):
+        """Close all connections to the webserver."""
+        self._reset_http_session()
 
     def install_certificate(self):
         """Download the CA certificate from the web server to be used for the next calls."""
@@ -206,57 +406,57 @@ class VimarLink:
             temp_certificate = self._certificate
             self._certificate = None
 
-            downloadPath = "%s://%s:%s/vimarbyweb/modules/vimar-byme/script/rootCA.VIMAR.crt" % (
-                self._schema,
-                self._host,
-                self._port,
-            )
-
-            certificate_file = self._request(downloadPath)
+            certificate_file = self._request(self._get_certificate_url())
             # get it back
             self._certificate = temp_certificate
 
-            if certificate_file is None or certificate_file is False:
-                raise VimarConnectionError(
-                    "Certificate download failed: %s" % str(self.request_last_exception)
-                )
+            cert_changed = self._store_certificate(certificate_file)
+            if cert_changed:
+                # pooled connections were verified against the old certificate
+                self._reset_http_session()
 
-            # compare current cert with downloaded cert, prevent saving if not changed
+        return cert_changed
+
+    def _get_certificate_url(self):
+        """Return the download url of the CA certificate."""
+        return "%s://%s:%s/vimarbyweb/modules/vimar-byme/script/rootCA.VIMAR.crt" % (
+            self._schema,
+            self._host,
+            self._port,
+        )
+
+    def _store_certificate(self, certificate_file):
+        """Save a downloaded certificate, return True if it differs from the stored one."""
+        if certificate_file is None or certificate_file is False:
+            raise VimarConnectionError(
+                "Certificate download failed: %s" % str(self.request_last_exception)
+            )
+
+        # compare current cert with downloaded cert, prevent saving if not changed
+        old_cert = None
+        try:
+            file = open(self._certificate)
+            old_cert = file.read()
+            file.close()
+        except OSError:
             old_cert = None
-            try:
-                file = open(self._certificate)
-                old_cert = file.read()
-                file.close()
-            except OSError:
-                old_cert = None
-
-            if old_cert != certificate_file:
-                cert_changed = True
-                try:
-                    file = open(self._certificate, "w")
-                    file.write(certificate_file)
-                    file.close()
-                except OSError as err:
-                    raise VimarApiError("Saving certificate failed: %s" % str(err))
 
-                _LOGGER.debug("Downloaded Vimar CA certificate to: %s", self._certificate)
+        if old_cert == certificate_file:
+            return False
 
-        return cert_changed
+        try:
+            file = open(self._certificate, "w")
+            file.write(certificate_file)
+            file.close()
+        except OSError as err:
+            raise VimarApiError("Saving certificate failed: %s" % str(err))
+
+        _LOGGER.debug("Downloaded Vimar CA certificate to: %s", self._certificate)
+        return True
 
     def login(self):
         """Call login and store the session id."""
-
-        # self._port = "444"
-        loginurl = (
-            "%s://%s:%s/vimarbyweb/modules/system/user_login.php?sessionid=&username=%s&password=%s&remember=0&op=login"
-            % (
-                self._schema,
-                self._host,
-                self._port,
-                self._username,
-                self._password,
-            )
-        )
+        loginurl = self._get_login_url()
 
         use_cert = self._certificate is not None and len(self._certificate) != 0
         # if first time, cert not exists
@@ -271,14 +471,7 @@ class VimarLink:
         result = self._request(loginurl)
 
         if result is False and use_cert:  # if problem is of certificate, download it again
-            curr_ex = self.request_last_exception
-            curr_ex_str = str(curr_ex)
-            # if certified not valid:
-            # SSLError(SSLCertVerificationError(1, '[SSL: CERTIFICATE_VERIFY_FAILED] certificate verify failed: unable to get issuer certificate (_ssl.c:1129)
-            # SSLError(SSLError(136, '[X509: NO_CERTIFICATE_OR_CRL_FOUND] no certificate or crl found
-            # if file not found
-            # Could not find a suitable TLS CA certificate bundle, invalid path: rootCA.VIMAR.crt
-            if "SSLError" in curr_ex_str or "TLS CA" in curr_ex_str:
+            if self._is_certificate_error(self.request_last_exception):
                 try:
                     # return downloaded only if changed, then, if is expired
                     cert_downloaded = self.install_certificate()
@@ -289,6 +482,39 @@ class VimarLink:
                     # self.request_last_exception = curr_ex
                     pass
 
+        return self._handle_login_response(result)
+
+    def _get_login_url(self):
+        """Return the login url including the credentials."""
+        # self._port = "444"
+        return (
+            "%s://%s:%s/vimarbyweb/modules/system/user_login.php?sessionid=&username=%s&password=%s&remember=0&op=login"
+            % (
+                self._schema,
+                self._host,
+                self._port,
+                self._username,
+                self._password,
+            )
+        )
+
+    def _is_certificate_error(self, curr_ex):
+        """Check if a failed request was caused by a missing or outdated certificate."""
+        curr_ex_str = str(curr_ex)
+        # if certified not valid:
+        # SSLError(SSLCertVerificationError(1, '[SSL: CERTIFICATE_VERIFY_FAILED] certificate verify failed: unable to get issuer certificate (_ssl.c:1129)
+        # SSLError(SSLError(136, '[X509: NO_CERTIFICATE_OR_CRL_FOUND] no certificate or crl found
+        # if file not found
+        # Could not find a suitable TLS CA certificate bundle, invalid path: rootCA.VIMAR.crt
+        return (
+            "SSLError" in curr_ex_str
+            or "TLS CA" in curr_ex_str
+            or "CERTIFICATE_VERIFY_FAILED" in curr_ex_str
+            or isinstance(curr_ex, ssl.SSLError | FileNotFoundError)
+        )
+
+    def _handle_login_response(self, result):
+        """Parse the login response and store the session id."""
         if result is not None:
             if result is False:
                 raise VimarConnectionError(
@@ -326,6 +552,39 @@ class VimarLink:
 
         return result
 
+    @property
+    def _session_id(self):
+        """Return the current session id, kept by the session manager."""
+        return self._auth.session_id
+
+    @_session_id.setter
+    def _session_id(self, session_id):
+        self._auth.session_id = session_id
+
+    def get_session_metrics(self):
+        """Return the learned session lifetime and the number of logins after and before expiry."""
+        return {
+            "lifetime": self._auth.lifetime,
+            "renewals": self._auth.renewals,
+            "refreshes": self._auth.refreshes,
+        }
+
+    def _call_with_session(self, call):
+        """Run call, renew an expired session and run it once more.
+
+        call has to build its request with the current session id. Requests
+        failing together share one login, see VimarAuth.renew.
+        """
+        session_id = self._session_id
+        try:
+            result = call()
+        except VimarSessionExpired as err:
+            _LOGGER.info("%s - renewing the session", err)
+            self._auth.renew(session_id, self.login)
+            return call()
+        self._auth.confirm_session(session_id)
+        return result
+
     def is_logged(self):
         """Check if session is available"""
         return self._session_id is not None
@@ -340,22 +599,52 @@ class VimarLink:
     def check_session(self):
         """Check if session is valid - if not, clear session id."""
         # _LOGGER.error("calling url: " + url)
-        headers = {
-            "Content-Type": "application/x-www-form-urlencoded",
-            # needs to be set to overcome:
-            # 'Expect' => '100-continue'
-            # otherwise header and payload is send in two requests if payload
-            # is bigger then 1024byte
-            "Expect": "",
-        }
-
-        post = ("sessionid=%s&" "op=getjScriptEnvironment&" "context=runtime") % self._session_id
+        return self._request_vimar(self._get_check_session_post(), CHECK_SESSION_PATH, FORM_HEADERS)
 
-        return self._request_vimar(post, "vimarbyweb/modules/system/dpadaction.php", headers)
+    def _get_check_session_post(self):
+        """Build post variables for the session check."""
+        return ("sessionid=%s&" "op=getjScriptEnvironment&" "context=runtime") % self._session_id
 
     def set_device_status(self, object_id, status, optionals="NO-OPTIONALS"):
         """Set a given status for one device."""
-        post = (
+        return self._call_with_session(
+            partial(self._send_device_status, object_id, status, optionals)
+        )
+
+    def _send_device_status(self, object_id, status, optionals):
+        post = self._get_set_device_status_post(object_id, status, optionals)
+
+        response = self._request_vimar_soap(post)
+        return self._handle_set_device_status_response(response, post)
+
+    def set_device_status_batch(self, writes):
+        """Set several statuses back-to-back, return {status_id: error} of failed writes.
+
+        writes is a list of (status_id, status, optionals) tuples, usually all
+        changes of one entity action. SETVALUE only accepts a single object per
+        envelope, so the writes are sent one after another over the pooled
+        connection.
+        """
+        errors = {}
+        for object_id, status, optionals in writes:
+            try:
+                error = self._call_with_session(
+                    partial(self._send_device_status_batch, object_id, status, optionals)
+                )
+            except VimarSessionExpired as err:
+                error = str(err)
+            if error is not None:
+                errors[object_id] = error
+        return errors
+
+    def _send_device_status_batch(self, object_id, status, optionals):
+        post = self._get_set_device_status_post(object_id, status, optionals)
+        response = self._request_vimar_soap(post)
+        return self._get_set_device_status_error(response, post)
+
+    def _get_set_device_status_post(self, object_id, status, optionals="NO-OPTIONALS"):
+        """Build soap envelope to set a given status for one device."""
+        return (
             '<soapenv:Envelope xmlns:soapenv="http://schemas.xmlsoap.org/soap/envelope/">'
             '<soapenv:Body><service-runonelement xmlns="urn:xmethods-dpadws">'
             "<payload>%s</payload>"
@@ -368,24 +657,33 @@ class VimarLink:
             "</service-runonelement></soapenv:Body></soapenv:Envelope>"
         ) % (status, optionals, self._session_id, object_id)
 
-        response = self._request_vimar_soap(post)
+    def _handle_set_device_status_response(self, response, post):
+        """Check the response of a set status request, return the error text of the webserver."""
         if response is not None and response is not False:
 
             payload = response.find(".//payload")
 
             # usually set_status should not return a payload
             if payload is not None:
+                if is_invalid_session_payload(payload.text):
+                    # the value was not written, it is safe to send it again
+                    raise VimarSessionExpired("Invalid session: %s", payload.text)
                 _LOGGER.warning(
                     "set_device_status returned a payload: "
                     + (payload.text or "unknown error")
                     + " from post request: "
                     + post
                 )
-                parsed_data = self._parse_sql_payload(payload.text)
-                return parsed_data
+                return payload.text or "unknown error"
 
         return None
 
+    def _get_set_device_status_error(self, response, post):
+        """Return the reason a set status request failed, None on success."""
+        if response is False:
+            return str(self.request_last_exception or "request failed")
+        return self._handle_set_device_status_response(response, post)
+
     def get_optionals_param(self, state):
         """Return SYNCDB for climates states."""
         # if (state in ['setpoint', 'stagione', 'unita', 'centralizzato', 'funzionamento', 'temporizzazione', 'channel', 'source', 'global_channel']):
@@ -405,10 +703,13 @@ class VimarLink:
 
     def get_device_status(self, object_id):
         """Get attribute status for a single device."""
-        status_list = {}
+        payload = self._request_vimar_sql(self._get_device_status_select(object_id))
+        return self._parse_device_status(payload)
 
+    def _get_device_status_select(self, object_id):
+        """Build sql to get the attribute status for a single device."""
         # , o3.OPTIONALP AS status_range
-        select = """SELECT o3.ID AS status_id, o3.NAME AS status_name, o3.CURRENT_VALUE AS status_value
+        return """SELECT o3.ID AS status_id, o3.NAME AS status_name, o3.CURRENT_VALUE AS status_value
 FROM DPADD_OBJECT_RELATION r3
 INNER JOIN DPADD_OBJECT o3 ON r3.CHILDOBJ_ID = o3.ID AND o3.type = "BYMEOBJ"
 WHERE r3.PARENTOBJ_ID IN (%s) AND r3.RELATION_WEB_TIPOLOGY = "BYME_IDXOBJ_RELATION"
@@ -416,7 +717,9 @@ ORDER BY o3.ID;""" % (
             object_id
         )
 
-        payload = self._request_vimar_sql(select)
+    def _parse_device_status(self, payload):
+        """Convert sql result rows into a status list."""
+        status_list = {}
         if payload is not None:
             # there will be multible times the same device
             # each having a different status part (on/off + dimming etc.)
@@ -441,6 +744,53 @@ ORDER BY o3.ID;""" % (
 
         return {}
 
+    def get_devices_status(self, object_ids: list[str]):
+        """Get attribute status of several devices, see _parse_devices_status."""
+        statuses: dict[str, dict] = {}
+        for chunk in self._get_object_id_chunks(object_ids):
+            payload = self._request_vimar_sql(
+                self._get_devices_status_select(chunk),
+                columnar=True,
+                query="device_status",
+                page_size=len(chunk),
+            )
+            self._parse_devices_status(payload, statuses)
+        return statuses
+
+    def _get_object_id_chunks(self, object_ids: list[str]):
+        """Split object ids into chunks that fit into a single request."""
+        object_ids = [str(object_id) for object_id in object_ids if str(object_id).isdigit()]
+        size = self.get_page_size("device_status")
+        return [object_ids[i : i + size] for i in range(0, len(object_ids), size)]
+
+    def _get_devices_status_select(self, object_ids: list[str]):
+        """Build sql to get the attribute status of several devices."""
+        return """SELECT r3.PARENTOBJ_ID AS object_id, o3.ID AS status_id, o3.NAME AS status_name,
+o3.CURRENT_VALUE AS status_value
+FROM DPADD_OBJECT_RELATION r3
+INNER JOIN DPADD_OBJECT o3 ON r3.CHILDOBJ_ID = o3.ID AND o3.type = "BYMEOBJ"
+WHERE r3.PARENTOBJ_ID IN (%s) AND r3.RELATION_WEB_TIPOLOGY = "BYME_IDXOBJ_RELATION"
+ORDER BY o3.ID;""" % ",".join(object_ids)
+
+    def _parse_devices_status(self, payload, statuses):
+        """Add status lists of columnar sql rows to statuses, by object_id."""
+        if payload is None:
+            raise VimarConnectionError("Could not read device states")
+        header, rows = payload
+        if not rows:
+            return statuses
+        columns = [header.index(name) for name in ("object_id", "status_id", "status_name")]
+        value_idx = header.index("status_value")
+        for row in rows:
+            object_id, status_id, status_name = (row[idx] for idx in columns)
+            if status_name == "":
+                continue
+            statuses.setdefault(object_id, {})[status_name] = {
+                "status_id": status_id,
+                "status_value": row[value_idx],
+            }
+        return statuses
+
     # Device example:
     #   'room_id' => string '439' (length=3)
     #   'object_id' => string '768' (length=3)
@@ -493,21 +843,169 @@ ORDER BY o3.ID;""" % (
         # define a page size
         limit = MAX_ROWS_PER_REQUEST
 
-        if callable(method):
-            result = method(objectlist, start, limit)
-            if result is not None:
-                objectlist, state_count = result
-                # if method returns excatly page size results - we check for another page
-                if state_count == limit:
-                    objectlist, state_count = self.get_paged_results(
-                        method, objectlist, start + state_count
-                    )
-                return objectlist, start + state_count
-            else:
-                raise VimarApiError("Calling invalid method results: %s", method)
-        else:
+        if not callable(method):
             raise VimarApiError("Calling invalid method for paged results: %s", method)
 
+        state_count = 0
+        while True:
+            result = method(objectlist, start + state_count, limit)
+            if result is None:
+                raise VimarApiError("Calling invalid method results: %s", method)
+            objectlist, page_count = result
+            state_count += page_count
+            # if method returns excatly page size results - we check for another page
+            if page_count != limit:
+                break
+
+        return objectlist, start + state_count
+
+    def iter_sql_pages(
+        self,
+        get_select: Callable[..., str],
+        limit: int | None = None,
+        key: str | None = None,
+        query: str | None = None,
+        deadline: VimarDeadline | None = None,
+    ):
+        """Yield the rows of a paged select one page at a time.
+
+        get_select builds the statement for start, limit and the last key of
+        the previous page. With a key column, pages continue after the last
+        key and object id instead of skipping start rows, unless keyset
+        paging is off.
+        Without limit, pages of a query type get their size from the page size
+        tuner. The next page is only requested once the caller is done with
+        the current one. All pages share the time budget of deadline.
+        """
+        start = 0
+        after_id = 0 if key is not None and self.keyset_paging else None
+        after_object_id = None
+        while True:
+            page_size = self._get_page_limit(limit, query)
+            payload = self._request_vimar_sql(
+                get_select(start, page_size, after_id, after_object_id=after_object_id),
+                query=query,
+                page_size=page_size,
+                deadline=deadline,
+            )
+            if not payload and after_id == 0 and not self._keyset_confirmed:
+                # an empty first page could be a webserver without keyset support
+                offset_payload = self._request_vimar_sql(
+                    get_select(start, page_size, None), deadline=deadline
+                )
+                after_id = self._check_keyset_fallback(offset_payload)
+                payload = payload if after_id == 0 else offset_payload
+            if payload is None:
+                raise VimarApiError("Calling invalid select for paged results: %s", get_select)
+            if payload and after_id is not None:
+                self._keyset_confirmed = True
+            yield payload
+            # if the page holds excatly page size rows - we check for another page
+            if len(payload) != page_size:
+                return
+            start += page_size
+            if after_id is not None:
+                after_id, after_object_id = self._get_keyset_cursor(payload, key)
+
+    def get_page_size(self, query: str) -> int:
+        """Return the number of rows per page chosen for a query type."""
+        return self._page_sizes.get_page_size(query, MAX_ROWS_PER_REQUEST)
+
+    def get_page_size_metrics(self):
+        """Return chosen page size and page timings per query type."""
+        return self._page_sizes.get_metrics()
+
+    def _get_page_limit(self, limit: int | None, query: str | None) -> int:
+        """Return the tuned page size of a query type, unless a limit is given."""
+        if limit is None and query is not None:
+            return self.get_page_size(query)
+        return self._sanitize_limits(0, limit)[1]
+
+    def _record_page(self, query: str, page_size: int, response, payload):
+        """Feed duration, size and row count of a page into the page size tuner."""
+        if isinstance(response, str):
+            rows = payload[1] if isinstance(payload, tuple) else payload
+            self._page_sizes.record(
+                query,
+                MAX_ROWS_PER_REQUEST,
+                page_size,
+                len(rows or ()),
+                self.request_last_duration,
+                len(response),
+            )
+        elif isinstance(self.request_last_exception, (TimeoutError, requests.exceptions.Timeout)):
+            self._page_sizes.record_timeout(query, MAX_ROWS_PER_REQUEST)
+
+    def _get_row_range_select(self, get_select: Callable[..., str], key: str):
+        """Build sql that counts the rows of a paged select and finds the range of its key."""
+        return "SELECT COUNT(*) AS row_count, MIN(%s) AS min_id, MAX(%s) AS max_id FROM (%s);" % (
+            key,
+            key,
+            get_select(0, 0, None).strip().rstrip(";"),
+        )
+
+    def _parse_row_range(self, payload):
+        """Return row count, smallest and largest key of a row range select or None."""
+        try:
+            row = payload[0]
+            return int(row["row_count"]), int(row["min_id"] or 0), int(row["max_id"] or 0)
+        except (IndexError, KeyError, TypeError, ValueError):
+            return None
+
+    def _get_keyset_cursor(self, payload, key):
+        """Return the key and object id of the last row, the next keyset page continues after both.
+
+        A status object can belong to several devices, so a page can end
+        between rows with the same key.
+        """
+        return int(payload[-1][key]), int(payload[-1]["object_id"])
+
+    def _check_keyset_fallback(self, offset_payload):
+        """Turn keyset paging off if the offset select found rows, return the key to continue with."""
+        if not offset_payload:
+            return 0
+        _LOGGER.warning("Webserver does not support keyset paging - falling back to offset paging")
+        self.keyset_paging = False
+        return None
+
+    def iter_remote_device_pages(self, deadline: VimarDeadline | None = None):
+        """Yield the rows of all devices that can be triggered remotly page by page."""
+        return self.iter_sql_pages(
+            self._get_remote_devices_select,
+            key="status_id",
+            query="remote_devices",
+            deadline=deadline,
+        )
+
+    def iter_room_device_pages(self, deadline: VimarDeadline | None = None):
+        """Yield the rows of all devices that belong to a room page by page."""
+        if self._room_ids is None:
+            return iter(())
+        return self.iter_sql_pages(
+            self._get_room_devices_select, key="status_id", query="room_devices", deadline=deadline
+        )
+
+    def parse_device_pages(
+        self,
+        pages,
+        devices: dict[str, VimarDevice] | None = None,
+        onlyUpdate: bool = False,
+        seen: set[str] | None = None,
+    ):
+        """Merge each page into the device list as it arrives, return devices and row count.
+
+        Object ids of all rows are added to seen, if given.
+        """
+        if devices is None:
+            devices = {}
+        row_count = 0
+        for page in pages:
+            self._parse_device_list(page, devices, onlyUpdate)
+            row_count += len(page)
+            if seen is not None:
+                seen.update(row["object_id"] for row in page)
+        return devices, row_count
+
     def get_room_devices(
         self,
         devices: dict[str, VimarDevice] | None = None,
@@ -524,6 +1022,20 @@ ORDER BY o3.ID;""" % (
 
         _LOGGER.debug("get_room_devices started - from %d to %d", start, start + limit)
 
+        # passo OnlyUpdate a True, poichè deve solo riempire le informazioni delle room per gli oggetti esistenti
+        return self._generate_device_list(
+            self._get_room_devices_select(start, limit), devices, True
+        )
+
+    def _get_room_devices_select(
+        self,
+        start: int,
+        limit: int,
+        after_id: int | None = None,
+        until_id: int | None = None,
+        after_object_id: int | None = None,
+    ):
+        """Build sql to load all devices that belong to a room, after_id selects keyset paging."""
         select = """SELECT GROUP_CONCAT(r2.PARENTOBJ_ID) AS room_ids, o2.ID AS object_id,
 o2.NAME AS object_name, o2.VALUES_TYPE as object_type,
 o3.ID AS status_id, o3.NAME AS status_name, o3.CURRENT_VALUE AS status_value
@@ -531,12 +1043,12 @@ FROM DPADD_OBJECT_RELATION r2
 INNER JOIN DPADD_OBJECT o2 ON r2.CHILDOBJ_ID = o2.ID AND o2.type = "BYMEIDX"
 INNER JOIN DPADD_OBJECT_RELATION r3 ON o2.ID = r3.PARENTOBJ_ID AND r3.RELATION_WEB_TIPOLOGY = "BYME_IDXOBJ_RELATION"
 INNER JOIN DPADD_OBJECT o3 ON r3.CHILDOBJ_ID = o3.ID AND o3.type = "BYMEOBJ" AND o3.NAME != ""
-WHERE r2.PARENTOBJ_ID IN (%s) AND r2.RELATION_WEB_TIPOLOGY = "GENERIC_RELATION"
+WHERE r2.PARENTOBJ_ID IN (%s) AND r2.RELATION_WEB_TIPOLOGY = "GENERIC_RELATION"%s
 GROUP BY o2.ID, o2.NAME, o2.VALUES_TYPE, o3.ID, o3.NAME, o3.CURRENT_VALUE
-LIMIT %d, %d;""" % (
+%s;""" % (
             self._room_ids,
-            start,
-            limit,
+            self._get_keyset_condition(after_id, until_id, after_object_id),
+            self._get_page_clause(start, limit, after_id),
         )
 
         # o3.OPTIONALP AS status_range
@@ -546,8 +1058,7 @@ LIMIT %d, %d;""" % (
         # o2.ENABLE_FLAG = "1" AND o2.IS_READABLE = "1" AND o2.IS_WRITABLE =
         # "1" AND o2.IS_VISIBLE = "1"
 
-        # passo OnlyUpdate a True, poichè deve solo riempire le informazioni delle room per gli oggetti esistenti
-        return self._generate_device_list(select, devices, True)
+        return select
 
     def get_remote_devices(
         self,
@@ -567,20 +1078,81 @@ LIMIT %d, %d;""" % (
 
         start, limit = self._sanitize_limits(start, limit)
 
-        select = """SELECT '' AS room_ids, o2.id AS object_id, o2.name AS object_name, o2.VALUES_TYPE AS object_type,
+        return self._generate_device_list(self._get_remote_devices_select(start, limit), devices)
+
+    def _get_remote_devices_select(
+        self,
+        start: int,
+        limit: int,
+        after_id: int | None = None,
+        until_id: int | None = None,
+        after_object_id: int | None = None,
+    ):
+        """Build sql to get all devices that can be triggered remotly, after_id selects keyset paging."""
+        return """SELECT '' AS room_ids, o2.id AS object_id, o2.name AS object_name, o2.VALUES_TYPE AS object_type,
 o2.NAME AS object_name, o2.VALUES_TYPE AS object_type,
 o3.ID AS status_id, o3.NAME AS status_name, o3.OPTIONALP as status_range, o3.CURRENT_VALUE AS status_value
 FROM DPADD_OBJECT AS o2
 INNER JOIN (SELECT CLASSNAME,IS_EVENT,IS_EXECUTABLE FROM DPAD_WEB_PHPCLASS) AS D_WP ON o2.PHPCLASS=D_WP.CLASSNAME
 INNER JOIN DPADD_OBJECT_RELATION r3 ON o2.ID = r3.PARENTOBJ_ID AND r3.RELATION_WEB_TIPOLOGY = "BYME_IDXOBJ_RELATION"
 INNER JOIN DPADD_OBJECT o3 ON r3.CHILDOBJ_ID = o3.ID AND o3.type IN ('BYMETVAL','BYMEOBJ') AND o3.NAME != ""
-WHERE o2.OPTIONALP NOT LIKE "%%restricted%%" AND o2.IS_VISIBLE=1 AND o2.OWNED_BY!="SYSTEM" AND o2.OPTIONALP LIKE "%%category=%%"
-LIMIT %d, %d;""" % (
-            start,
-            limit,
+WHERE o2.OPTIONALP NOT LIKE "%%restricted%%" AND o2.IS_VISIBLE=1 AND o2.OWNED_BY!="SYSTEM" AND o2.OPTIONALP LIKE "%%category=%%"%s
+%s;""" % (
+            self._get_keyset_condition(after_id, until_id, after_object_id),
+            self._get_page_clause(start, limit, after_id),
+        )
+
+    def _get_keyset_condition(
+        self, after_id: int | None, until_id: int | None = None, after_object_id: int | None = None
+    ):
+        """Build the condition that continues a keyset paged select after the last status id.
+
+        With after_object_id the rows of after_id that belong to devices up
+        to after_object_id were read already.
+        """
+        if after_id is None:
+            return ""
+        condition = ""
+        if after_object_id is not None:
+            condition = " AND (o3.ID > %d OR (o3.ID = %d AND o2.ID > %d))" % (
+                after_id,
+                after_id,
+                after_object_id,
+            )
+            after_id -= 1
+        if until_id is None:
+            return " AND o3.ID > %d%s" % (after_id, condition)
+        # no "<" - the statement is sent as xml text
+        return " AND o3.ID BETWEEN %d AND %d%s" % (after_id + 1, until_id, condition)
+
+    def _get_page_clause(self, start: int, limit: int, after_id: int | None):
+        """Build the limit clause, keyset pages need a stable order by status and object id."""
+        if limit == 0:
+            # all rows, used to count them
+            return ""
+        if after_id is None:
+            return "LIMIT %d, %d" % (start, limit)
+        return "ORDER BY o3.ID, o2.ID\nLIMIT %d" % limit
+
+    def get_status_values(self, status_ids: list[str], deadline: VimarDeadline | None = None):
+        """Get the current values of the given status ids as header and row tuples."""
+        if not status_ids:
+            return (), []
+        return self._request_vimar_sql(
+            self._get_status_values_select(status_ids),
+            columnar=True,
+            query="status_values",
+            page_size=len(status_ids),
+            deadline=deadline,
         )
 
-        return self._generate_device_list(select, devices)
+    def _get_status_values_select(self, status_ids: list[str]):
+        """Build sql that reads only the current value of known status objects."""
+        return """SELECT o3.ID AS status_id, o3.CURRENT_VALUE AS status_value
+FROM DPADD_OBJECT o3
+WHERE o3.ID IN (%s);""" % ",".join(
+            str(status_id) for status_id in status_ids if str(status_id).isdigit()
+        )
 
     def _sanitize_limits(self, start: int | None, limit: int | None):
         """Check for sane values in start and limit."""
@@ -595,9 +1167,15 @@ LIMIT %d, %d;""" % (
         self, select, devices: dict[str, VimarDevice] | None = None, onlyUpdate: bool = False
     ):
         """Generate device list from given sql statements."""
+        payload = self._request_vimar_sql(select)
+        return self._parse_device_list(payload, devices, onlyUpdate)
+
+    def _parse_device_list(
+        self, payload, devices: dict[str, VimarDevice] | None = None, onlyUpdate: bool = False
+    ):
+        """Merge sql result rows into the device list."""
         if devices is None:
             devices = {}
-        payload = self._request_vimar_sql(select)
         if payload is not None:
             # there will be multible times the same device
             # each having a different status part (on/off + dimming etc.)
@@ -620,19 +1198,20 @@ LIMIT %d, %d;""" % (
                         "icon": "",
                     }
                     devices[device["object_id"]] = deviceItem
+                    self._changed_object_ids.add(device["object_id"])
                 else:
                     # if object_id is already in the device list, we only update the state
                     deviceItem = devices[device["object_id"]]
 
                 if device["status_name"] != "":
-                    deviceItem["status"][device["status_name"]] = {
-                        "status_id": device["status_id"],
-                        "status_value": device["status_value"],
-                    }
+                    # update in place, so references to the status dict stay valid
+                    status = deviceItem["status"].setdefault(device["status_name"], {})
+                    if status.get("status_value") != device["status_value"]:
+                        self._changed_object_ids.add(device["object_id"])
+                    status["status_id"] = device["status_id"]
+                    status["status_value"] = device["status_value"]
                     if "status_range" in device:
-                        deviceItem["status"][device["status_name"]]["status_range"] = device[
-                            "status_range"
-                        ]
+                        status["status_range"] = device["status_range"]
 
                 if device["room_ids"] is not None and device["room_ids"] != "":
                     room_ids = []
@@ -655,20 +1234,79 @@ LIMIT %d, %d;""" % (
 
         return None
 
-    def get_room_ids(self):
+    def pop_changed_object_ids(self):
+        """Return and reset object_ids changed by the device lists parsed so far."""
+        changed_object_ids = self._changed_object_ids
+        self._changed_object_ids = set()
+        return changed_object_ids
+
+    def get_fingerprint(self, deadline: VimarDeadline | None = None):
+        """Return a fingerprint of rooms, devices and their relations, None if not supported."""
+        return self._parse_fingerprint(
+            self._request_vimar_sql(self._get_fingerprint_select(), deadline=deadline)
+        )
+
+    def _get_fingerprint_select(self):
+        """Build sql that aggregates ids and names of rooms, devices, states and their relations.
+
+        Current values are left out, so the fingerprint only changes if objects
+        are added, removed, renamed, hidden or moved to another room.
+        Characters of a name are weighted by their position in a fixed list,
+        as INSTR and SUBSTR work in the SQL dialects of SQLite and MySQL.
+        A webserver rejecting the select has no fingerprint, see VimarProject.
+        """
+        return """SELECT o.object_count, o.object_max_id, o.object_names, r.relation_count, r.relation_max_id, r.relation_ids
+FROM (SELECT COUNT(*) AS object_count, MAX(ID) AS object_max_id,
+SUM((LENGTH(NAME) + INSTR('%s', SUBSTR(NAME, 1, 1)) * 7 + INSTR('%s', SUBSTR(NAME, -1)) * 131 + IS_VISIBLE) * (ID %% 9973)) AS object_names
+FROM DPADD_OBJECT WHERE TYPE IN ('GROUP','BYMEIDX','BYMEOBJ')) AS o,
+(SELECT COUNT(*) AS relation_count, MAX(ID) AS relation_max_id,
+SUM((PARENTOBJ_ID %% 9973) * CHILDOBJ_ID) AS relation_ids
+FROM DPADD_OBJECT_RELATION WHERE RELATION_WEB_TIPOLOGY IN ('GENERIC_RELATION','BYME_IDXOBJ_RELATION')) AS r;""" % (
+            FINGERPRINT_CHARS,
+            FINGERPRINT_CHARS,
+        )
+
+    def _parse_fingerprint(self, payload):
+        """Join the aggregates of the fingerprint select."""
+        if not payload:
+            return None
+        return "-".join(str(value) for value in payload[0].values())
+
+    def forget_rooms(self):
+        """Load the main rooms again with the next get_room_ids."""
+        self._room_ids = None
+
+    def get_rooms(self):
+        """Return the main rooms found by get_room_ids."""
+        return self._rooms
+
+    def restore_rooms(self, rooms):
+        """Use main rooms of an earlier get_room_ids instead of loading them."""
+        if not rooms:
+            return
+        self._rooms = rooms
+        self._room_ids = ",".join(rooms)
+
+    def get_room_ids(self, deadline: VimarDeadline | None = None):
         """Load main rooms - later used in get_room_devices."""
         if self._room_ids is not None:
             return self._room_ids
 
         _LOGGER.debug("get_main_groups start")
 
-        select = """SELECT o1.id as id, o1.name as name
+        payload = self._request_vimar_sql(self._get_room_ids_select(), deadline=deadline)
+        return self._parse_room_ids(payload)
+
+    def _get_room_ids_select(self):
+        """Build sql to load main rooms."""
+        return """SELECT o1.id as id, o1.name as name
 FROM DPADD_OBJECT o0
 INNER JOIN DPADD_OBJECT_RELATION r1 ON o0.ID = r1.PARENTOBJ_ID AND r1.RELATION_WEB_TIPOLOGY = "GENERIC_RELATION"
 INNER JOIN DPADD_OBJECT o1 ON r1.CHILDOBJ_ID = o1.ID AND o1.type = "GROUP"
 WHERE o0.NAME = "_DPAD_DBCONSTANT_GROUP_MAIN";"""
 
-        payload = self._request_vimar_sql(select)
+    def _parse_room_ids(self, payload):
+        """Store main rooms from sql result rows."""
         if payload is not None:
             _LOGGER.debug("get_room_ids ends - payload: %s", str(payload))
             roomIds = []
@@ -687,8 +1325,28 @@ WHERE o0.NAME = "_DPAD_DBCONSTANT_GROUP_MAIN";"""
         else:
             return None
 
-    def _request_vimar_sql(self, select):
-        """Build sql request."""
+    def _request_vimar_sql(self, select, columnar=False, query=None, page_size=0, deadline=None):
+        """Build sql request, pages of a query type are measured for the page size tuner.
+
+        A request sent with an expired session is sent again with a new one.
+        """
+        return self._call_with_session(
+            partial(self._send_vimar_sql, select, columnar, query, page_size, deadline)
+        )
+
+    def _send_vimar_sql(self, select, columnar, query, page_size, deadline):
+        select, post = self._get_sql_post(select)
+
+        response = self._request(
+            self._get_url("cgi-bin/dpadws"), post, SOAP_HEADERS, deadline=deadline
+        )
+        parsed_data = self._handle_sql_text(response, select, post, columnar)
+        if query is not None:
+            self._record_page(query, page_size, response, parsed_data)
+        return parsed_data
+
+    def _get_sql_post(self, select):
+        """Escape sql statement and build soap envelope, returns both."""
         select = (
             select.replace("\r\n", " ")
             .replace("\n", " ")
@@ -710,15 +1368,31 @@ WHERE o0.NAME = "_DPAD_DBCONSTANT_GROUP_MAIN";"""
             "<statement>%s</statement><statement-len>%d</statement-len>"
             "</service-databasesocketoperation></soapenv:Body></soapenv:Envelope>"
         ) % (self._session_id, select, len(select))
+        return select, post
 
-        response = self._request_vimar_soap(post)
+    def _handle_sql_text(self, response, select, post, columnar=False):
+        """Parse the payload of a raw sql response, the xml tree is only built for errors."""
+        if response is not None and response is not False:
+            payload = extract_soap_payload(response)
+            if payload is not None:
+                if columnar:
+                    return self._parse_sql_columns(payload)
+                return self._parse_sql_payload(payload)
+            response = self._parse_xml(response)
+        return self._handle_sql_response(response, select, post, columnar)
+
+    def _handle_sql_response(self, response, select, post, columnar=False):
+        """Parse the payload of a sql response, as row dicts or as header and row tuples."""
         if response is not None and response is not False:
 
             # print('Response XML', xmlTree.tostring(response, method='xml'), 'POST: ', post)
 
             payload = response.find(".//payload")
             if payload is not None:
-                parsed_data = self._parse_sql_payload(payload.text)
+                if columnar:
+                    parsed_data = self._parse_sql_columns(payload.text)
+                else:
+                    parsed_data = self._parse_sql_payload(payload.text)
 
                 if parsed_data is None:
                     _LOGGER.warning(
@@ -739,84 +1413,29 @@ WHERE o0.NAME = "_DPAD_DBCONSTANT_GROUP_MAIN";"""
 
     def _parse_sql_payload(self, string):
         """Split string payload into dictionary array."""
-        # DONE: we need to move parseSQLPayload over to pyton
-        # Example payload string:
-        # Response: DBMG-000
-        # NextRows: 2
-        # Row000001: 'MAIN_GROUPS'
-        # Row000002: '435,439,454,458,473,494,505,532,579,587,605,613,628,641,649,660,682,690,703,731,739,752,760,794,802,817,828,836,868,883,898,906,921,929,1777,1778'
-        # should be MAIN_GROUPS =
-        # '435,439,454,458,473,494,505,532,579,587,605,613,628,641,649,660,682,690,703,731,739,752,760,794,802,817,828,836,868,883,898,906,921,929,1777,1778'
-
-        return_list = []
+        header, rows = self._parse_sql_columns(string)
+        return [dict(zip(header, row, strict=True)) for row in rows]
 
+    def _parse_sql_columns(self, string):
+        """Split string payload into a header tuple and row tuples."""
         try:
-            lines = string.split("\n")
-            keys = []
-            for line in lines:
-                if line:
-                    if line.find(":") == -1:
-                        raise Exception("Missing :-character in response line: %s" % line)
-
-                    # split prefix from values
-                    prefix, values = line.split(":", 1)
-                    prefix = prefix.strip()
-
-                    # skip unused prefixes
-                    if prefix in ["Response", "NextRows"]:
-                        pass
-                    else:
-                        # remove outer quotes, split each quoted string
-                        values = values.strip()[1:-1].split("','")
-
-                        idx = 0
-                        row_dict = {}
-                        for value in values:
-                            # line with Row000001 holds the name of the fields
-                            if prefix == "Row000001":
-                                keys.append(value)
-                            else:
-                                # all other rows have values
-                                row_dict[keys[idx]] = value
-                                idx += 1
-
-                        if row_dict and len(row_dict) > 0:
-                            return_list.append(row_dict)
-
+            return parse_sql_columns(string)
         except BaseException as err:
-            # exc_type, exc_obj, exc_tb = sys.exc_info()
-            _, _, exc_tb = sys.exc_info()
-            _LOGGER.error(
-                "Error parsing SQL: %s in line: %d - payload: %s"
-                % (err, exc_tb.tb_lineno if exc_tb is not None else 0, string)
-            )
-            # enforce relogin
-            _LOGGER.info("Start to relogin..")
-            self._session_id = None
-            self.login()
-            # raise VimarConnectionError(
-            #     "Error parsing SQL: %s in line: %d - payload: %s" % (err, exc_tb.tb_lineno, string))
-
-        return return_list
+            if is_invalid_session_payload(string):
+                raise VimarSessionExpired("Invalid session: %s", string)
+            _LOGGER.error("Error parsing SQL: %s - payload: %s", err, string)
+            raise VimarApiError("Invalid SQL response: %s", err)
 
     def _request_vimar_soap(self, post):
-        headers = {
-            "SOAPAction": "dbSoapRequest",
-            "SOAPServer": "",
-            # 'X-Requested-With' => 'XMLHttpRequest',
-            "Content-Type": 'text/xml; charset="UTF-8"',
-            # needs to be set to overcome:
-            # 'Expect' => '100-continue'
-            # otherwise header and payload is send in two requests if payload
-            # is bigger then 1024byte
-            "Expect": "",
-        }
+        return self._request_vimar(post, "cgi-bin/dpadws", SOAP_HEADERS)
 
-        return self._request_vimar(post, "cgi-bin/dpadws", headers)
+    def _get_url(self, path):
+        """Return full url to a path on the vimar webserver."""
+        return "%s://%s:%s/%s" % (self._schema, self._host, self._port, path)
 
     def _request_vimar(self, post, path, headers):
         """Prepare call to vimar webserver."""
-        url = "%s://%s:%s/%s" % (self._schema, self._host, self._port, path)
+        url = self._get_url(path)
 
         # _LOGGER.error("calling url: " + url)
         # _LOGGER.info("in _request_vimar")
@@ -844,13 +1463,57 @@ WHERE o0.NAME = "_DPAD_DBCONSTANT_GROUP_MAIN";"""
         return None
 
     request_last_exception: BaseException | None = None
+    # seconds the last request took on the wire
+    request_last_duration = 0.0
+    # record requests into a trace file, or answer them from one instead of the webserver
+    trace_recorder: VimarTraceRecorder | None = None
+    trace_player: VimarTracePlayer | None = None
+
+    def _request(self, url, post=None, headers=None, check_ssl=False, deadline=None):
+        """Call web server using post variables, within the budget left by deadline."""
+        timeout = self._timeout
+        if deadline is not None:
+            self._check_deadline(deadline)
+            timeout = deadline.get_timeout(timeout)
+
+        if self.trace_player is not None:
+            response, delay, error = self.trace_player.lookup(url, post)
+            if delay:
+                time.sleep(delay)
+            if error is not None:
+                self.request_last_exception = error
+            self.request_last_duration = delay
+            return response
+
+        started = time.monotonic()
+        response = self._send_request(url, post, headers, check_ssl, timeout)
+        self.request_last_duration = time.monotonic() - started
+        if self.trace_recorder is not None:
+            self.trace_recorder.record(
+                url,
+                post,
+                response,
+                self.request_last_duration,
+                self.request_last_exception if response is False else None,
+            )
+        if response is False and deadline is not None:
+            # the request was cut short by the deadline
+            self._check_deadline(deadline)
+        return response
 
-    def _request(self, url, post=None, headers=None, check_ssl=False):
-        """Call web server using post variables."""
+    def _check_deadline(self, deadline: VimarDeadline):
+        """Raise VimarDeadlineExceeded once the budget of a poll is used up."""
+        if deadline.expired():
+            raise VimarDeadlineExceeded("Poll did not finish within %s seconds" % deadline.budget)
+
+    def _send_request(self, url, post=None, headers=None, check_ssl=False, timeout=None):
+        """Send a request through the pooled http session."""
         # _LOGGER.info("request to " + url)
+        if timeout is None:
+            timeout = self._timeout
         try:
             # connection, read timeout
-            timeouts = (int(self._timeout / 2), self._timeout)
+            timeouts = (timeout / 2, timeout)
 
             if self._certificate is not None:
                 check_ssl = self._certificate
@@ -861,20 +1524,17 @@ WHERE o0.NAME = "_DPAD_DBCONSTANT_GROUP_MAIN";"""
                     _LOGGER.debug("Request ignores ssl certificate")
                     SSL_IGNORED = True
 
-            with requests.Session() as s:
-                s.mount("https://", HTTPAdapter())
-                # s.verify = False
-
-                if post is None:
-                    response = s.get(url, headers=headers, verify=check_ssl, timeout=timeouts)
-                else:
-                    response = s.post(
-                        url,
-                        data=post,
-                        headers=headers,
-                        verify=check_ssl,
-                        timeout=timeouts,
-                    )
+            session = self._get_http_session()
+            if post is None:
+                response = session.get(url, headers=headers, verify=check_ssl, timeout=timeouts)
+            else:
+                response = session.post(
+                    url,
+                    data=post,
+                    headers=headers,
+                    verify=check_ssl,
+                    timeout=timeouts,
+                )
 
             # If the response was successful, no Exception will be raised
             response.raise_for_status()
@@ -887,10 +1547,13 @@ WHERE o0.NAME = "_DPAD_DBCONSTANT_GROUP_MAIN";"""
         except requests.exceptions.Timeout as ex:
             self.request_last_exception = ex
             _LOGGER.error("HTTP timeout occurred")
+            # a timed out keep-alive connection may still deliver the late response
+            self._reset_http_session()
             return False
         except BaseException as err:
             self.request_last_exception = err
             _LOGGER.error("Error occurred: %s", str(err))
+            self._reset_http_session()
             return False
         else:
             return response.text
@@ -904,37 +1567,311 @@ class VimarProject:
     _platforms_exists = {}
     global_channel_id = None
     _device_customizer_action = None
+    # after discovery, polls only read the current values of the known status ids
+    state_only_polling = True
+    # seconds between two fingerprint checks of state only polls
+    fingerprint_interval = 60
+    # True if the last update loaded rooms and device types again
+    last_update_discovered = False
+    # True if the deadline of the last update expired, only part of it was read
+    last_update_partial = False
 
     def __init__(self, link: VimarLink, device_customizer_action=None):
         """Create new container to hold all states."""
         self._link = link
         self._device_customizer_action = device_customizer_action
+        # per instance, otherwise a reloaded entry would start with the devices of the old one
+        self._devices = {}
+        self._platforms_exists = {}
+        # status_id -> (device, status_name), rebuilt on every discovery
+        self._status_index: dict[str, tuple[VimarDevice, str]] = {}
+        # object_id -> counter, bumped whenever a status value of the device changes
+        self._device_versions: dict[str, int] = {}
+        self._changed_object_ids: set[str] = set()
+        self._fingerprint: str | None = None
+        self._fingerprint_checked = 0.0
 
     @property
     def devices(self):
         """Return all devices in current project."""
         return self._devices
 
-    def update(self, forced=False):
-        """Get all devices from the vimar webserver, if object list is already there, only update states."""
+    def update(self, forced=False, status_ids=None, deadline=None):
+        """Get all devices from the vimar webserver, if object list is already there, only update states.
+
+        status_ids limits a state only poll to these status ids, None reads all of them.
+        Once the deadline expires, the values read so far are kept and
+        last_update_partial is set.
+        """
         if self._devices is None:
             self._devices = {}
+        self.last_update_discovered = False
+        self.last_update_partial = False
+        try:
+            return self._update(forced, status_ids, deadline)
+        except VimarDeadlineExceeded as err:
+            return self._keep_partial_update(err)
+
+    def _update(self, forced, status_ids, deadline):
+        fingerprint = None
+        fingerprint_due = False
+        if not forced and self._can_update_states():
+            if fingerprint_due := self._is_fingerprint_due():
+                fingerprint = self._link.get_fingerprint(deadline)
+            if (
+                self._can_skip_device_pages(fingerprint, fingerprint_due)
+                and not self._fingerprint_changed(fingerprint)
+                and self._update_states(status_ids, deadline)
+            ):
+                if fingerprint_due:
+                    self._check_fingerprint(fingerprint)
+                return self._devices
+        if fingerprint is None and not fingerprint_due:
+            fingerprint = self._link.get_fingerprint(deadline)
+
         # DONE - only update the state - not the actual devices, so we do not need to parse device types again
         devices_count = len(self._devices)
+        seen: set[str] = set()
 
         # TODO - check which device states has changed and call device updates
-        self._devices, state_count = self._link.get_paged_results(
-            self._link.get_remote_devices, self._devices
+        self._devices, state_count = self._link.parse_device_pages(
+            self._link.iter_remote_device_pages(deadline), self._devices, seen=seen
         )
 
-        # for now we run parse device types and set classes after every update
-        if devices_count != len(self._devices) or (forced is not None and forced is True):
-            self._link.get_room_ids()
-            self._link.get_paged_results(self._link.get_room_devices, self._devices)
+        if self._needs_discovery(forced, fingerprint, devices_count):
+            self._link.forget_rooms()
+            self._link.get_room_ids(deadline)
+            self._link.parse_device_pages(
+                self._link.iter_room_device_pages(deadline), self._devices, True
+            )
+            self._remove_unseen_devices(seen)
             self.check_devices()
+            self.last_update_discovered = True
+        self._set_fingerprint(fingerprint)
+        self._build_status_index()
+        self._mark_changed(self._link.pop_changed_object_ids())
 
         return self._devices
 
+    def _keep_partial_update(self, err):
+        """Apply the pages and states read before the deadline, the next poll reads the rest.
+
+        Neither the fingerprint nor unseen devices are touched, so an
+        unfinished discovery runs again.
+        """
+        _LOGGER.warning("%s - keeping the values read so far", err)
+        self.last_update_partial = True
+        self._build_status_index()
+        self._mark_changed(self._link.pop_changed_object_ids())
+        return self._devices
+
+    def has_fingerprint(self):
+        """Check if the webserver answered the fingerprint select."""
+        return self._fingerprint is not None
+
+    def _is_fingerprint_due(self):
+        """Check if the fingerprint has to be compared before the next state only poll."""
+        return time.monotonic() - self._fingerprint_checked >= self.fingerprint_interval
+
+    def _can_skip_device_pages(self, fingerprint, fingerprint_due):
+        """Check if a state only poll is enough.
+
+        Without a fingerprint, because the webserver rejects its select, the
+        device pages are read once per fingerprint interval, so added devices
+        are still found.
+        """
+        return fingerprint is not None or not fingerprint_due
+
+    def _fingerprint_changed(self, fingerprint):
+        """Check if rooms or devices changed since the last discovery."""
+        return (
+            fingerprint is not None
+            and self._fingerprint is not None
+            and fingerprint != self._fingerprint
+        )
+
+    def _needs_discovery(self, forced, fingerprint, devices_count):
+        """Check if rooms and device types have to be loaded again."""
+        if forced:
+            return True
+        if fingerprint is not None and self._fingerprint is not None:
+            return fingerprint != self._fingerprint
+        # webserver without fingerprint - only a new device triggers a discovery
+        return devices_count != len(self._devices)
+
+    def _set_fingerprint(self, fingerprint):
+        self._fingerprint = fingerprint
+        self._fingerprint_checked = time.monotonic()
+
+    def _check_fingerprint(self, fingerprint):
+        """Remember the fingerprint compared by a state only poll, the next one is due after the interval."""
+        if fingerprint is not None:
+            self._fingerprint = fingerprint
+        self._fingerprint_checked = time.monotonic()
+
+    def _remove_unseen_devices(self, seen):
+        """Drop devices that were not returned by the last discovery."""
+        for object_id in [object_id for object_id in self._devices if object_id not in seen]:
+            _LOGGER.info("Device %s no longer found on the webserver", object_id)
+            del self._devices[object_id]
+
+    def get_devices_digest(self):
+        """Return a hash of the device metadata entities are created from."""
+        digest = hashlib.sha256()
+        for object_id, device in sorted(self._devices.items()):
+            digest.update(
+                repr(
+                    (
+                        object_id,
+                        device["room_ids"],
+                        device["object_type"],
+                        device["object_name"],
+                        device["room_name"],
+                    )
+                ).encode("utf-8")
+            )
+        return digest.hexdigest()
+
+    def _can_update_states(self):
+        """Check if devices are discovered, so a state only poll is possible."""
+        return self.state_only_polling and len(self._devices) > 0 and len(self._status_index) > 0
+
+    def _update_states(self, status_ids=None, deadline=None):
+        """Read current values of known status ids, return False if a full update is needed."""
+        for chunk in self._get_status_id_chunks(status_ids):
+            payload = self._link.get_status_values(chunk, deadline)
+            if not self._apply_status_values(payload, chunk):
+                return False
+        return True
+
+    def export_discovery(self) -> dict:
+        """Return a json serializable copy of the discovered devices and rooms."""
+        return copy.deepcopy(
+            {
+                "devices": self._devices,
+                "rooms": self._link.get_rooms() or {},
+                "fingerprint": self._fingerprint,
+            }
+        )
+
+    def import_discovery(self, discovery) -> bool:
+        """Restore devices and rooms of export_discovery, the next poll only reads states."""
+        devices = (discovery or {}).get("devices")
+        if not devices:
+            return False
+        self._link.restore_rooms(discovery.get("rooms"))
+        self._devices = devices
+        # compared with the webserver by the first poll
+        self._fingerprint = discovery.get("fingerprint")
+        self._fingerprint_checked = 0.0
+        self._platforms_exists = {}
+        for device in devices.values():
+            device_type = device["device_type"]
+            self._platforms_exists[device_type] = self._platforms_exists.get(device_type, 0) + 1
+        self._build_status_index()
+        self._mark_changed(devices)
+        return True
+
+    def _build_status_index(self):
+        """Map every known status id to its device and status name."""
+        self._status_index = {
+            status["status_id"]: (device, status_name)
+            for device in self._devices.values()
+            for status_name, status in device["status"].items()
+            if status.get("status_id")
+        }
+
+    def refresh_devices(self, object_ids):
+        """Read the current status values of some devices, return changes like apply_status_values."""
+        return self._apply_devices_status(self._link.get_devices_status(list(object_ids)))
+
+    def _apply_devices_status(self, statuses):
+        """Write status lists of get_devices_status into the known devices."""
+        return self._apply_status_pairs(
+            (status["status_id"], status["status_value"])
+            for status_list in statuses.values()
+            for status in status_list.values()
+        )
+
+    def get_status_poll_intervals(self, intervals, default):
+        """Return the poll interval of every known status id, see get_poll_interval."""
+        return {
+            status_id: get_poll_interval(device, intervals, default)
+            for status_id, (device, _) in self._status_index.items()
+        }
+
+    def get_by_status_id(self, status_id):
+        """Return device and status name that belong to a status id, None if unknown."""
+        return self._status_index.get(str(status_id))
+
+    def apply_status_values(self, rows):
+        """Write status_id/status_value rows into the devices.
+
+        Returns changed status names per object_id.
+        """
+        return self._apply_status_pairs(
+            (row.get("status_id"), row.get("status_value")) for row in rows
+        )
+
+    def _apply_status_pairs(self, pairs):
+        """Write (status_id, status_value) pairs into the devices, return changes."""
+        changed: dict[str, set[str]] = {}
+        status_index = self._status_index
+        for status_id, status_value in pairs:
+            entry = status_index.get(status_id)
+            if entry is None or status_value is None:
+                continue
+            device, status_name = entry
+            status = device["status"][status_name]
+            if status["status_value"] != status_value:
+                status["status_value"] = status_value
+                changed.setdefault(device["object_id"], set()).add(status_name)
+        self._mark_changed(changed)
+        return changed
+
+    def _mark_changed(self, object_ids):
+        """Bump the version of changed devices."""
+        for object_id in object_ids:
+            self._device_versions[object_id] = self._device_versions.get(object_id, 0) + 1
+        self._changed_object_ids.update(object_ids)
+
+    def get_device_version(self, object_id):
+        """Return how often the status values of a device changed, 0 if never."""
+        return self._device_versions.get(object_id, 0)
+
+    def pop_changed_object_ids(self):
+        """Return and reset object_ids whose status values changed since the last call."""
+        changed_object_ids = self._changed_object_ids
+        self._changed_object_ids = set()
+        return changed_object_ids
+
+    def _get_status_id_chunks(self, status_ids=None):
+        """Split known status ids into chunks that fit into a single request."""
+        if status_ids is None:
+            status_ids = list(self._status_index)
+        else:
+            # ids of a poll schedule may be outdated by a discovery
+            status_ids = [status_id for status_id in status_ids if status_id in self._status_index]
+        size = self._link.get_page_size("status_values")
+        return [status_ids[i : i + size] for i in range(0, len(status_ids), size)]
+
+    def _apply_status_values(self, payload, status_ids):
+        """Write polled values into the status dicts, return False if status ids are missing."""
+        if payload is None:
+            raise VimarConnectionError("Could not read device states")
+
+        header, rows = payload
+        if "status_id" in header and "status_value" in header:
+            id_idx = header.index("status_id")
+            value_idx = header.index("status_value")
+            self._apply_status_pairs((row[id_idx], row[value_idx]) for row in rows)
+
+        if len(rows) < len(status_ids):
+            # status objects were removed on the webserver - do a full update
+            _LOGGER.info("Device states missing in poll, reloading all devices")
+            return False
+        return True
+
     def check_devices(self):
         """On first run of update, all device types and names are parsed to determin the correct platform."""
         if self._devices is not None and len(self._devices) > 0:
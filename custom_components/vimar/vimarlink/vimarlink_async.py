@@ -0,0 +1,798 @@
+"""Async connection to vimar web server.
+
+Shares sql statements, soap envelopes and response parsing with the sync VimarLink,
+only the transport is replaced by VimarProtocolAsync (aiohttp).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import time
+from collections.abc import AsyncGenerator, AsyncIterator, Awaitable, Callable
+from contextlib import aclosing
+from functools import partial
+
+from .vimarlink import (
+    CHECK_SESSION_PATH,
+    FORM_HEADERS,
+    SOAP_HEADERS,
+    VimarApiError,
+    VimarDeadlineExceeded,
+    VimarDevice,
+    VimarLink,
+    VimarProject,
+    VimarSessionExpired,
+)
+from .vimarlink_deadline import VimarDeadline
+from .vimarlink_protocol_async import VimarProtocolAsync
+from .vimarlink_scheduler import (
+    DEFAULT_MAX_IN_FLIGHT,
+    PRIORITY_DISCOVERY,
+    PRIORITY_POLL,
+    PRIORITY_READ,
+    PRIORITY_WRITE,
+    VimarRequestScheduler,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class VimarLinkAsync(VimarLink):
+    """Link to communicate with the Vimar webserver without blocking the event loop."""
+
+    def __init__(
+        self,
+        schema=None,
+        host=None,
+        port=None,
+        username=None,
+        password=None,
+        certificate=None,
+        timeout=None,
+        pool_maxsize=None,
+        max_in_flight=None,
+        max_parallel_pages=None,
+    ):
+        """Prepare async connections instance for vimar webserver."""
+        super().__init__(schema, host, port, username, password, certificate, timeout, pool_maxsize)
+        self._scheduler = VimarRequestScheduler(max_in_flight)
+        # pages of one select requested at once, 1 fetches pages one after another
+        self._max_parallel_pages = max(
+            1, max_parallel_pages or max_in_flight or DEFAULT_MAX_IN_FLIGHT
+        )
+        self._protocol = VimarProtocolAsync(
+            self._schema,
+            self._host,
+            self._port,
+            self._certificate,
+            self._timeout,
+            self._pool_maxsize,
+        )
+
+    async def async_close(self):
+        """Close all connections to the webserver."""
+        await self._protocol.close()
+        self.close()
+
+    async def async_install_certificate(self):
+        """Download the CA certificate from the web server to be used for the next calls."""
+        cert_changed = False
+        if self._certificate is not None and len(self._certificate) != 0:
+            certificate_file = await self._async_request(
+                self._get_certificate_url(), verify_ssl=False, priority=PRIORITY_WRITE
+            )
+
+            loop = asyncio.get_running_loop()
+            cert_changed = await loop.run_in_executor(
+                None, self._store_certificate, certificate_file
+            )
+            if cert_changed:
+                # session ssl context still holds the old certificate
+                await self._protocol.close()
+
+        return cert_changed
+
+    async def async_login(self):
+        """Call login and store the session id."""
+        loginurl = self._get_login_url()
+
+        use_cert = self._certificate is not None and len(self._certificate) != 0
+        # if first time, cert not exists
+        if self._schema == "https" and use_cert and self._certificate is not None:
+            loop = asyncio.get_running_loop()
+            if not await loop.run_in_executor(None, os.path.isfile, self._certificate):
+                await self.async_install_certificate()
+
+        # every other request depends on the session
+        result = await self._async_request(loginurl, priority=PRIORITY_WRITE)
+
+        if result is False and use_cert:  # if problem is of certificate, download it again
+            if self._is_certificate_error(self.request_last_exception):
+                try:
+                    # return downloaded only if changed, then, if is expired
+                    if await self.async_install_certificate():
+                        result = await self._async_request(loginurl, priority=PRIORITY_WRITE)
+                except VimarApiError:
+                    pass
+
+        return self._handle_login_response(result)
+
+    async def async_check_login(self):
+        """Check if session is available - if not, aquire a new one."""
+        if not self._session_id:
+            await self.async_login()
+
+        return self._session_id is not None
+
+    async def async_check_session(self):
+        """Check if session is valid - if not, clear session id."""
+        return await self._async_request_vimar(
+            self._get_check_session_post(),
+            CHECK_SESSION_PATH,
+            FORM_HEADERS,
+            PRIORITY_READ,
+        )
+
+    async def async_keep_session_alive(self, margin: float):
+        """Renew the session shortly before its learned lifetime ends, otherwise check it.
+
+        The check counts as activity on webservers that drop idle sessions,
+        an expired session is renewed by the next request anyway.
+        Returns the seconds until the session gets renewed, None while its
+        lifetime is unknown.
+        """
+        delay = self._auth.get_refresh_delay(margin)
+        if self._session_id is None or (delay is not None and delay <= 0):
+            await self._auth.async_renew(self._session_id, self.async_login, expired=False)
+        else:
+            # only the request matters, not its answer
+            await self._async_request(
+                self._get_url(CHECK_SESSION_PATH),
+                self._get_check_session_post(),
+                FORM_HEADERS,
+                priority=PRIORITY_POLL,
+            )
+        return self._auth.get_refresh_delay(margin)
+
+    async def _async_call_with_session(self, call):
+        """Await call, renew an expired session and await it once more, see _call_with_session."""
+        session_id = self._session_id
+        try:
+            result = await call()
+        except VimarSessionExpired as err:
+            _LOGGER.info("%s - renewing the session", err)
+            await self._auth.async_renew(session_id, self.async_login)
+            return await call()
+        self._auth.confirm_session(session_id)
+        return result
+
+    async def async_set_device_status(self, object_id, status, optionals="NO-OPTIONALS"):
+        """Set a given status for one device."""
+        return await self._async_call_with_session(
+            partial(self._async_send_device_status, object_id, status, optionals)
+        )
+
+    async def _async_send_device_status(self, object_id, status, optionals):
+        post = self._get_set_device_status_post(object_id, status, optionals)
+
+        response = await self._async_request_vimar_soap(post, PRIORITY_WRITE)
+        return self._handle_set_device_status_response(response, post)
+
+    async def async_set_device_status_batch(self, writes):
+        """Set several statuses back-to-back, return {status_id: error} of failed writes."""
+        errors = {}
+        for object_id, status, optionals in writes:
+            try:
+                error = await self._async_call_with_session(
+                    partial(self._async_send_device_status_batch, object_id, status, optionals)
+                )
+            except VimarSessionExpired as err:
+                error = str(err)
+            if error is not None:
+                errors[object_id] = error
+        return errors
+
+    async def _async_send_device_status_batch(self, object_id, status, optionals):
+        post = self._get_set_device_status_post(object_id, status, optionals)
+        response = await self._async_request_vimar_soap(post, PRIORITY_WRITE)
+        return self._get_set_device_status_error(response, post)
+
+    async def async_get_device_status(self, object_id):
+        """Get attribute status for a single device."""
+        payload = await self.async_request_vimar_sql(self._get_device_status_select(object_id))
+        return self._parse_device_status(payload)
+
+    async def async_get_devices_status(self, object_ids: list[str], priority=PRIORITY_READ):
+        """Get attribute status of several devices, see _parse_devices_status."""
+        statuses: dict[str, dict] = {}
+        for chunk in self._get_object_id_chunks(object_ids):
+            payload = await self.async_request_vimar_sql(
+                self._get_devices_status_select(chunk),
+                priority,
+                columnar=True,
+                query="device_status",
+                page_size=len(chunk),
+            )
+            self._parse_devices_status(payload, statuses)
+        return statuses
+
+    async def async_get_status_values(
+        self,
+        status_ids: list[str],
+        priority=PRIORITY_POLL,
+        deadline: VimarDeadline | None = None,
+    ):
+        """Get the current values of the given status ids as header and row tuples."""
+        if not status_ids:
+            return (), []
+        return await self.async_request_vimar_sql(
+            self._get_status_values_select(status_ids),
+            priority,
+            columnar=True,
+            query="status_values",
+            page_size=len(status_ids),
+            deadline=deadline,
+        )
+
+    async def async_get_paged_results(
+        self,
+        method: Callable[
+            [dict[str, VimarDevice], int | None, int | None],
+            Awaitable[tuple[dict[str, VimarDevice], int] | None],
+        ],
+        objectlist: dict[str, VimarDevice] | None = None,
+        start: int = 0,
+    ):
+        """Page results from an async method automatically."""
+        if objectlist is None:
+            objectlist = {}
+        # define a page size
+        limit = self._sanitize_limits(start, None)[1]
+
+        if not callable(method):
+            raise VimarApiError("Calling invalid method for paged results: %s", method)
+
+        state_count = 0
+        while True:
+            result = await method(objectlist, start + state_count, limit)
+            if result is None:
+                raise VimarApiError("Calling invalid method results: %s", method)
+            objectlist, page_count = result
+            state_count += page_count
+            # if method returns excatly page size results - we check for another page
+            if page_count != limit:
+                break
+
+        return objectlist, start + state_count
+
+    async def async_iter_sql_pages(
+        self,
+        get_select: Callable[..., str],
+        priority=PRIORITY_READ,
+        limit: int | None = None,
+        key: str | None = None,
+        query: str | None = None,
+        deadline: VimarDeadline | None = None,
+    ) -> AsyncIterator[list[dict]]:
+        """Yield the rows of a paged select one page at a time.
+
+        Paging works like iter_sql_pages. As soon as a full page arrives the
+        next one is requested, so it is in flight while the caller works on
+        the current page.
+        """
+        start = 0
+        after_id = 0 if key is not None and self.keyset_paging else None
+        after_object_id = None
+        page_size = self._get_page_limit(limit, query)
+        request = asyncio.ensure_future(
+            self.async_request_vimar_sql(
+                get_select(start, page_size, after_id),
+                priority,
+                query=query,
+                page_size=page_size,
+                deadline=deadline,
+            )
+        )
+        try:
+            while request is not None:
+                payload = await request
+                request = None
+                if not payload and after_id == 0 and not self._keyset_confirmed:
+                    # an empty first page could be a webserver without keyset support
+                    offset_payload = await self.async_request_vimar_sql(
+                        get_select(start, page_size, None), priority, deadline=deadline
+                    )
+                    after_id = self._check_keyset_fallback(offset_payload)
+                    payload = payload if after_id == 0 else offset_payload
+                if payload is None:
+                    raise VimarApiError("Calling invalid select for paged results: %s", get_select)
+                if payload and after_id is not None:
+                    self._keyset_confirmed = True
+                # if the page holds excatly page size rows - we check for another page
+                if len(payload) == page_size:
+                    start += page_size
+                    if after_id is not None:
+                        after_id, after_object_id = self._get_keyset_cursor(payload, key)
+                    page_size = self._get_page_limit(limit, query)
+                    request = asyncio.ensure_future(
+                        self.async_request_vimar_sql(
+                            get_select(start, page_size, after_id, after_object_id=after_object_id),
+                            priority,
+                            query=query,
+                            page_size=page_size,
+                            deadline=deadline,
+                        )
+                    )
+                yield payload
+        finally:
+            if request is not None:
+                request.cancel()
+
+    async def async_iter_sql_ranges(
+        self,
+        get_select: Callable[..., str],
+        priority=PRIORITY_READ,
+        limit: int | None = None,
+        key: str = "status_id",
+        query: str | None = None,
+        deadline: VimarDeadline | None = None,
+    ) -> AsyncIterator[list[dict]]:
+        """Yield the rows of a keyset paged select, fetching key ranges concurrently.
+
+        A count over the same select tells how many pages are needed. The key
+        range is split into as many parts, which are fetched with at most
+        max_parallel_pages requests at once and yielded in key order. Without
+        keyset paging or a usable count, pages are fetched one after another.
+        """
+        page_size = self._get_page_limit(limit, query)
+        row_range = None
+        if self.keyset_paging and self._max_parallel_pages > 1:
+            row_range = self._parse_row_range(
+                await self.async_request_vimar_sql(
+                    self._get_row_range_select(get_select, key), priority, deadline=deadline
+                )
+            )
+        if row_range is None or row_range[0] <= page_size:
+            async with aclosing(
+                self.async_iter_sql_pages(get_select, priority, limit, key, query, deadline)
+            ) as pages:
+                async for page in pages:
+                    yield page
+            return
+
+        row_count, min_id, max_id = row_range
+        parts = -(-row_count // page_size)
+        width = -(-(max_id - min_id + 1) // parts)
+        semaphore = asyncio.Semaphore(self._max_parallel_pages)
+
+        async def fetch_range(pages: asyncio.Queue, after_id, until_id):
+            """Hand each page of a key range to pages as it arrives, then None."""
+            after_object_id = None
+            try:
+                async with semaphore:
+                    while True:
+                        payload = await self.async_request_vimar_sql(
+                            get_select(0, page_size, after_id, until_id, after_object_id),
+                            priority,
+                            query=query,
+                            page_size=page_size,
+                            deadline=deadline,
+                        )
+                        if payload is None:
+                            raise VimarApiError(
+                                "Calling invalid select for paged results: %s", get_select
+                            )
+                        await pages.put(payload)
+                        if len(payload) != page_size:
+                            break
+                        after_id, after_object_id = self._get_keyset_cursor(payload, key)
+            except Exception as err:
+                await pages.put(err)
+            else:
+                await pages.put(None)
+
+        # a range holds at most one page that was not yet yielded
+        queues = [asyncio.Queue(maxsize=1) for _ in range(parts)]
+        tasks = [
+            asyncio.ensure_future(
+                fetch_range(
+                    queues[part],
+                    min_id - 1 + part * width,
+                    min(min_id - 1 + (part + 1) * width, max_id),
+                )
+            )
+            for part in range(parts)
+        ]
+        yielded = keyset_ignored = False
+        try:
+            for pages in queues:
+                while (page := await pages.get()) is not None:
+                    if isinstance(page, Exception):
+                        raise page
+                    if not page and not yielded and not self._keyset_confirmed:
+                        # the smallest key is missing, the webserver ignores keyset selects
+                        keyset_ignored = True
+                        break
+                    self._keyset_confirmed = True
+                    yield page
+                    yielded = True
+                if keyset_ignored:
+                    break
+            else:
+                return
+        finally:
+            for task in tasks:
+                task.cancel()
+
+        async with aclosing(
+            self.async_iter_sql_pages(get_select, priority, limit, key, query, deadline)
+        ) as pages:
+            async for page in pages:
+                yield page
+
+    def async_iter_remote_device_pages(self, deadline: VimarDeadline | None = None):
+        """Yield the rows of all devices that can be triggered remotly page by page."""
+        return self.async_iter_sql_ranges(
+            self._get_remote_devices_select,
+            PRIORITY_DISCOVERY,
+            query="remote_devices",
+            deadline=deadline,
+        )
+
+    def async_iter_room_device_pages(self, deadline: VimarDeadline | None = None):
+        """Yield the rows of all devices that belong to a room page by page."""
+        return self.async_iter_sql_ranges(
+            self._get_room_devices_select,
+            PRIORITY_DISCOVERY,
+            query="room_devices",
+            deadline=deadline,
+        )
+
+    async def async_parse_device_pages(
+        self,
+        pages: AsyncGenerator[list[dict], None],
+        devices: dict[str, VimarDevice] | None = None,
+        onlyUpdate: bool = False,
+        seen: set[str] | None = None,
+    ):
+        """Merge each page into the device list as it arrives, return devices and row count.
+
+        Object ids of all rows are added to seen, if given. The pages are
+        closed when parsing stops, so a cancelled poll cancels the page
+        requests still running in the background.
+        """
+        if devices is None:
+            devices = {}
+        row_count = 0
+        async with aclosing(pages):
+            async for page in pages:
+                self._parse_device_list(page, devices, onlyUpdate)
+                row_count += len(page)
+                if seen is not None:
+                    seen.update(row["object_id"] for row in page)
+        return devices, row_count
+
+    async def async_get_room_devices(
+        self,
+        devices: dict[str, VimarDevice] | None = None,
+        start: int | None = None,
+        limit: int | None = None,
+    ):
+        """Load all devices that belong to a room."""
+        if devices is None:
+            devices = {}
+        if self._room_ids is None:
+            return None
+
+        start, limit = self._sanitize_limits(start, limit)
+
+        _LOGGER.debug("get_room_devices started - from %d to %d", start, start + limit)
+
+        payload = await self.async_request_vimar_sql(
+            self._get_room_devices_select(start, limit), PRIORITY_DISCOVERY
+        )
+        return self._parse_device_list(payload, devices, True)
+
+    async def async_get_remote_devices(
+        self,
+        devices: dict[str, VimarDevice] | None = None,
+        start: int | None = None,
+        limit: int | None = None,
+    ):
+        """Get all devices that can be triggered remotly (includes scenes)."""
+        if devices is None:
+            devices = {}
+
+        start, limit = self._sanitize_limits(start, limit)
+
+        payload = await self.async_request_vimar_sql(
+            self._get_remote_devices_select(start, limit), PRIORITY_DISCOVERY
+        )
+        return self._parse_device_list(payload, devices)
+
+    async def async_get_fingerprint(
+        self, priority=PRIORITY_POLL, deadline: VimarDeadline | None = None
+    ):
+        """Return a fingerprint of rooms, devices and their relations, None if not supported."""
+        return self._parse_fingerprint(
+            await self.async_request_vimar_sql(
+                self._get_fingerprint_select(), priority, deadline=deadline
+            )
+        )
+
+    async def async_get_room_ids(self, deadline: VimarDeadline | None = None):
+        """Load main rooms - later used in get_room_devices."""
+        if self._room_ids is not None:
+            return self._room_ids
+
+        payload = await self.async_request_vimar_sql(
+            self._get_room_ids_select(), PRIORITY_DISCOVERY, deadline=deadline
+        )
+        return self._parse_room_ids(payload)
+
+    async def async_request_vimar_sql(
+        self,
+        select,
+        priority=PRIORITY_READ,
+        columnar=False,
+        query=None,
+        page_size=0,
+        deadline: VimarDeadline | None = None,
+    ):
+        """Build and send sql request, pages of a query type are measured for the page size tuner.
+
+        A request sent with an expired session is sent again with a new one.
+        """
+        return await self._async_call_with_session(
+            partial(
+                self._async_send_vimar_sql, select, priority, columnar, query, page_size, deadline
+            )
+        )
+
+    async def _async_send_vimar_sql(self, select, priority, columnar, query, page_size, deadline):
+        select, post = self._get_sql_post(select)
+
+        response = await self._async_request(
+            self._get_url("cgi-bin/dpadws"),
+            post,
+            SOAP_HEADERS,
+            priority=priority,
+            deadline=deadline,
+        )
+        parsed_data = self._handle_sql_text(response, select, post, columnar)
+        if query is not None:
+            self._record_page(query, page_size, response, parsed_data)
+        return parsed_data
+
+    def get_scheduler_metrics(self):
+        """Return request counts and queue wait times of the request scheduler."""
+        return self._scheduler.get_metrics()
+
+    async def _async_request_vimar_soap(self, post, priority=PRIORITY_READ):
+        return await self._async_request_vimar(post, "cgi-bin/dpadws", SOAP_HEADERS, priority)
+
+    async def _async_request_vimar(self, post, path, headers, priority=PRIORITY_READ):
+        """Prepare call to vimar webserver."""
+        response = await self._async_request(self._get_url(path), post, headers, priority=priority)
+        if response is not None and response is not False:
+            return self._parse_xml(response)
+
+        return response
+
+    async def _async_request(
+        self,
+        url,
+        post=None,
+        headers=None,
+        verify_ssl=True,
+        priority=PRIORITY_READ,
+        deadline: VimarDeadline | None = None,
+    ):
+        """Call web server using post variables, once the scheduler grants a slot.
+
+        With a deadline, the wait for the slot counts against its budget and
+        the request gets the time that is left.
+        """
+        if self._certificate is None:
+            verify_ssl = False
+        if deadline is not None:
+            self._check_deadline(deadline)
+
+        if self.trace_player is not None:
+            response, delay, error = self.trace_player.lookup(url, post)
+            if delay:
+                await asyncio.sleep(delay)
+            if error is not None:
+                self.request_last_exception = error
+            self.request_last_duration = delay
+            return response
+
+        async with self._scheduler.slot(priority):
+            timeout = None
+            if deadline is not None:
+                self._check_deadline(deadline)
+                timeout = deadline.get_timeout(self._timeout)
+            started = time.monotonic()
+            if timeout is None:
+                response = await self._protocol._request(url, post, headers, verify_ssl)
+            else:
+                response = await self._protocol._request(url, post, headers, verify_ssl, timeout)
+            duration = self.request_last_duration = time.monotonic() - started
+        if response is False:
+            self.request_last_exception = self._protocol.request_last_exception
+        if self.trace_recorder is not None:
+            self.trace_recorder.record(
+                url,
+                post,
+                response,
+                duration,
+                self.request_last_exception if response is False else None,
+            )
+        if response is False and deadline is not None:
+            # the request was cut short by the deadline
+            self._check_deadline(deadline)
+        return response
+
+
+class VimarProjectAsync(VimarProject):
+    """Container that holds all vimar devices and its states, updated through VimarLinkAsync."""
+
+    _link: VimarLinkAsync
+
+    def __init__(self, link: VimarLinkAsync, device_customizer_action=None):
+        """Create new container to hold all states."""
+        super().__init__(link, device_customizer_action)
+
+    async def async_update(self, forced=False, status_ids=None, deadline=None):
+        """Get all devices from the vimar webserver, if object list is already there, only update states.
+
+        status_ids limits a state only poll to these status ids, None reads all of them.
+        Once the deadline expires, the values read so far are kept and
+        last_update_partial is set.
+        """
+        if self._devices is None:
+            self._devices = {}
+        self.last_update_discovered = False
+        self.last_update_partial = False
+        try:
+            return await self._async_update(forced, status_ids, deadline)
+        except VimarDeadlineExceeded as err:
+            return self._keep_partial_update(err)
+
+    async def _async_update(self, forced, status_ids, deadline):
+        fingerprint = None
+        fingerprint_due = False
+        if not forced and self._can_update_states():
+            if fingerprint_due := self._is_fingerprint_due():
+                fingerprint = await self._link.async_get_fingerprint(deadline=deadline)
+            if (
+                self._can_skip_device_pages(fingerprint, fingerprint_due)
+                and not self._fingerprint_changed(fingerprint)
+                and await self._async_update_states(status_ids, deadline)
+            ):
+                if fingerprint_due:
+                    self._check_fingerprint(fingerprint)
+                return self._devices
+        if fingerprint is None and not fingerprint_due:
+            fingerprint = await self._link.async_get_fingerprint(PRIORITY_DISCOVERY, deadline)
+
+        devices_count = len(self._devices)
+        seen: set[str] = set()
+
+        self._devices, state_count = await self._link.async_parse_device_pages(
+            self._link.async_iter_remote_device_pages(deadline), self._devices, seen=seen
+        )
+
+        if self._needs_discovery(forced, fingerprint, devices_count):
+            self._link.forget_rooms()
+            if await self._link.async_get_room_ids(deadline) is not None:
+                await self._link.async_parse_device_pages(
+                    self._link.async_iter_room_device_pages(deadline), self._devices, True
+                )
+            self._remove_unseen_devices(seen)
+            self.check_devices()
+            self.last_update_discovered = True
+        self._set_fingerprint(fingerprint)
+        self._build_status_index()
+        self._mark_changed(self._link.pop_changed_object_ids())
+
+        return self._devices
+
+    async def async_refresh_devices(self, object_ids, priority=PRIORITY_READ):
+        """Read the current status values of some devices, return changes like apply_status_values."""
+        return self._apply_devices_status(
+            await self._link.async_get_devices_status(list(object_ids), priority)
+        )
+
+    async def _async_update_states(self, status_ids=None, deadline=None):
+        """Read current values of known status ids, return False if a full update is needed."""
+        for chunk in self._get_status_id_chunks(status_ids):
+            payload = await self._link.async_get_status_values(chunk, deadline=deadline)
+            if not self._apply_status_values(payload, chunk):
+                return False
+        return True
+
+
+class VimarWriteQueue:
+    """Coalesce status writes, only the latest value per status_id is sent.
+
+    Writes are grouped by a key (usually the device id). A write with a delay
+    waits for further writes of the same key, values for the same status_id
+    replace each other. A write without delay sends everything pending for
+    the key right away, so an explicit action never gets overtaken by an
+    older slider value.
+    """
+
+    def __init__(self, link: VimarLinkAsync):
+        """Create a write queue sending through the given link."""
+        self._link = link
+        # key -> status_id -> (status_id, status, optionals)
+        self._pending: dict[str, dict[str, tuple[str, str, str]]] = {}
+        self._results: dict[str, asyncio.Future] = {}
+        self._timers: dict[str, asyncio.TimerHandle] = {}
+        self._locks: dict[str, asyncio.Lock] = {}
+        self._tasks: set[asyncio.Task] = set()
+        self.superseded_count = 0
+
+    async def async_write(self, key, writes, delay: float = 0.0):
+        """Queue writes for a key, return {status_id: error} of the batch that sent them."""
+        loop = asyncio.get_running_loop()
+        pending = self._pending.setdefault(key, {})
+        for write in writes:
+            if pending.pop(write[0], None) is not None:
+                self.superseded_count += 1
+            pending[write[0]] = write
+
+        result = self._results.get(key)
+        if result is None:
+            result = self._results[key] = loop.create_future()
+
+        timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+        if delay > 0:
+            self._timers[key] = loop.call_later(delay, self._flush_later, key)
+        else:
+            await self._async_flush(key)
+
+        return await asyncio.shield(result)
+
+    def has_pending(self, key) -> bool:
+        """Check if writes of a key are still waiting to be sent."""
+        return bool(self._pending.get(key))
+
+    async def async_flush_all(self):
+        """Send everything that is still waiting."""
+        for timer in self._timers.values():
+            timer.cancel()
+        self._timers.clear()
+        for key in list(self._pending):
+            await self._async_flush(key)
+
+    def _flush_later(self, key):
+        self._timers.pop(key, None)
+        task = asyncio.get_running_loop().create_task(self._async_flush(key))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _async_flush(self, key):
+        writes = self._pending.pop(key, None)
+        result = self._results.pop(key, None)
+        if not writes or result is None:
+            return
+
+        # batches of one key must not overtake each other
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        try:
+            async with lock:
+                errors = await self._link.async_set_device_status_batch(list(writes.values()))
+        except asyncio.CancelledError:
+            # writers waiting for this batch must not hang
+            result.cancel()
+            raise
+        except Exception as err:
+            result.set_exception(err)
+        else:
+            result.set_result(errors)
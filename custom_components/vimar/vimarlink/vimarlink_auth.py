@@ -2,12 +2,26 @@
 
 This module handles HTTP adapter configuration and SSL setup for
 communicating with VIMAR webservers that require old TLS versions.
+
+An expired session makes every request that is in flight fail at once.
+Each of them asks VimarAuth to renew the session id it was sent with, only
+the first one logs in again, the others wait for it and retry with the
+new session.
+
+The webserver does not tell how long a session lasts. The age of the
+last session found expired is taken as its lifetime, later sessions are
+renewed shortly before they reach it. A session still accepted after that
+age raises the estimate again.
 """
 
 from __future__ import annotations
 
+import asyncio
 import logging
 import ssl
+import threading
+import time
+from collections.abc import Awaitable, Callable
 
 from requests import adapters
 
@@ -60,6 +74,14 @@ class VimarAuth:
         self._password = password
         self._certificate = certificate
         self._session_id: str | None = None
+        self._session_started: float | None = None
+        # seconds a session lasts, learned from the sessions that expired
+        self.lifetime: float | None = None
+        # number of logins after an expired session and before one expired
+        self.renewals = 0
+        self.refreshes = 0
+        self._renew_lock = threading.Lock()
+        self._async_renew_lock: asyncio.Lock | None = None
 
     @property
     def session_id(self) -> str | None:
@@ -69,12 +91,95 @@ class VimarAuth:
     @session_id.setter
     def session_id(self, value: str | None) -> None:
         """Set session ID."""
+        if value is not None and value != self._session_id:
+            self._session_started = time.monotonic()
         self._session_id = value
 
+    def get_refresh_delay(self, margin: float) -> float | None:
+        """Return the seconds until the session should be renewed, None while the lifetime is unknown.
+
+        The session is renewed margin seconds before its lifetime ends, but
+        not before half of it passed. A lifetime shorter than twice the
+        margin is taken as twice the margin, so a session cut short by a
+        restart of the webserver does not renew the session every few seconds.
+        """
+        if self.lifetime is None or self._session_started is None or self._session_id is None:
+            return None
+        lifetime = max(self.lifetime, 2 * margin)
+        refresh_at = max(lifetime / 2, lifetime - margin)
+        return max(0.0, refresh_at - (time.monotonic() - self._session_started))
+
+    def confirm_session(self, session_id: str | None):
+        """Raise the lifetime once a request with session_id succeeded after it."""
+        if session_id is None or session_id != self._session_id or self.lifetime is None:
+            return
+        age = self.get_session_age()
+        if age is not None and age > self.lifetime:
+            _LOGGER.debug("Vimar sessions last at least %.0f seconds", age)
+            self.lifetime = age
+
+    def get_session_age(self) -> float | None:
+        """Return the seconds since the current session was started."""
+        if self._session_started is None:
+            return None
+        return time.monotonic() - self._session_started
+
+    def _learn_lifetime(self):
+        """Take the age of the expired session as the lifetime of all sessions."""
+        age = self.get_session_age()
+        if age is not None:
+            _LOGGER.debug("Vimar sessions expire after %.0f seconds", age)
+            self.lifetime = age
+
     def is_logged(self) -> bool:
         """Check if session is available."""
         return self._session_id is not None
 
+    def needs_renewal(self, session_id: str | None) -> bool:
+        """Check if a request that failed with session_id still needs a new session."""
+        return self._session_id is None or self._session_id == session_id
+
+    def renew(
+        self, session_id: str | None, login: Callable[[], object], expired: bool = True
+    ) -> bool:
+        """Log in again unless session_id was already renewed.
+
+        expired is False for a session renewed before it expires.
+        Returns True if this call renewed the session.
+        """
+        with self._renew_lock:
+            if not self._start_renewal(session_id, expired):
+                return False
+            login()
+            return True
+
+    async def async_renew(
+        self,
+        session_id: str | None,
+        async_login: Callable[[], Awaitable[object]],
+        expired: bool = True,
+    ) -> bool:
+        """Log in again unless session_id was already renewed, see renew."""
+        if self._async_renew_lock is None:
+            self._async_renew_lock = asyncio.Lock()
+        async with self._async_renew_lock:
+            if not self._start_renewal(session_id, expired):
+                return False
+            await async_login()
+            return True
+
+    def _start_renewal(self, session_id: str | None, expired: bool) -> bool:
+        if not self.needs_renewal(session_id):
+            return False
+        if expired:
+            if self._session_id is not None:
+                self._learn_lifetime()
+            self.renewals += 1
+        else:
+            self.refreshes += 1
+        self._session_id = None
+        return True
+
     @property
     def base_url(self) -> str:
         """Return base URL for VIMAR server."""
@@ -0,0 +1,34 @@
+"""Time budget of a poll, shared by all of its requests.
+
+Each request times out after the request timeout on its own, so a poll of
+several pages could take a multiple of it. A deadline gives every request
+of a poll only the budget that is left, capped at the request timeout.
+Once nothing is left the link raises VimarDeadlineExceeded, and the
+project keeps the pages and states read so far instead of dropping the
+whole poll.
+"""
+
+from __future__ import annotations
+
+import time
+
+
+class VimarDeadline:
+    """Point in time a poll has to be done by."""
+
+    def __init__(self, budget: float):
+        """Start a deadline expiring budget seconds from now."""
+        self.budget = budget
+        self._expires = time.monotonic() + budget
+
+    def remaining(self) -> float:
+        """Return the seconds left, 0 once expired."""
+        return max(0.0, self._expires - time.monotonic())
+
+    def expired(self) -> bool:
+        """Check if the budget is used up."""
+        return self.remaining() <= 0
+
+    def get_timeout(self, timeout: float) -> float:
+        """Return the timeout of the next request, never beyond the deadline."""
+        return min(timeout, self.remaining())
@@ -0,0 +1,103 @@
+"""Adaptive page size of paged selects.
+
+MAX_ROWS_PER_REQUEST is a safe page size for every webserver, but slow
+webservers struggle with it while fast ones could answer larger pages. The
+tuner measures every page per query type and shrinks the page size quickly
+after timeouts, slow or very large responses, and grows it slowly while full
+pages come back fast. The page size never leaves MIN_PAGE_FACTOR and
+MAX_PAGE_FACTOR times the default.
+"""
+
+from __future__ import annotations
+
+import math
+
+MIN_PAGE_FACTOR = 0.1
+MAX_PAGE_FACTOR = 2.0
+# pages answered within this share of the request timeout are fast, above it slow
+FAST_PAGE_SHARE = 0.1
+SLOW_PAGE_SHARE = 0.4
+MAX_PAGE_BYTES = 512 * 1024
+# number of fast full pages in a row before the page size grows
+GROW_AFTER_PAGES = 3
+GROW_FACTOR = 1.1
+SHRINK_FACTOR = 0.75
+TIMEOUT_SHRINK_FACTOR = 0.5
+
+
+class VimarPageSizeTuner:
+    """Choose the number of rows per page for each query type."""
+
+    def __init__(self, timeout: float):
+        """Create a tuner for requests with the given timeout in seconds."""
+        self._timeout = timeout
+        self._page_sizes: dict[str, int] = {}
+        self._fast_pages: dict[str, int] = {}
+        self._stats: dict[str, dict] = {}
+
+    def get_page_size(self, query: str, default: int) -> int:
+        """Return the current page size of a query type."""
+        return self._page_sizes.get(query) or default
+
+    def record(
+        self, query: str, default: int, page_size: int, rows: int, duration: float, size: int
+    ):
+        """Adjust the page size after a page with rows and size bytes was answered."""
+        self._page_sizes.setdefault(query, default)
+        stats = self._get_stats(query)
+        stats["pages"] += 1
+        stats["duration_total"] += duration
+        stats["bytes_total"] += size
+        stats["duration_max"] = max(stats["duration_max"], duration)
+
+        current = self.get_page_size(query, default)
+        if duration > self._timeout * SLOW_PAGE_SHARE or size > MAX_PAGE_BYTES:
+            self._set_page_size(query, default, current * SHRINK_FACTOR)
+        elif duration < self._timeout * FAST_PAGE_SHARE and rows >= page_size >= current:
+            self._fast_pages[query] = self._fast_pages.get(query, 0) + 1
+            if self._fast_pages[query] >= GROW_AFTER_PAGES:
+                self._set_page_size(query, default, max(current + 1, current * GROW_FACTOR))
+        else:
+            self._fast_pages[query] = 0
+
+    def record_timeout(self, query: str, default: int):
+        """Halve the page size after a page timed out."""
+        self._page_sizes.setdefault(query, default)
+        self._get_stats(query)["timeouts"] += 1
+        self._set_page_size(
+            query, default, self.get_page_size(query, default) * TIMEOUT_SHRINK_FACTOR
+        )
+
+    def get_metrics(self) -> dict:
+        """Return page size, pages, timeouts and average page duration and size per query."""
+        return {
+            query: {
+                "page_size": self._page_sizes[query],
+                "pages": stats["pages"],
+                "timeouts": stats["timeouts"],
+                "duration_avg": (
+                    round(stats["duration_total"] / stats["pages"], 4) if stats["pages"] else 0.0
+                ),
+                "duration_max": round(stats["duration_max"], 4),
+                "bytes_avg": stats["bytes_total"] // stats["pages"] if stats["pages"] else 0,
+            }
+            for query, stats in self._stats.items()
+        }
+
+    def _get_stats(self, query: str) -> dict:
+        return self._stats.setdefault(
+            query,
+            {
+                "pages": 0,
+                "timeouts": 0,
+                "duration_total": 0.0,
+                "duration_max": 0.0,
+                "bytes_total": 0,
+            },
+        )
+
+    def _set_page_size(self, query: str, default: int, page_size: float):
+        lower = max(1, math.ceil(default * MIN_PAGE_FACTOR))
+        upper = max(lower, int(default * MAX_PAGE_FACTOR))
+        self._page_sizes[query] = min(upper, max(lower, int(page_size)))
+        self._fast_pages[query] = 0
@@ -0,0 +1,93 @@
+"""Poll groups of status ids at different intervals.
+
+Scenes hardly ever change, energy meters every second. Every status id
+belongs to the group of its poll interval, each tick of the coordinator
+reads the status ids of all groups that are due with a single state poll.
+A group is due once its interval passed since it was polled last, less a
+tolerance of half the shortest interval, so groups polled every tick do not
+miss a tick because of timer jitter.
+"""
+
+from __future__ import annotations
+
+import time
+
+# device attribute set by a device_override action
+DEVICE_POLL_INTERVAL = "poll_interval"
+
+
+def get_poll_interval(device: dict, intervals: dict[str, float], default: float) -> float:
+    """Return the poll interval of a device.
+
+    A poll_interval set by a device_override wins over an interval
+    configured for the object_type, which wins over the one of the platform.
+    """
+    for interval in (
+        device.get(DEVICE_POLL_INTERVAL),
+        intervals.get(device.get("object_type") or ""),
+        intervals.get(device.get("device_type") or ""),
+    ):
+        if interval is not None and float(interval) > 0:
+            return float(interval)
+    return default
+
+
+class VimarPollScheduler:
+    """Decide which status ids are read by the next poll."""
+
+    def __init__(self):
+        """Create a scheduler without groups, polls read all status ids until groups are set."""
+        # interval -> status ids
+        self._groups: dict[float, list[str]] = {}
+        # interval -> monotonic time of the last poll
+        self._polled: dict[float, float] = {}
+        self._polls: dict[float, int] = {}
+
+    def has_groups(self) -> bool:
+        """Check if status ids were grouped by their poll interval."""
+        return len(self._groups) > 0
+
+    def get_min_interval(self) -> float | None:
+        """Return the shortest poll interval of all groups."""
+        return min(self._groups) if self._groups else None
+
+    def set_groups(self, intervals: dict[str, float], now: float | None = None):
+        """Group status ids by their poll interval, all of them were just read."""
+        now = time.monotonic() if now is None else now
+        groups: dict[float, list[str]] = {}
+        for status_id, interval in intervals.items():
+            groups.setdefault(float(interval), []).append(status_id)
+        self._groups = groups
+        self._polled = dict.fromkeys(groups, now)
+        self._polls = {interval: self._polls.get(interval, 0) for interval in groups}
+
+    def get_due(self, now: float | None = None) -> list[float]:
+        """Return the intervals of all groups that have to be polled now."""
+        if not self._groups:
+            return []
+        now = time.monotonic() if now is None else now
+        tolerance = min(self._groups) / 2
+        return [
+            interval
+            for interval in self._groups
+            if now - self._polled.get(interval, 0.0) >= interval - tolerance
+        ]
+
+    def get_status_ids(self, intervals: list[float]) -> list[str]:
+        """Return the status ids of the given groups, merged for one poll."""
+        return [status_id for interval in intervals for status_id in self._groups.get(interval, [])]
+
+    def mark_polled(self, intervals: list[float], now: float | None = None):
+        """Remember that the given groups were read."""
+        now = time.monotonic() if now is None else now
+        for interval in intervals:
+            if interval in self._groups:
+                self._polled[interval] = now
+                self._polls[interval] += 1
+
+    def get_metrics(self) -> dict:
+        """Return the number of status ids and polls per poll interval."""
+        return {
+            str(interval): {"status_ids": len(status_ids), "polls": self._polls.get(interval, 0)}
+            for interval, status_ids in sorted(self._groups.items())
+        }
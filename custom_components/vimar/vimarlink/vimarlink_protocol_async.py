@@ -6,7 +6,9 @@ It can be used as an alternative to the sync protocol.
 
 from __future__ import annotations
 
+import asyncio
 import logging
+import os
 import ssl
 
 import aiohttp
@@ -14,6 +16,28 @@ import aiohttp
 _LOGGER = logging.getLogger(__name__)
 
 
+def create_ssl_context(certificate: str | None = None) -> ssl.SSLContext:
+    """Return a context for the old TLS version and cipher of VIMAR webservers.
+
+    The webserver certificate is verified against certificate, without one
+    it is not verified at all.
+    """
+    # Match sync version's SSL settings for VIMAR compatibility
+    ssl_context = ssl.create_default_context()
+    ssl_context.options &= ~ssl.OP_NO_TLSv1_3 & ~ssl.OP_NO_TLSv1_2 & ~ssl.OP_NO_TLSv1_1
+    ssl_context.minimum_version = ssl.TLSVersion.TLSv1
+    ssl_context.check_hostname = False
+    ssl_context.set_ciphers("AES256-SHA")
+
+    if certificate:
+        # a missing certificate fails verification, so it gets downloaded on login
+        if os.path.isfile(certificate):
+            ssl_context.load_verify_locations(certificate)
+    else:
+        ssl_context.verify_mode = ssl.CERT_NONE
+    return ssl_context
+
+
 class VimarProtocolAsync:
     """Async HTTP protocol handler using aiohttp."""
 
@@ -24,6 +48,7 @@ class VimarProtocolAsync:
         port: int,
         certificate: str | None = None,
         timeout: int = 6,
+        pool_maxsize: int = 4,
     ):
         """Initialize async protocol handler."""
         self._schema = schema
@@ -31,31 +56,41 @@ class VimarProtocolAsync:
         self._port = port
         self._certificate = certificate
         self._timeout = timeout
+        self._pool_maxsize = pool_maxsize
         self.request_last_exception: Exception | None = None
         self._session: aiohttp.ClientSession | None = None
+        # used to download the certificate itself, still needs the old TLS settings
+        self._unverified_ssl_context: ssl.SSLContext | None = None
+        self._session_lock = asyncio.Lock()
 
     async def _get_session(self) -> aiohttp.ClientSession:
         """Get or create aiohttp session with VIMAR-compatible SSL."""
-        if self._session is None or self._session.closed:
-            # Match sync version's SSL settings for VIMAR compatibility
-            ssl_context = ssl.create_default_context()
-            ssl_context.options &= ~ssl.OP_NO_TLSv1_3 & ~ssl.OP_NO_TLSv1_2 & ~ssl.OP_NO_TLSv1_1
-            ssl_context.minimum_version = ssl.TLSVersion.TLSv1
-            ssl_context.check_hostname = False
-            ssl_context.set_ciphers("AES256-SHA")
-
-            if self._certificate:
-                ssl_context.load_verify_locations(self._certificate)
-            else:
-                ssl_context.check_hostname = False
-                ssl_context.verify_mode = ssl.CERT_NONE
-
-            connector = aiohttp.TCPConnector(ssl=ssl_context)
-            timeout = aiohttp.ClientTimeout(total=self._timeout, connect=int(self._timeout / 2))
-            self._session = aiohttp.ClientSession(connector=connector, timeout=timeout)
+        if self._session is not None and not self._session.closed:
+            return self._session
+        async with self._session_lock:
+            if self._session is None or self._session.closed:
+                # loading the default and the webserver certificates reads from disk
+                ssl_context = await asyncio.get_running_loop().run_in_executor(
+                    None, self._create_ssl_contexts
+                )
+                self._session = self._create_session(ssl_context)
 
         return self._session
 
+    def _create_ssl_contexts(self) -> ssl.SSLContext:
+        """Return the context of the session, the unverified one is only created once."""
+        if self._unverified_ssl_context is None:
+            self._unverified_ssl_context = create_ssl_context()
+        return create_ssl_context(self._certificate)
+
+    def _create_session(self, ssl_context: ssl.SSLContext) -> aiohttp.ClientSession:
+        """Create the pooled session, requests without verification pass their own context."""
+        connector = aiohttp.TCPConnector(
+            ssl=ssl_context, limit=self._pool_maxsize, limit_per_host=self._pool_maxsize
+        )
+        timeout = aiohttp.ClientTimeout(total=self._timeout, connect=int(self._timeout / 2))
+        return aiohttp.ClientSession(connector=connector, timeout=timeout)
+
     async def close(self) -> None:
         """Close the aiohttp session."""
         if self._session and not self._session.closed:
@@ -67,21 +102,31 @@ class VimarProtocolAsync:
         url: str,
         post: str | None = None,
         headers: dict[str, str] | None = None,
+        verify_ssl: bool = True,
+        timeout: float | None = None,
     ) -> str | bool | None:
         """Make async HTTP request.
 
+        timeout replaces the timeout of the session for this request.
+
         Returns:
             Response text on success, False on error, None if no response
         """
+        if timeout is None:
+            timeout = self._timeout
         try:
             session = await self._get_session()
+            # skips certificate validation, used to download the certificate itself
+            kwargs = {} if verify_ssl else {"ssl": self._unverified_ssl_context}
+            if timeout != self._timeout:
+                kwargs["timeout"] = aiohttp.ClientTimeout(total=timeout, connect=timeout / 2)
 
             if post is None:
-                async with session.get(url, headers=headers) as response:
+                async with session.get(url, headers=headers, **kwargs) as response:
                     response.raise_for_status()
                     return await response.text()
             else:
-                async with session.post(url, data=post, headers=headers) as response:
+                async with session.post(url, data=post, headers=headers, **kwargs) as response:
                     response.raise_for_status()
                     return await response.text()
 
@@ -93,9 +138,9 @@ class VimarProtocolAsync:
             self.request_last_exception = ex
             _LOGGER.error("Connection error: %s", str(ex))
             return False
-        except TimeoutError as ex:
-            self.request_last_exception = ex
-            _LOGGER.error("HTTP timeout after %ss", self._timeout)
+        except TimeoutError:
+            self.request_last_exception = TimeoutError("HTTP timeout occurred after %ss" % timeout)
+            _LOGGER.error("HTTP timeout after %ss", timeout)
             return False
         except aiohttp.ClientError as ex:
             self.request_last_exception = ex
@@ -0,0 +1,111 @@
+"""Priority scheduling of requests to the vimar webserver.
+
+The webserver handles only few requests at once, so every request waits for
+a free slot. Free slots go to the waiting request with the highest priority,
+a user action is never stuck behind a long discovery.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+from contextlib import asynccontextmanager
+
+# lower value is served first
+PRIORITY_WRITE = 0
+PRIORITY_READ = 1
+PRIORITY_POLL = 2
+PRIORITY_DISCOVERY = 3
+
+PRIORITY_NAMES = {
+    PRIORITY_WRITE: "write",
+    PRIORITY_READ: "read",
+    PRIORITY_POLL: "poll",
+    PRIORITY_DISCOVERY: "discovery",
+}
+
+DEFAULT_MAX_IN_FLIGHT = 2
+
+
+class VimarRequestScheduler:
+    """Limit concurrent requests and hand out free slots by priority."""
+
+    def __init__(self, max_in_flight: int | None = None):
+        """Create a scheduler allowing max_in_flight concurrent requests."""
+        self._max_in_flight = max(1, max_in_flight or DEFAULT_MAX_IN_FLIGHT)
+        self._in_flight = 0
+        self._waiters: list[tuple[int, int, asyncio.Future]] = []
+        self._sequence = itertools.count()
+        self._requests = dict.fromkeys(PRIORITY_NAMES, 0)
+        self._wait_total = dict.fromkeys(PRIORITY_NAMES, 0.0)
+        self._wait_max = dict.fromkeys(PRIORITY_NAMES, 0.0)
+
+    @property
+    def in_flight(self) -> int:
+        """Return the number of requests currently sent."""
+        return self._in_flight
+
+    @asynccontextmanager
+    async def slot(self, priority: int = PRIORITY_READ):
+        """Wait for a free slot, the request is sent inside the context."""
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        if self._in_flight < self._max_in_flight and not self._waiters:
+            self._in_flight += 1
+        else:
+            waiter = loop.create_future()
+            heapq.heappush(self._waiters, (priority, next(self._sequence), waiter))
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                if waiter.done() and not waiter.cancelled():
+                    # slot was handed over right before the cancellation
+                    self._release()
+                raise
+        self._record_wait(priority, loop.time() - started)
+
+        try:
+            yield
+        finally:
+            self._release()
+
+    def get_metrics(self) -> dict:
+        """Return request counts and queue wait times in seconds per priority."""
+        queued = dict.fromkeys(PRIORITY_NAMES, 0)
+        for priority, _, waiter in self._waiters:
+            if not waiter.done():
+                queued[priority] += 1
+        return {
+            "max_in_flight": self._max_in_flight,
+            "in_flight": self._in_flight,
+            "priorities": {
+                name: {
+                    "requests": self._requests[priority],
+                    "queued": queued[priority],
+                    "wait_avg": (
+                        round(self._wait_total[priority] / self._requests[priority], 4)
+                        if self._requests[priority]
+                        else 0.0
+                    ),
+                    "wait_max": round(self._wait_max[priority], 4),
+                }
+                for priority, name in PRIORITY_NAMES.items()
+            },
+        }
+
+    def _record_wait(self, priority: int, wait: float):
+        if priority not in self._requests:
+            return
+        self._requests[priority] += 1
+        self._wait_total[priority] += wait
+        self._wait_max[priority] = max(self._wait_max[priority], wait)
+
+    def _release(self):
+        """Hand the slot to the next waiting request or free it."""
+        while self._waiters:
+            _, _, waiter = heapq.heappop(self._waiters)
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self._in_flight -= 1
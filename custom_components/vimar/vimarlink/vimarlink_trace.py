@@ -0,0 +1,124 @@
+"""Record and replay the traffic between VimarLink and the webserver.
+
+A trace is a gzip compressed file with one json array per request:
+[started, duration, url, post, response, error]. started and duration are
+seconds, url is the path on the webserver without credentials, session ids
+in url and post are replaced, response is None for failed requests.
+
+Replaying answers each request with the next recorded response for the same
+url and post, the last one is repeated once all are used. So polls return
+the values in the order they were recorded, and a trace can be replayed
+without the installation it was recorded from.
+"""
+
+from __future__ import annotations
+
+import gzip
+import json
+import re
+import threading
+import time
+from collections import deque
+from urllib.parse import urlsplit
+
+from .vimarlink import VimarConnectionError
+
+TRACE_VERSION = 1
+SESSION_PLACEHOLDER = "SESSIONID"
+
+_SESSION_RE = re.compile(r"(<sessionid>)[^<]*(</sessionid>)|(sessionid=)[^&]*")
+_CREDENTIALS_RE = re.compile(r"((?:username|password)=)[^&]*")
+
+
+def normalize_url(url: str) -> str:
+    """Return path and query of an url, without credentials and session id."""
+    parts = urlsplit(url)
+    path = parts.path.lstrip("/")
+    if parts.query:
+        path += "?" + _CREDENTIALS_RE.sub(r"\1*", parts.query)
+    return _replace_session(path)
+
+
+def normalize_post(post: str | None) -> str | None:
+    """Return post data with a fixed session id."""
+    if post is None:
+        return None
+    return _replace_session(post)
+
+
+def _replace_session(text: str) -> str:
+    def replace(match):
+        if match.group(1):
+            return match.group(1) + SESSION_PLACEHOLDER + match.group(2)
+        return match.group(3) + SESSION_PLACEHOLDER
+
+    return _SESSION_RE.sub(replace, text)
+
+
+class VimarTraceRecorder:
+    """Write every request of a link into a trace file."""
+
+    def __init__(self, path: str):
+        """Open the trace file for writing."""
+        self._file = gzip.open(path, "wt", encoding="utf-8")
+        self._started = time.monotonic()
+        self._lock = threading.Lock()
+        self._file.write(json.dumps({"version": TRACE_VERSION}) + "\n")
+
+    def record(self, url, post, response, duration: float, error=None):
+        """Append one request to the trace."""
+        entry = [
+            round(time.monotonic() - duration - self._started, 4),
+            round(duration, 4),
+            normalize_url(url),
+            normalize_post(post),
+            response if isinstance(response, str) else None,
+            None if error is None else str(error),
+        ]
+        with self._lock:
+            self._file.write(json.dumps(entry, separators=(",", ":")) + "\n")
+
+    def close(self):
+        """Flush and close the trace file."""
+        with self._lock:
+            self._file.close()
+
+
+class VimarTracePlayer:
+    """Answer requests of a link from a recorded trace.
+
+    speed scales the recorded duration of each request: 1 replays in real
+    time, 10 ten times faster, None answers without any delay.
+    """
+
+    def __init__(self, path: str, speed: float | None = None):
+        """Load the trace file."""
+        self.speed = speed
+        self.missing_count = 0
+        self._responses: dict[tuple[str, str | None], deque] = {}
+        with gzip.open(path, "rt", encoding="utf-8") as file:
+            header = json.loads(file.readline())
+            if header.get("version") != TRACE_VERSION:
+                raise VimarConnectionError("Unsupported trace version: %s" % header.get("version"))
+            for line in file:
+                _, duration, url, post, response, error = json.loads(line)
+                self._responses.setdefault((url, post), deque()).append((response, duration, error))
+
+    def lookup(self, url, post):
+        """Return (response, delay, error) of the next recorded answer to a request.
+
+        response is False with an error if the request is not part of the trace.
+        """
+        key = (normalize_url(url), normalize_post(post))
+        responses = self._responses.get(key)
+        if not responses:
+            self.missing_count += 1
+            return False, 0.0, VimarConnectionError("Request not found in trace: %s" % key[0])
+
+        response, duration, error = responses[0]
+        if len(responses) > 1:
+            responses.popleft()
+        delay = duration / self.speed if self.speed else 0.0
+        if response is None:
+            return False, delay, VimarConnectionError(error or "Recorded request failed")
+        return response, delay, None
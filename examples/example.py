@@ -1,7 +1,9 @@
 """Vimar Platform example without HA."""
 # import async_timeout
 import argparse
+import atexit
 import configparser
+import csv
 import os
 
 # those imports only work in that directory
@@ -10,6 +12,7 @@ import os
 # sys.path.append(os.path.dirname(CURRENT_DIR))
 # from custom_components.vimar.vimarlink.vimarlink import (VimarLink, VimarProject)
 from vimarlink.vimarlink import VimarLink, VimarProject
+from vimarlink.vimarlink_trace import VimarTracePlayer, VimarTraceRecorder
 
 AVAILABLE_PLATFORMS = {
     "lights": "light",
@@ -62,6 +65,10 @@ def main():
     parser.add_argument("-d", "--device", type=int, dest="device_id", help="ID of the device you want to change")
     parser.add_argument("-s", "--status", type=str, dest="status_name", help="Status that you want to change")
     parser.add_argument("-v", "--value", type=str, dest="target_value", help="Change status to the given value")
+    parser.add_argument("--record", type=str, dest="record_path", help="Record all requests into the given trace file")
+    parser.add_argument("--replay", type=str, dest="replay_path", help="Answer all requests from the given trace file instead of the webserver")
+    parser.add_argument("--export", type=str, dest="export_path", help="Write all device status rows into the given csv file")
+    parser.add_argument("--speed", type=float, dest="replay_speed", help="Replay speed factor, default without delays")
     parser.add_argument("statuslist", metavar="status=value", type=str, nargs="*", help="Change the given status to the value")
     args = parser.parse_args()
 
@@ -89,8 +96,16 @@ def main():
 
     print("Link ready")
 
+    if args.replay_path:
+        vimarconnection.trace_player = VimarTracePlayer(args.replay_path, args.replay_speed)
+        print("Replaying from", args.replay_path)
+    elif args.record_path:
+        vimarconnection.trace_recorder = VimarTraceRecorder(args.record_path)
+        atexit.register(vimarconnection.trace_recorder.close)
+        print("Recording to", args.record_path)
+
     # if certificate is not available, download it
-    if os.path.isfile(config["webserver"]["certificate"]) is False:
+    if os.path.isfile(config["webserver"]["certificate"]) is False and not args.replay_path:
         vimarconnection.install_certificate()
         print("Certificate ready")
 
@@ -133,6 +148,21 @@ def main():
 
     print("Logged in")
 
+    # stream all device rows into a csv file, one page at a time
+    if args.export_path:
+        row_count = 0
+        with open(args.export_path, "w", newline="") as file:
+            writer = None
+            for page in vimarconnection.iter_remote_device_pages():
+                for row in page:
+                    if writer is None:
+                        writer = csv.DictWriter(file, fieldnames=list(row))
+                        writer.writeheader()
+                    writer.writerow(row)
+                row_count += len(page)
+        print("Exported %d rows to %s" % (row_count, args.export_path))
+        exit(0)
+
     # load all devices and device status
     vimarproject.update()
 
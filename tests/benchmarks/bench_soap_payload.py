@@ -0,0 +1,47 @@
+"""Compare cutting the payload out of a soap response with parsing the xml tree.
+
+Run with:
+    python -m tests.benchmarks.bench_soap_payload
+"""
+
+import os
+import sys
+import timeit
+from functools import partial
+from xml.etree import ElementTree
+from xml.sax.saxutils import escape
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(__file__), "..", "..", "custom_components", "vimar")
+)
+
+from vimarlink.vimarlink import extract_soap_payload
+
+from tests.benchmarks.bench_sql_payload import ROW_COUNTS, make_payload
+from tests.simulator.server import SOAP_ENVELOPE
+
+
+def parse_payload_tree(response):
+    """Return the payload text the way the xml tree parser finds it."""
+    return ElementTree.fromstring(response).find(".//payload").text
+
+
+def main():
+    """Print the best of 5 runs for each response size."""
+    print("%8s %12s %12s %8s" % ("rows", "xml tree ms", "extract ms", "speedup"))
+    for row_count in ROW_COUNTS:
+        response = SOAP_ENVELOPE % ("<payload>%s</payload>" % escape(make_payload(row_count)))
+        assert extract_soap_payload(response) == parse_payload_tree(response)
+        number = max(1, 100_000 // row_count)
+        dom = min(timeit.repeat(partial(parse_payload_tree, response), number=number, repeat=5))
+        extract = min(
+            timeit.repeat(partial(extract_soap_payload, response), number=number, repeat=5)
+        )
+        print(
+            "%8d %12.2f %12.2f %7.1fx"
+            % (row_count, dom / number * 1000, extract / number * 1000, dom / extract)
+        )
+
+
+if __name__ == "__main__":
+    main()
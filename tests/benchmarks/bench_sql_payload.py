@@ -0,0 +1,77 @@
+"""Compare the sql payload parser with the previous row-dict implementation.
+
+Run with:
+    python -m tests.benchmarks.bench_sql_payload
+"""
+
+import os
+import sys
+import timeit
+from functools import partial
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(__file__), "..", "..", "custom_components", "vimar")
+)
+
+from vimarlink.vimarlink import parse_sql_columns
+
+from tests.simulator import format_sql_payload
+
+ROW_COUNTS = [1_000, 10_000, 100_000]
+
+
+def legacy_parse_sql_payload(string):
+    """Parser used before the columnar rewrite, kept for comparison."""
+    return_list = []
+    lines = string.split("\n")
+    keys = []
+    for line in lines:
+        if line:
+            if line.find(":") == -1:
+                raise Exception("Missing :-character in response line: %s" % line)
+            prefix, values = line.split(":", 1)
+            prefix = prefix.strip()
+            if prefix in ["Response", "NextRows"]:
+                pass
+            else:
+                values = values.strip()[1:-1].split("','")
+                idx = 0
+                row_dict = {}
+                for value in values:
+                    if prefix == "Row000001":
+                        keys.append(value)
+                    else:
+                        row_dict[keys[idx]] = value
+                        idx += 1
+                if row_dict and len(row_dict) > 0:
+                    return_list.append(row_dict)
+    return return_list
+
+
+def make_payload(row_count):
+    """Payload shaped like the state poll."""
+    return format_sql_payload(
+        ["status_id", "status_value"],
+        [(str(1000 + row), str(row % 2)) for row in range(row_count)],
+    )
+
+
+def main():
+    """Print the best of 5 runs for each payload size."""
+    print("%8s %12s %12s %8s" % ("rows", "legacy ms", "columnar ms", "speedup"))
+    for row_count in ROW_COUNTS:
+        payload = make_payload(row_count)
+        assert len(parse_sql_columns(payload)[1]) == len(legacy_parse_sql_payload(payload))
+        number = max(1, 100_000 // row_count)
+        legacy = min(
+            timeit.repeat(partial(legacy_parse_sql_payload, payload), number=number, repeat=5)
+        )
+        columnar = min(timeit.repeat(partial(parse_sql_columns, payload), number=number, repeat=5))
+        print(
+            "%8d %12.2f %12.2f %7.1fx"
+            % (row_count, legacy / number * 1000, columnar / number * 1000, legacy / columnar)
+        )
+
+
+if __name__ == "__main__":
+    main()
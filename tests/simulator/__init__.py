@@ -0,0 +1,4 @@
+"""Local stand-in for the vimar webserver, used by tests and benchmarks."""
+
+from .database import create_database, generate_installation
+from .server import VimarSimulator, format_sql_payload
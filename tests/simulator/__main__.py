@@ -0,0 +1,52 @@
+"""Run the vimar webserver simulator.
+
+Example:
+    python -m tests.simulator --devices 2000 --port 8080 --latency 0.05
+"""
+
+import argparse
+import contextlib
+import logging
+
+from .server import VimarSimulator
+
+
+def main():
+    """Parse arguments and serve until interrupted."""
+    parser = argparse.ArgumentParser(description="Local vimar webserver simulator")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--devices", type=int, default=50, help="number of devices (50-20000)")
+    parser.add_argument("--rooms", type=int, default=None, help="default: one per 8 devices")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--database", default=":memory:", help="sqlite file, default in memory")
+    parser.add_argument("--username", default="admin")
+    parser.add_argument("--password", default="admin")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added per request")
+    parser.add_argument("--row-latency", type=float, default=0.0, help="seconds added per row")
+    parser.add_argument("--session-lifetime", type=float, default=None, help="seconds")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    simulator = VimarSimulator(
+        devices=args.devices,
+        rooms=args.rooms,
+        seed=args.seed,
+        database=args.database,
+        username=args.username,
+        password=args.password,
+        latency=args.latency,
+        row_latency=args.row_latency,
+        session_lifetime=args.session_lifetime,
+    )
+    logging.info(
+        "Simulating %(devices)d devices with %(states)d states in %(rooms)d rooms",
+        simulator.installation,
+    )
+    logging.info("Listening on http://%s:%d", args.host, args.port)
+    with contextlib.suppress(KeyboardInterrupt):
+        simulator.serve_forever(args.host, args.port)
+
+
+if __name__ == "__main__":
+    main()
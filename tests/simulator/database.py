@@ -0,0 +1,213 @@
+"""SQLite database shaped like the tables of a vimar webserver.
+
+Only the tables and columns used by vimarlink are created:
+
+- DPADD_OBJECT: rooms (GROUP), devices (BYMEIDX) and their states (BYMEOBJ)
+- DPADD_OBJECT_RELATION: _DPAD_DBCONSTANT_GROUP_MAIN -> rooms -> devices
+  (GENERIC_RELATION) and devices -> states (BYME_IDXOBJ_RELATION)
+- DPAD_WEB_PHPCLASS: classes of devices that can be triggered remotely
+"""
+
+from __future__ import annotations
+
+import random
+import sqlite3
+
+SCHEMA = """
+CREATE TABLE DPADD_OBJECT (
+    ID INTEGER PRIMARY KEY,
+    NAME TEXT NOT NULL DEFAULT '',
+    TYPE TEXT NOT NULL,
+    VALUES_TYPE TEXT NOT NULL DEFAULT '',
+    CURRENT_VALUE TEXT NOT NULL DEFAULT '',
+    PHPCLASS TEXT NOT NULL DEFAULT '',
+    OPTIONALP TEXT NOT NULL DEFAULT '',
+    IS_VISIBLE INTEGER NOT NULL DEFAULT 1,
+    OWNED_BY TEXT NOT NULL DEFAULT 'USER'
+);
+CREATE TABLE DPADD_OBJECT_RELATION (
+    ID INTEGER PRIMARY KEY,
+    PARENTOBJ_ID INTEGER NOT NULL,
+    CHILDOBJ_ID INTEGER NOT NULL,
+    RELATION_WEB_TIPOLOGY TEXT NOT NULL
+);
+CREATE INDEX IDX_RELATION_PARENT ON DPADD_OBJECT_RELATION (PARENTOBJ_ID, RELATION_WEB_TIPOLOGY);
+CREATE INDEX IDX_RELATION_CHILD ON DPADD_OBJECT_RELATION (CHILDOBJ_ID);
+CREATE TABLE DPAD_WEB_PHPCLASS (
+    CLASSNAME TEXT PRIMARY KEY,
+    IS_EVENT INTEGER NOT NULL DEFAULT 0,
+    IS_EXECUTABLE INTEGER NOT NULL DEFAULT 1
+);
+"""
+
+DEVICE_PHPCLASS = "dpadVimarBymeIdx"
+
+# object_type, name, category, weight, states as (status_name, value, status_range)
+DEVICE_TEMPLATES = [
+    ("CH_Main_Automation", "LAMPE", "light", 30, [("on/off", "0", "min=0|max=1")]),
+    (
+        "CH_Dimmer_Automation",
+        "DIMMER",
+        "light",
+        15,
+        [("on/off", "0", "min=0|max=1"), ("value", "0", "min=0|max=100")],
+    ),
+    (
+        "CH_Dimmer_RGB",
+        "RGB",
+        "light",
+        3,
+        [
+            ("on/off", "0", "min=0|max=1"),
+            ("value", "0", "min=0|max=100"),
+            ("red", "255", "min=0|max=255"),
+            ("green", "255", "min=0|max=255"),
+            ("blue", "255", "min=0|max=255"),
+        ],
+    ),
+    ("CH_Main_Automation", "STECKDOSE", "switch", 10, [("on/off", "0", "min=0|max=1")]),
+    (
+        "CH_Shutter_Automation",
+        "ROLLLADEN",
+        "shutter",
+        15,
+        [
+            ("up/down", "0", "min=0|max=1"),
+            ("stop up/stop down", "0", "min=0|max=1"),
+            ("position", "0", "min=0|max=100"),
+        ],
+    ),
+    (
+        "CH_ShutterWithoutPosition_Automation",
+        "JALOUSIE",
+        "shutter",
+        5,
+        [("up/down", "0", "min=0|max=1"), ("stop up/stop down", "0", "min=0|max=1")],
+    ),
+    (
+        "CH_HVAC_NoZonaNeutra",
+        "THERMOSTAT",
+        "climate",
+        8,
+        [
+            ("setpoint", "21.00", "min=-273|max=670760"),
+            ("temperatura_misurata", "20.50", "min=-273|max=670760"),
+            ("funzionamento", "6", ""),
+            ("stagione", "0", "min=0|max=1"),
+            ("unita", "0", "min=0|max=1"),
+            ("centralizzato", "0", "min=0|max=1"),
+        ],
+    ),
+    ("CH_Scene", "SZENE", "scene", 5, [("on/off", "0", "min=0|max=1")]),
+    (
+        "CH_Misuratore",
+        "ENERGIE",
+        "energy",
+        4,
+        [("Potenza attiva", "0", "min=0|max=100000")],
+    ),
+    (
+        "CH_Audio",
+        "RADIO",
+        "audio",
+        2,
+        [
+            ("on/off", "0", "min=0|max=1"),
+            ("volume", "30", "min=0|max=100"),
+            ("source", "0", "min=0|max=8"),
+            ("channel", "0", "min=0|max=8"),
+        ],
+    ),
+]
+
+ROOM_NAMES = ["KUECHE", "WOHNZIMMER", "SCHLAFZIMMER", "BAD", "FLUR", "BUERO", "KELLER", "GARTEN"]
+
+
+def create_database(path: str = ":memory:") -> sqlite3.Connection:
+    """Create an empty database with the vimar tables."""
+    connection = sqlite3.connect(path, check_same_thread=False)
+    connection.executescript(SCHEMA)
+    connection.execute(
+        "INSERT INTO DPAD_WEB_PHPCLASS (CLASSNAME, IS_EVENT, IS_EXECUTABLE) VALUES (?, 0, 1)",
+        (DEVICE_PHPCLASS,),
+    )
+    return connection
+
+
+def generate_installation(
+    connection: sqlite3.Connection,
+    devices: int = 50,
+    rooms: int | None = None,
+    seed: int = 0,
+) -> dict:
+    """Fill the database with rooms and devices, return the number of objects created.
+
+    Device types follow the weights of DEVICE_TEMPLATES, so large installs
+    have the same mix of lights, shutters, climates, ... as small ones.
+    Every 10th device is not assigned to any room and only found by the
+    remote devices query.
+    """
+    rng = random.Random(seed)
+    if rooms is None:
+        rooms = max(1, devices // 8)
+    weights = [template[3] for template in DEVICE_TEMPLATES]
+
+    objects = []
+    relations = []
+    next_id = iter(range(1, 1 << 62))
+
+    main_group_id = next(next_id)
+    objects.append(
+        (main_group_id, "_DPAD_DBCONSTANT_GROUP_MAIN", "GROUP", "", "", "", "", 0, "SYSTEM")
+    )
+
+    room_ids = []
+    for room in range(rooms):
+        room_id = next(next_id)
+        room_ids.append(room_id)
+        name = "%s %d" % (ROOM_NAMES[room % len(ROOM_NAMES)], room // len(ROOM_NAMES) + 1)
+        objects.append((room_id, name, "GROUP", "", "", "", "", 1, "USER"))
+        relations.append((main_group_id, room_id, "GENERIC_RELATION"))
+
+    status_count = 0
+    for device in range(devices):
+        object_type, name, category, _, states = rng.choices(DEVICE_TEMPLATES, weights)[0]
+        device_id = next(next_id)
+        device_name = "%s %d" % (name, device + 1)
+        objects.append(
+            (
+                device_id,
+                device_name,
+                "BYMEIDX",
+                object_type,
+                "",
+                DEVICE_PHPCLASS,
+                "category=%s" % category,
+                1,
+                "USER",
+            )
+        )
+        if device % 10 != 9:
+            relations.append((rng.choice(room_ids), device_id, "GENERIC_RELATION"))
+
+        for status_name, value, status_range in states:
+            status_id = next(next_id)
+            status_count += 1
+            objects.append(
+                (status_id, status_name, "BYMEOBJ", "", value, "", status_range, 1, "USER")
+            )
+            relations.append((device_id, status_id, "BYME_IDXOBJ_RELATION"))
+
+    connection.executemany(
+        "INSERT INTO DPADD_OBJECT (ID, NAME, TYPE, VALUES_TYPE, CURRENT_VALUE, PHPCLASS, "
+        "OPTIONALP, IS_VISIBLE, OWNED_BY) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        objects,
+    )
+    connection.executemany(
+        "INSERT INTO DPADD_OBJECT_RELATION (PARENTOBJ_ID, CHILDOBJ_ID, RELATION_WEB_TIPOLOGY) "
+        "VALUES (?, ?, ?)",
+        relations,
+    )
+    connection.commit()
+
+    return {"rooms": rooms, "devices": devices, "states": status_count}
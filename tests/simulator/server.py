@@ -0,0 +1,318 @@
+"""HTTP server answering like the web interface of a vimar webserver.
+
+Supported endpoints:
+
+- vimarbyweb/modules/system/user_login.php: login, returns a new session id
+- cgi-bin/dpadws: service-databasesocketoperation (DML-SQL SELECT) and
+  service-runonelement (SETVALUE)
+- vimarbyweb/modules/system/dpadaction.php: op=getjScriptEnvironment, the
+  session check
+
+Statements are executed as they are sent against the SQLite database, so
+every query of vimarlink runs unchanged. Only plain http is served.
+"""
+
+from __future__ import annotations
+
+import itertools
+import random
+import sqlite3
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+from xml.etree import ElementTree
+from xml.sax.saxutils import escape
+
+from .database import create_database, generate_installation
+
+# the parser of vimarlink treats a payload line without ":" as an invalid response
+INVALID_SESSION_PAYLOAD = "Invalid session id"
+
+SOAP_ENVELOPE = (
+    '<soapenv:Envelope xmlns:soapenv="http://schemas.xmlsoap.org/soap/envelope/">'
+    "<soapenv:Body><response>%s</response></soapenv:Body></soapenv:Envelope>"
+)
+
+
+def format_sql_payload(columns, rows) -> str:
+    """Format rows like the DML-SQL payload of the webserver."""
+    lines = ["Response: DBMG-000", "NextRows: %d" % (len(rows) + 1)]
+    lines.append("Row000001: '%s'" % "','".join(columns))
+    for idx, row in enumerate(rows, start=2):
+        values = ["" if value is None else str(value) for value in row]
+        lines.append("Row%06d: '%s'" % (idx, "','".join(values)))
+    return "\n".join(lines)
+
+
+class VimarSimulator:
+    """Vimar webserver stand-in backed by a generated SQLite installation.
+
+    latency is added to every request, row_latency for every row a SELECT
+    returns. session_lifetime expires session ids after the given seconds.
+    """
+
+    def __init__(
+        self,
+        devices: int = 50,
+        rooms: int | None = None,
+        seed: int = 0,
+        database: str = ":memory:",
+        username: str = "admin",
+        password: str = "admin",
+        latency: float = 0.0,
+        row_latency: float = 0.0,
+        session_lifetime: float | None = None,
+    ):
+        """Create the database and generate the installation."""
+        self.username = username
+        self.password = password
+        self.latency = latency
+        self.row_latency = row_latency
+        self.session_lifetime = session_lifetime
+        self.stats: Counter[str] = Counter()
+        self.installation = {}
+        self._connection = create_database(database)
+        self._lock = threading.Lock()
+        self._sessions: dict[str, float] = {}
+        self._session_counter = itertools.count(1)
+        self._rng = random.Random(seed)
+        self._server: ThreadingHTTPServer | None = None
+        self._thread: threading.Thread | None = None
+        if devices:
+            self.installation = generate_installation(self._connection, devices, rooms, seed)
+
+    def __enter__(self):
+        """Start serving on a free local port."""
+        self.start()
+        return self
+
+    def __exit__(self, *args):
+        """Stop serving."""
+        self.stop()
+
+    @property
+    def host(self) -> str:
+        """Return the host the simulator listens on."""
+        return self._server.server_address[0] if self._server else ""
+
+    @property
+    def port(self) -> int:
+        """Return the port the simulator listens on."""
+        return self._server.server_address[1] if self._server else 0
+
+    def start(self, host: str = "127.0.0.1", port: int = 0):
+        """Serve requests in a background thread."""
+        server = self._create_server(host, port)
+        self._thread = threading.Thread(target=server.serve_forever, daemon=True)
+        self._thread.start()
+
+    def serve_forever(self, host: str = "127.0.0.1", port: int = 0):
+        """Serve requests in the current thread."""
+        self._create_server(host, port).serve_forever()
+
+    def _create_server(self, host, port) -> ThreadingHTTPServer:
+        handler = type("Handler", (VimarRequestHandler,), {"simulator": self})
+        self._server = ThreadingHTTPServer((host, port), handler)
+        self._server.daemon_threads = True
+        return self._server
+
+    def stop(self):
+        """Stop the server thread."""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+        self._server = None
+        self._thread = None
+
+    def get_value(self, status_id) -> str | None:
+        """Return the current value of a status."""
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT CURRENT_VALUE FROM DPADD_OBJECT WHERE ID = ?", (int(status_id),)
+            ).fetchone()
+        return row[0] if row else None
+
+    def set_value(self, status_id, value) -> bool:
+        """Change the value of a status like a device on the bus would."""
+        with self._lock:
+            cursor = self._connection.execute(
+                "UPDATE DPADD_OBJECT SET CURRENT_VALUE = ? WHERE ID = ? AND TYPE = 'BYMEOBJ'",
+                (str(value), int(status_id)),
+            )
+            self._connection.commit()
+        return cursor.rowcount == 1
+
+    def change_random_values(self, count: int) -> list[int]:
+        """Flip the values of random on/off states, return the changed status ids."""
+        with self._lock:
+            status_ids = [
+                row[0]
+                for row in self._connection.execute(
+                    "SELECT ID FROM DPADD_OBJECT WHERE TYPE = 'BYMEOBJ' AND NAME = 'on/off'"
+                )
+            ]
+            changed = self._rng.sample(status_ids, min(count, len(status_ids)))
+            self._connection.executemany(
+                "UPDATE DPADD_OBJECT SET CURRENT_VALUE = "
+                "CASE CURRENT_VALUE WHEN '1' THEN '0' ELSE '1' END WHERE ID = ?",
+                [(status_id,) for status_id in changed],
+            )
+            self._connection.commit()
+        return changed
+
+    def execute(self, statement, parameters=()) -> int:
+        """Change the installation with a sql statement, return the number of changed rows."""
+        with self._lock:
+            cursor = self._connection.execute(statement, parameters)
+            self._connection.commit()
+        return cursor.rowcount
+
+    def expire_sessions(self):
+        """Invalidate all session ids handed out so far."""
+        with self._lock:
+            self._sessions.clear()
+
+    def login(self, username, password) -> str | None:
+        """Return a new session id for valid credentials."""
+        if username != self.username or password != self.password:
+            return None
+        with self._lock:
+            session_id = "%016x" % (next(self._session_counter) * 2654435761)
+            self._sessions[session_id] = time.monotonic()
+        return session_id
+
+    def is_valid_session(self, session_id) -> bool:
+        """Check if a session id was handed out and has not expired."""
+        with self._lock:
+            created = self._sessions.get(session_id)
+            if created is None:
+                return False
+            if self.session_lifetime is not None:
+                if time.monotonic() - created > self.session_lifetime:
+                    del self._sessions[session_id]
+                    return False
+        return True
+
+    def execute_select(self, statement):
+        """Run a select statement, return column names and rows."""
+        with self._lock:
+            cursor = self._connection.execute(statement)
+            columns = [column[0] for column in cursor.description or []]
+            rows = cursor.fetchall()
+        return columns, rows
+
+
+class VimarRequestHandler(BaseHTTPRequestHandler):
+    """Answer requests of vimarlink."""
+
+    simulator: VimarSimulator
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        """Keep test and benchmark output clean."""
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if url.path.endswith("/user_login.php"):
+            self._delay()
+            self.simulator.stats["login"] += 1
+            query = parse_qs(url.query)
+            session_id = self.simulator.login(
+                query.get("username", [""])[0], query.get("password", [""])[0]
+            )
+            if session_id is None:
+                body = (
+                    "<?xml version='1.0'?><response><result>1</result>"
+                    "<message>Wrong username or password</message><sessionid></sessionid>"
+                    "</response>"
+                )
+            else:
+                body = (
+                    "<?xml version='1.0'?><response><result>0</result>"
+                    "<message>ok</message><sessionid>%s</sessionid></response>" % session_id
+                )
+            self._send(200, body, "text/xml")
+        else:
+            self._send(404, "not found", "text/plain")
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        post = self.rfile.read(length).decode("utf-8")
+        if urlsplit(self.path).path.endswith("/dpadaction.php"):
+            self._check_session(parse_qs(post))
+            return
+        if not urlsplit(self.path).path.endswith("/cgi-bin/dpadws"):
+            self._send(404, "not found", "text/plain")
+            return
+
+        self._delay()
+        try:
+            fields = _soap_fields(post)
+        except ElementTree.ParseError as err:
+            self._send(400, "invalid soap request: %s" % err, "text/plain")
+            return
+
+        if not self.simulator.is_valid_session(fields.get("sessionid")):
+            self.simulator.stats["invalid_session"] += 1
+            self._send_soap("<payload>%s</payload>" % escape(INVALID_SESSION_PAYLOAD))
+        elif fields.get("function") == "DML-SQL":
+            self._select(fields.get("statement", ""))
+        elif fields.get("operation") == "SETVALUE":
+            self.simulator.stats["setvalue"] += 1
+            if not self.simulator.set_value(fields.get("idobject", 0), fields.get("payload", "")):
+                self._send_soap("<payload>%s</payload>" % escape("Unknown object"))
+            else:
+                self._send_soap("<result>0</result>")
+        else:
+            self._send(400, "unsupported operation", "text/plain")
+
+    def _check_session(self, form):
+        self._delay()
+        self.simulator.stats["check_session"] += 1
+        if form.get("op", [""])[0] != "getjScriptEnvironment":
+            self._send(400, "unsupported operation", "text/plain")
+        elif self.simulator.is_valid_session(form.get("sessionid", [""])[0]):
+            self._send(200, "<response><result>0</result></response>", "text/xml")
+        else:
+            self._send(200, INVALID_SESSION_PAYLOAD, "text/plain")
+
+    def _select(self, statement):
+        self.simulator.stats["sql"] += 1
+        try:
+            columns, rows = self.simulator.execute_select(statement)
+        except sqlite3.Error as err:
+            self._send(500, "sql error: %s" % err, "text/plain")
+            return
+        self.simulator.stats["rows"] += len(rows)
+        if self.simulator.row_latency:
+            time.sleep(self.simulator.row_latency * len(rows))
+        self._send_soap("<payload>%s</payload>" % escape(format_sql_payload(columns, rows)))
+
+    def _delay(self):
+        if self.simulator.latency:
+            time.sleep(self.simulator.latency)
+
+    def _send_soap(self, content):
+        self._send(200, SOAP_ENVELOPE % content, "text/xml")
+
+    def _send(self, status, body, content_type):
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "%s; charset=utf-8" % content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def _soap_fields(post) -> dict[str, str]:
+    """Return text of all elements of the soap body by their local name."""
+    fields = {}
+    for element in ElementTree.fromstring(post).iter():
+        name = element.tag.rsplit("}", 1)[-1]
+        if element.text is not None:
+            fields[name] = element.text
+    return fields
@@ -0,0 +1,316 @@
+"""Run vimarlink against the local webserver simulator.
+
+NO Home Assistant dependencies required.
+"""
+
+import asyncio
+import os
+import sys
+
+import pytest
+import requests
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(__file__), "..", "..", "custom_components", "vimar")
+)
+
+from vimarlink.vimarlink import VimarConfigError, VimarLink, VimarProject
+from vimarlink.vimarlink_async import VimarLinkAsync, VimarProjectAsync
+
+from tests.simulator import VimarSimulator
+
+pytestmark = pytest.mark.no_ha  # No HA required
+
+
+@pytest.fixture
+def simulator():
+    """Simulator with a small installation."""
+    with VimarSimulator(devices=60, seed=1) as simulator:
+        yield simulator
+
+
+def make_link(simulator, link_class=VimarLink, password="admin"):
+    return link_class("http", simulator.host, simulator.port, "admin", password, None, 5)
+
+
+def test_discovery_finds_all_devices(simulator):
+    """Remote and room devices of the generated installation are found."""
+    link = make_link(simulator)
+    project = VimarProject(link)
+    link.login()
+
+    devices = project.update(forced=True)
+    link.close()
+
+    assert len(devices) == 60
+    assert len(project._status_index) == simulator.installation["states"]
+    assert project.get_by_device_type("light")
+    in_rooms = [device for device in devices.values() if device["room_ids"]]
+    assert 0 < len(in_rooms) < 60
+
+
+def test_device_rows_are_streamed_page_by_page(simulator):
+    """Each page is handed out before the next one is requested."""
+    link = make_link(simulator)
+    link.login()
+
+    pages = link.iter_sql_pages(link._get_remote_devices_select, 50)
+    first_page = next(pages)
+    requests_after_first_page = simulator.stats["sql"]
+    rows = len(first_page) + sum(len(page) for page in pages)
+    link.close()
+
+    assert len(first_page) == 50
+    assert requests_after_first_page == 1
+    assert rows == simulator.installation["states"]
+
+
+def test_keyset_pages_keep_status_objects_shared_by_devices(simulator):
+    """A page ending inside the rows of a status shared by several devices loses none of them."""
+    link = make_link(simulator)
+    link.login()
+    devices, _ = link.get_remote_devices(limit=20)
+    object_ids = list(devices)
+    # every device shares the status objects of the next one
+    for object_id, next_object_id in zip(object_ids, object_ids[1:], strict=False):
+        simulator.execute(
+            "INSERT INTO DPADD_OBJECT_RELATION (PARENTOBJ_ID, CHILDOBJ_ID, RELATION_WEB_TIPOLOGY) "
+            "SELECT ?, CHILDOBJ_ID, RELATION_WEB_TIPOLOGY FROM DPADD_OBJECT_RELATION "
+            "WHERE PARENTOBJ_ID = ? AND RELATION_WEB_TIPOLOGY = 'BYME_IDXOBJ_RELATION'",
+            (object_id, next_object_id),
+        )
+
+    def get_rows(limit):
+        pages = link.iter_sql_pages(link._get_remote_devices_select, limit, key="status_id")
+        return sorted((row["object_id"], row["status_id"]) for page in pages for row in page)
+
+    all_rows = sorted(
+        (row["object_id"], row["status_id"])
+        for row in link._request_vimar_sql(link._get_remote_devices_select(0, 0))
+    )
+    paged_rows = {limit: get_rows(limit) for limit in (7, 10)}
+    link.close()
+
+    assert len(all_rows) > simulator.installation["states"]
+    assert paged_rows == dict.fromkeys(paged_rows, all_rows)
+
+
+def test_fingerprint_ignores_values_but_not_renames(simulator):
+    """The fingerprint only changes with the installation, not with current values."""
+    link = make_link(simulator)
+    link.login()
+
+    fingerprint = link.get_fingerprint()
+    simulator.change_random_values(5)
+    unchanged = link.get_fingerprint()
+    simulator.execute("UPDATE DPADD_OBJECT SET NAME = 'LAMPE 99' WHERE NAME = 'LAMPE 1'")
+    renamed = link.get_fingerprint()
+    link.close()
+
+    assert fingerprint is not None
+    assert unchanged == fingerprint
+    assert renamed != fingerprint
+
+
+async def test_changed_fingerprint_triggers_discovery(simulator):
+    """A state only poll runs a discovery once devices were moved or removed."""
+    link = make_link(simulator, VimarLinkAsync)
+    project = VimarProjectAsync(link)
+    await link.async_login()
+    devices = await project.async_update(forced=True)
+    removed_id, device = next(iter(devices.items()))
+    room_id, room = next(iter(link.get_rooms().items()))
+
+    await project.async_update()
+    assert not project.last_update_discovered
+
+    simulator.execute("DELETE FROM DPADD_OBJECT_RELATION WHERE CHILDOBJ_ID = ?", (removed_id,))
+    simulator.execute("DELETE FROM DPADD_OBJECT WHERE ID = ?", (removed_id,))
+    moved_id = next(object_id for object_id in devices if object_id != removed_id)
+    simulator.execute(
+        "UPDATE DPADD_OBJECT_RELATION SET PARENTOBJ_ID = ? "
+        "WHERE CHILDOBJ_ID = ? AND RELATION_WEB_TIPOLOGY = 'GENERIC_RELATION'",
+        (room_id, moved_id),
+    )
+    project.fingerprint_interval = 0
+    devices = await project.async_update()
+    await link.async_close()
+
+    assert project.last_update_discovered
+    assert removed_id not in devices
+    assert devices[moved_id]["room_name"] == room["name"]
+
+
+async def test_unchanged_fingerprint_is_checked_once_per_interval(simulator, monkeypatch):
+    """A state only poll that compared the fingerprint restarts its interval."""
+    link = make_link(simulator, VimarLinkAsync)
+    project = VimarProjectAsync(link)
+    await link.async_login()
+    await project.async_update(forced=True)
+    fingerprints = []
+    get_fingerprint = link.async_get_fingerprint
+
+    async def counting_get_fingerprint(*args, **kwargs):
+        fingerprints.append(await get_fingerprint(*args, **kwargs))
+        return fingerprints[-1]
+
+    monkeypatch.setattr(link, "async_get_fingerprint", counting_get_fingerprint)
+    # the interval passed since the discovery
+    project._fingerprint_checked -= project.fingerprint_interval
+    await project.async_update()
+    await project.async_update()
+    await link.async_close()
+
+    assert len(fingerprints) == 1
+    assert fingerprints[0] is not None
+    assert not project.last_update_discovered
+
+
+def test_wrong_password_is_rejected(simulator):
+    """Invalid credentials raise a config error."""
+    link = make_link(simulator, password="wrong")
+    with pytest.raises(VimarConfigError):
+        link.login()
+    link.close()
+
+
+async def test_poll_and_write_roundtrip(simulator):
+    """Writes reach the database, changes on the bus are seen by the next poll."""
+    link = make_link(simulator, VimarLinkAsync)
+    project = VimarProjectAsync(link)
+    await link.async_login()
+    devices = await project.async_update(forced=True)
+    project.pop_changed_object_ids()
+
+    status_id = next(iter(devices.values()))["status"]["on/off"]["status_id"]
+    await link.async_set_device_status(status_id, "1")
+    assert simulator.get_value(status_id) == "1"
+
+    changed = simulator.change_random_values(3)
+    await project.async_update()
+    await link.async_close()
+
+    assert {project.get_by_status_id(status_id)[0]["object_id"] for status_id in changed} <= (
+        project.pop_changed_object_ids()
+    )
+    assert simulator.stats["setvalue"] == 1
+
+
+def test_refresh_reads_only_the_given_devices(simulator):
+    """Written devices are read back in batches of object ids."""
+    link = make_link(simulator)
+    project = VimarProject(link)
+    link.login()
+    project.update(forced=True)
+    project.pop_changed_object_ids()
+
+    changed = simulator.change_random_values(10)
+    changed_ids = {project.get_by_status_id(status_id)[0]["object_id"] for status_id in changed}
+    link._page_sizes._page_sizes["device_status"] = 4
+    requests_before = simulator.stats["sql"]
+    project.refresh_devices(sorted(changed_ids)[:5])
+    link.close()
+
+    assert simulator.stats["sql"] - requests_before == 2
+    assert project.pop_changed_object_ids() == set(sorted(changed_ids)[:5])
+
+
+def test_expired_session_is_renewed_within_the_poll(simulator):
+    """A poll sent with an expired session logs in again and still reads the states."""
+    link = make_link(simulator)
+    project = VimarProject(link)
+    link.login()
+    project.update(forced=True)
+    project.pop_changed_object_ids()
+
+    simulator.expire_sessions()
+    changed = simulator.change_random_values(3)
+    project.update()
+    link.close()
+
+    assert simulator.stats["login"] == 2
+    assert link.get_session_metrics()["renewals"] == 1
+    assert {project.get_by_status_id(status_id)[0]["object_id"] for status_id in changed} <= (
+        project.pop_changed_object_ids()
+    )
+
+
+async def test_concurrent_requests_share_one_renewal(simulator):
+    """Requests failing together with an expired session wait for a single login."""
+    link = make_link(simulator, VimarLinkAsync)
+    await link.async_login()
+    status_ids = [str(status_id) for status_id in range(1, 200)]
+
+    simulator.expire_sessions()
+    results = await asyncio.gather(
+        *(link.async_get_status_values(status_ids[i::5]) for i in range(5)),
+        link.async_set_device_status(*simulator.change_random_values(1), "1"),
+    )
+    await link.async_close()
+
+    assert simulator.stats["invalid_session"] > 1
+    assert simulator.stats["login"] == 2
+    assert link.get_session_metrics()["renewals"] == 1
+    assert all(header == ("status_id", "status_value") for header, _ in results[:5])
+    assert simulator.stats["setvalue"] == 1
+
+
+async def test_rejected_write_is_not_sent_again(simulator):
+    """A SETVALUE the webserver rejects is reported, not taken as an expired session."""
+    link = make_link(simulator, VimarLinkAsync)
+    await link.async_login()
+
+    errors = await link.async_set_device_status_batch([("999999", "1", "NO-OPTIONALS")])
+    error = await link.async_set_device_status("999999", "1")
+    await link.async_close()
+
+    assert errors == {"999999": "Unknown object"}
+    assert error == "Unknown object"
+    assert simulator.stats["setvalue"] == 2
+    assert simulator.stats["login"] == 1
+    assert link.get_session_metrics()["renewals"] == 0
+
+
+async def test_keepalive_renews_the_session_before_it_expires():
+    """Once the lifetime is known, the session is renewed before requests hit its end."""
+    with VimarSimulator(devices=5, seed=1, session_lifetime=0.5) as simulator:
+        link = make_link(simulator, VimarLinkAsync)
+        await link.async_login()
+        await asyncio.sleep(0.6)
+        await link.async_get_status_values(["1"])
+        assert simulator.stats["invalid_session"] == 1
+
+        delay = await link.async_keep_session_alive(0.3)
+        assert simulator.stats["check_session"] == 1
+        await asyncio.sleep(delay)
+        assert await link.async_keep_session_alive(0.3) > 0
+        header, _ = await link.async_get_status_values(["1"])
+        await link.async_close()
+
+    assert header == ("status_id", "status_value")
+    assert simulator.stats["invalid_session"] == 1
+    assert simulator.stats["login"] == 3
+    assert link.get_session_metrics()["refreshes"] == 1
+
+
+def test_connections_are_pooled_until_closed(simulator, monkeypatch):
+    """Requests share one keep-alive session, errors and close drop its connections."""
+    link = VimarLink("http", simulator.host, simulator.port, "admin", "admin", None, 5, 2)
+    link.login()
+    session = link._http_session
+    assert session.get_adapter("http://")._pool_maxsize == 2
+    link.get_room_ids()
+    assert link._http_session is session
+
+    link.close()
+    assert link._http_session is None
+    link.login()
+    assert link._http_session is not session
+
+    def broken_connection(*args, **kwargs):
+        raise requests.ConnectionError("connection reset")
+
+    monkeypatch.setattr(link._http_session, "post", broken_connection)
+    assert link.get_fingerprint() is None
+    assert link._http_session is None
+    link.close()
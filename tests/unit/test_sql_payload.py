@@ -0,0 +1,116 @@
+"""Test parsing of DML-SQL payloads.
+
+NO Home Assistant dependencies required.
+"""
+
+import os
+import sys
+from xml.etree import ElementTree
+
+import pytest
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(__file__), "..", "..", "custom_components", "vimar")
+)
+
+from vimarlink.vimarlink import (
+    VimarApiError,
+    VimarLink,
+    VimarSessionExpired,
+    extract_soap_payload,
+    parse_sql_columns,
+)
+
+pytestmark = pytest.mark.no_ha  # No HA required
+
+
+def test_columns_and_rows_are_tuples():
+    """Header and rows are returned as tuples in payload order."""
+    header, rows = parse_sql_columns(
+        "Response: DBMG-000\n"
+        "NextRows: 3\n"
+        "Row000001: 'status_id','status_value'\n"
+        "Row000002: '769','1'\n"
+        "Row000003: '770',''\n"
+    )
+
+    assert header == ("status_id", "status_value")
+    assert rows == [("769", "1"), ("770", "")]
+
+
+def test_quotes_commas_and_line_breaks_in_values():
+    """Quotes, commas and line breaks inside a value do not split it."""
+    header, rows = parse_sql_columns(
+        "Response: DBMG-000\n"
+        "NextRows: 3\n"
+        "Row000001: 'object_id','object_name'\n"
+        "Row000002: '768','LUCE D'INGRESSO, PIANO 1'\n"
+        "Row000003: '769','NOTE\nSECOND LINE: OK'\n"
+    )
+
+    assert rows == [("768", "LUCE D'INGRESSO, PIANO 1"), ("769", "NOTE\nSECOND LINE: OK")]
+
+
+def test_header_only_payload_has_no_rows():
+    """A select without results returns the header only."""
+    assert parse_sql_columns("Response: DBMG-000\nNextRows: 1\nRow000001: 'id','name'") == (
+        ("id", "name"),
+        [],
+    )
+
+
+def test_invalid_session_payload_is_an_expired_session():
+    """The error text of an unknown session id is taken as an expired session."""
+    link = VimarLink("https", "192.168.1.1", 443, "user", "pass")
+    link._session_id = "abc"
+
+    with pytest.raises(VimarSessionExpired):
+        link._parse_sql_payload("Invalid session id")
+
+
+def test_other_invalid_payloads_are_api_errors():
+    """Payloads that are neither a result list nor a session error do not renew the session."""
+    link = VimarLink("https", "192.168.1.1", 443, "user", "pass")
+
+    with pytest.raises(VimarApiError) as err:
+        link._parse_sql_payload("Unknown object")
+
+    assert not isinstance(err.value, VimarSessionExpired)
+
+
+def test_payload_dicts_match_columns():
+    """Row dicts are built from the columnar result."""
+    link = VimarLink("https", "192.168.1.1", 443, "user", "pass")
+
+    assert link._parse_sql_payload("Row000001: 'id','name'\nRow000002: '10','Kitchen'") == [
+        {"id": "10", "name": "Kitchen"}
+    ]
+
+
+def test_payload_is_cut_out_and_unescaped():
+    """Payload text equals what the xml parser returns."""
+    response = (
+        '<soapenv:Envelope xmlns:soapenv="http://schemas.xmlsoap.org/soap/envelope/">'
+        "<soapenv:Body><response><payload>Row000001: &apos;name&apos;\r\n"
+        "Row000002: &apos;A &amp; B &lt;1&gt; &#233;&#x21;&apos;</payload></response>"
+        "</soapenv:Body></soapenv:Envelope>"
+    )
+
+    payload = extract_soap_payload(response)
+
+    assert payload == ElementTree.fromstring(response).find(".//payload").text
+    assert payload == "Row000001: 'name'\nRow000002: 'A & B <1> é!'"
+
+
+@pytest.mark.parametrize(
+    "response",
+    [
+        "<?xml version='1.0'?><response><result>0</result><sessionid>1</sessionid></response>",
+        "<response><payload><![CDATA[Row000001: 'id']]></payload></response>",
+        "<response><payload></payload></response>",
+        "<response><payload>a</payload><payload>b</payload></response>",
+    ],
+)
+def test_unusual_responses_need_the_xml_parser(response):
+    """Responses without a single plain payload fall back to the xml tree."""
+    assert extract_soap_payload(response) is None
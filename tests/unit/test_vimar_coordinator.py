@@ -0,0 +1,87 @@
+"""Test which entities write their state after a poll.
+
+Home Assistant required.
+"""
+
+import asyncio
+
+import pytest
+
+pytest.importorskip("pytest_homeassistant_custom_component")
+
+from custom_components.vimar.vimar_coordinator import VimarDataUpdateCoordinator
+
+pytestmark = pytest.mark.integration
+
+
+@pytest.fixture
+def coordinator(hass):
+    """Coordinator without a connection to a webserver."""
+    return VimarDataUpdateCoordinator(hass, None, {})
+
+
+@pytest.fixture
+def updated(coordinator):
+    """Listen like the entities of three devices, collect the devices that wrote their state."""
+    updated = []
+    removers = []
+    for device_id in ("1", "2", "3"):
+
+        def handle_update(device_id=device_id):
+            if coordinator.is_device_changed(device_id):
+                updated.append(device_id)
+
+        removers.append(coordinator.async_add_listener(handle_update, device_id))
+    yield updated
+    for remove in removers:
+        remove()
+
+
+async def test_only_changed_devices_write_their_state(coordinator, updated):
+    coordinator._changed_device_ids = {"2"}
+    coordinator.async_update_listeners()
+
+    assert updated == ["2"]
+
+
+async def test_availability_change_updates_all_devices(coordinator, updated):
+    coordinator._changed_device_ids = {"2"}
+    coordinator.last_update_success = False
+    coordinator.async_update_listeners()
+    assert updated == ["1", "2", "3"]
+
+    updated.clear()
+    coordinator.async_update_listeners()
+    assert updated == ["2"]
+
+    updated.clear()
+    coordinator.last_update_success = True
+    coordinator.async_update_listeners()
+    assert updated == ["1", "2", "3"]
+
+
+async def test_discovery_updates_all_devices(coordinator, updated):
+    coordinator._changed_device_ids = None
+    coordinator.async_update_listeners()
+
+    assert updated == ["1", "2", "3"]
+
+
+async def test_write_refresh_waits_for_a_running_poll(hass, coordinator, monkeypatch):
+    refreshed = []
+
+    class Project:
+        async def async_refresh_devices(self, device_ids):
+            refreshed.append(device_ids)
+
+    coordinator.vimarproject = Project()
+    monkeypatch.setattr(coordinator, "_detect_state_changes", lambda: {"1"})
+    coordinator._refresh_device_ids = {"1"}
+
+    async with coordinator._poll_lock:
+        task = hass.async_create_task(coordinator._async_refresh_written_devices())
+        await asyncio.sleep(0)
+        assert refreshed == []
+    await task
+
+    assert refreshed == [{"1"}]
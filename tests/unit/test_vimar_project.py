@@ -0,0 +1,79 @@
+"""Test status bookkeeping of VimarProject.
+
+NO Home Assistant dependencies required.
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(__file__), "..", "..", "custom_components", "vimar")
+)
+
+from vimarlink.vimarlink import VimarLink, VimarProject
+
+pytestmark = pytest.mark.no_ha  # No HA required
+
+
+@pytest.fixture
+def project():
+    """Project with a dimmer and a shutter already discovered."""
+    project = VimarProject(VimarLink("https", "192.168.1.1", 443, "user", "pass"))
+    project._devices = {
+        "768": {
+            "object_id": "768",
+            "object_name": "DIMMER 11 WOHNZIMMER",
+            "object_type": "CH_Dimmer_Automation",
+            "status": {
+                "on/off": {"status_id": "769", "status_value": "1"},
+                "value": {"status_id": "770", "status_value": "75"},
+            },
+        },
+        "800": {
+            "object_id": "800",
+            "object_name": "ROLLLADEN 1 KUECHE",
+            "object_type": "CH_Shutter_Automation",
+            "status": {"up/down": {"status_id": "801", "status_value": "0"}},
+        },
+    }
+    project._build_status_index()
+    return project
+
+
+def test_status_index_resolves_device_and_status(project):
+    """Every status id points to its device and status name."""
+    device, status_name = project.get_by_status_id("770")
+
+    assert device["object_id"] == "768"
+    assert status_name == "value"
+    assert project.get_by_status_id(801)[1] == "up/down"
+    assert project.get_by_status_id("999") is None
+
+
+def test_apply_status_values_reports_changes(project):
+    """Only values that differ are written and reported."""
+    changed = project.apply_status_values(
+        [
+            {"status_id": "769", "status_value": "1"},
+            {"status_id": "770", "status_value": "40"},
+            {"status_id": "801", "status_value": "1"},
+            {"status_id": "999", "status_value": "1"},
+        ]
+    )
+
+    assert changed == {"768": {"value"}, "800": {"up/down"}}
+    assert project.devices["768"]["status"]["value"]["status_value"] == "40"
+    assert project.devices["800"]["status"]["up/down"]["status_value"] == "1"
+
+
+def test_apply_status_values_bumps_versions(project):
+    """Changed devices get a new version and are reported once."""
+    project.apply_status_values([{"status_id": "770", "status_value": "40"}])
+    project.apply_status_values([{"status_id": "801", "status_value": "0"}])
+
+    assert project.get_device_version("768") == 1
+    assert project.get_device_version("800") == 0
+    assert project.pop_changed_object_ids() == {"768"}
+    assert project.pop_changed_object_ids() == set()
@@ -0,0 +1,96 @@
+"""Test coalescing of status writes.
+
+NO Home Assistant dependencies required.
+"""
+
+import asyncio
+import os
+import sys
+
+import pytest
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(__file__), "..", "..", "custom_components", "vimar")
+)
+
+from vimarlink.vimarlink_async import VimarWriteQueue
+
+pytestmark = pytest.mark.no_ha  # No HA required
+
+
+class FakeLink:
+    """Record every batch sent."""
+
+    def __init__(self):
+        self.batches = []
+
+    async def async_set_device_status_batch(self, writes):
+        self.batches.append(writes)
+        return {}
+
+
+async def test_delayed_writes_send_only_latest_value():
+    """Values for the same status within the delay replace each other."""
+    link = FakeLink()
+    queue = VimarWriteQueue(link)
+
+    results = await asyncio.gather(
+        queue.async_write("768", [("770", "10", "NO-OPTIONALS")], 0.01),
+        queue.async_write("768", [("770", "20", "NO-OPTIONALS")], 0.01),
+        queue.async_write(
+            "768", [("770", "30", "NO-OPTIONALS"), ("769", "1", "NO-OPTIONALS")], 0.01
+        ),
+    )
+
+    assert results == [{}, {}, {}]
+    assert link.batches == [[("770", "30", "NO-OPTIONALS"), ("769", "1", "NO-OPTIONALS")]]
+    assert queue.superseded_count == 2
+
+
+async def test_immediate_write_sends_pending_values_first():
+    """An explicit action sends waiting slider values, its own values win."""
+    link = FakeLink()
+    queue = VimarWriteQueue(link)
+
+    delayed = asyncio.ensure_future(
+        queue.async_write("768", [("770", "40", "NO-OPTIONALS"), ("769", "1", "NO-OPTIONALS")], 10)
+    )
+    await asyncio.sleep(0)
+    await queue.async_write("768", [("769", "0", "NO-OPTIONALS")])
+
+    assert await delayed == {}
+    assert link.batches == [[("770", "40", "NO-OPTIONALS"), ("769", "0", "NO-OPTIONALS")]]
+
+
+async def test_flush_all_sends_waiting_writes():
+    """Closing sends what is still waiting."""
+    link = FakeLink()
+    queue = VimarWriteQueue(link)
+
+    delayed = asyncio.ensure_future(queue.async_write("800", [("802", "50", "NO-OPTIONALS")], 10))
+    await asyncio.sleep(0)
+    await queue.async_flush_all()
+
+    assert await delayed == {}
+    assert link.batches == [[("802", "50", "NO-OPTIONALS")]]
+
+
+async def test_cancelled_flush_releases_waiting_writers():
+    """Writers waiting for a batch that gets cancelled are cancelled as well."""
+    link = FakeLink()
+    sending = asyncio.Event()
+
+    async def hanging_batch(writes):
+        sending.set()
+        await asyncio.Event().wait()
+
+    link.async_set_device_status_batch = hanging_batch
+    queue = VimarWriteQueue(link)
+
+    delayed = asyncio.ensure_future(queue.async_write("768", [("770", "10", "NO-OPTIONALS")], 0.01))
+    await asyncio.wait_for(sending.wait(), 5)
+    for task in queue._tasks:
+        task.cancel()
+
+    with pytest.raises(asyncio.CancelledError):
+        await asyncio.wait_for(delayed, 5)
@@ -0,0 +1,648 @@
+"""Test the async vimar link with a fake transport.
+
+NO Home Assistant dependencies required.
+"""
+
+import asyncio
+import json
+import os
+import ssl
+import sys
+import threading
+
+import aiohttp
+import pytest
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(__file__), "..", "..", "custom_components", "vimar")
+)
+
+from vimarlink import vimarlink as vimarlink_module
+from vimarlink import vimarlink_protocol_async
+from vimarlink.vimarlink_async import VimarLinkAsync, VimarProjectAsync
+from vimarlink.vimarlink_deadline import VimarDeadline
+from vimarlink.vimarlink_protocol_async import VimarProtocolAsync
+
+pytestmark = pytest.mark.no_ha  # No HA required
+
+LOGIN_RESPONSE = (
+    "<?xml version='1.0'?><response><result>0</result>"
+    "<message>ok</message><sessionid>abc123</sessionid></response>"
+)
+
+
+def sql_response(header, rows):
+    """Build a soap response holding a DML-SQL payload."""
+    lines = ["Response: DBMG-000", "NextRows: %d" % len(rows)]
+    lines.append("Row000001: '%s'" % "','".join(header))
+    for idx, row in enumerate(rows, start=2):
+        lines.append("Row%06d: '%s'" % (idx, "','".join(row)))
+    payload = "\n".join(lines).replace("&", "&amp;").replace("<", "&lt;")
+    return (
+        '<soapenv:Envelope xmlns:soapenv="http://schemas.xmlsoap.org/soap/envelope/">'
+        "<soapenv:Body><response><payload>%s</payload></response></soapenv:Body>"
+        "</soapenv:Envelope>" % payload
+    )
+
+
+DEVICE_HEADER = [
+    "room_ids",
+    "object_id",
+    "object_name",
+    "object_type",
+    "status_id",
+    "status_name",
+    "status_range",
+    "status_value",
+]
+
+
+class FakeProtocol:
+    """Record requests and answer with canned responses."""
+
+    def __init__(self, device_rows):
+        self.device_rows = device_rows
+        self.keyset_support = True
+        self.fingerprint_support = True
+        self.requests = []
+        self.request_last_exception = None
+        self.closed = False
+
+    async def _request(self, url, post=None, headers=None, verify_ssl=True, timeout=None):
+        self.requests.append((url, post))
+        if "user_login.php" in url:
+            return LOGIN_RESPONSE
+        if "object_count" in (post or "") and not self.fingerprint_support:
+            # sql error of a dialect without the functions of the fingerprint select
+            return False
+        if "object_count" in (post or ""):
+            return sql_response(
+                ["object_count", "object_max_id", "object_names"],
+                [
+                    [
+                        str(len(self.device_rows)),
+                        max((row[1] for row in self.device_rows), default=""),
+                        str(sum(len(row[2]) * int(row[1]) for row in self.device_rows)),
+                    ]
+                ],
+            )
+        if "SETVALUE" in (post or ""):
+            return sql_response([], []).replace("<payload>", "").replace("</payload>", "")
+        if "WHERE o3.ID IN" in post:
+            status_ids = post.split("IN (")[1].split(")")[0].split(",")
+            values = {row[4]: row[7] for row in self.device_rows}
+            return sql_response(
+                ["status_id", "status_value"],
+                [[sid, values[sid]] for sid in status_ids if sid in values],
+            )
+        if "r3.PARENTOBJ_ID AS object_id" in post:
+            object_ids = post.split("PARENTOBJ_ID IN (")[1].split(")")[0].split(",")
+            return sql_response(
+                ["object_id", "status_id", "status_name", "status_value"],
+                [
+                    [row[1], row[4], row[5], row[7]]
+                    for row in self.device_rows
+                    if row[1] in object_ids
+                ],
+            )
+        if "GROUP_CONCAT" in post:
+            return sql_response(DEVICE_HEADER, [])
+        if "_DPAD_DBCONSTANT_GROUP_MAIN" in post:
+            return sql_response(["id", "name"], [["10", "Kitchen"]])
+        if "COUNT(*) AS row_count" in post:
+            status_ids = [] if "GROUP_CONCAT" in post else [int(row[4]) for row in self.device_rows]
+            return sql_response(
+                ["row_count", "min_id", "max_id"],
+                [
+                    [
+                        str(len(status_ids)),
+                        str(min(status_ids, default="")),
+                        str(max(status_ids, default="")),
+                    ]
+                ],
+            )
+        if "o3.ID > " in post or "o3.ID BETWEEN " in post:
+            if not self.keyset_support:
+                return sql_response([], [])
+            if "o3.ID BETWEEN " in post:
+                after_id, _, until_id = post.split("o3.ID BETWEEN ")[1].split()[:3]
+                after_id, until_id = int(after_id) - 1, int(until_id)
+            else:
+                after_id, until_id = int(post.split("o3.ID > ")[1].split()[0]), None
+            # rows of the last status id that belong to devices up to the last object id
+            cursor = (after_id, float("inf"))
+            if " AND o2.ID > " in post:
+                cursor = (
+                    int(post.split("o3.ID = ")[1].split()[0]),
+                    int(post.split("o2.ID > ")[1].split(")")[0]),
+                )
+            limit = int(post.split("LIMIT ")[1].split(";")[0])
+            rows = sorted(
+                (
+                    row
+                    for row in self.device_rows
+                    if (int(row[4]), int(row[1])) > cursor
+                    and (until_id is None or int(row[4]) <= until_id)
+                ),
+                key=lambda row: (int(row[4]), int(row[1])),
+            )
+            return sql_response(DEVICE_HEADER, rows[:limit])
+        start = int(post.split("LIMIT ")[1].split(",")[0])
+        limit = int(post.split("LIMIT ")[1].split(",")[1].split(";")[0])
+        return sql_response(DEVICE_HEADER, self.device_rows[start : start + limit])
+
+    async def close(self):
+        self.closed = True
+
+
+class RequestDeadline(VimarDeadline):
+    """Deadline that expires after a number of requests."""
+
+    def __init__(self, requests):
+        super().__init__(60)
+        self.requests = requests
+
+    def expired(self):
+        return self.requests <= 0
+
+    def get_timeout(self, timeout):
+        self.requests -= 1
+        return super().get_timeout(timeout)
+
+
+def make_rows(count):
+    """Generate one status row per device."""
+    return [
+        [
+            "",
+            str(100 + i),
+            "LUCE %d CUCINA" % i,
+            "CH_Main_Automation",
+            str(1000 + i),
+            "on/off",
+            "",
+            "1",
+        ]
+        for i in range(count)
+    ]
+
+
+@pytest.fixture
+def link():
+    """Async link with a fake transport."""
+    link = VimarLinkAsync("http", "127.0.0.1", 80, "user", "pass")
+    link._protocol = FakeProtocol(make_rows(5))
+    return link
+
+
+async def test_login_stores_session(link):
+    """Login parses the session id from the response."""
+    assert await link.async_check_login()
+    assert link._session_id == "abc123"
+    assert link.get_scheduler_metrics()["priorities"]["write"]["requests"] == 1
+
+
+async def test_paged_results_fetch_all_pages(link, monkeypatch):
+    """Paging requests another page as long as pages are full."""
+    monkeypatch.setattr(vimarlink_module, "MAX_ROWS_PER_REQUEST", 2)
+    await link.async_login()
+
+    devices, count = await link.async_get_paged_results(link.async_get_remote_devices)
+
+    assert count == 5
+    assert sorted(devices) == ["100", "101", "102", "103", "104"]
+    assert devices["100"]["status"]["on/off"] == {
+        "status_id": "1000",
+        "status_value": "1",
+        "status_range": "",
+    }
+
+
+async def test_next_page_is_requested_while_current_is_processed(link, monkeypatch):
+    """Streaming pages prefetches the next page as soon as a full page arrives."""
+    monkeypatch.setattr(vimarlink_module, "MAX_ROWS_PER_REQUEST", 2)
+    link._max_parallel_pages = 1
+    await link.async_login()
+    link._protocol.requests.clear()
+
+    page_sizes = []
+    requested = []
+    async for page in link.async_iter_remote_device_pages():
+        for _ in range(3):
+            await asyncio.sleep(0)
+        page_sizes.append(len(page))
+        requested.append(len(link._protocol.requests))
+
+    assert page_sizes == [2, 2, 1]
+    assert requested == [2, 3, 3]
+
+
+async def test_device_pages_continue_after_last_status_id(link, monkeypatch):
+    """Keyset pages select rows after the last status id instead of skipping rows."""
+    monkeypatch.setattr(vimarlink_module, "MAX_ROWS_PER_REQUEST", 2)
+    link._max_parallel_pages = 1
+    await link.async_login()
+    link._protocol.requests.clear()
+
+    devices, count = await link.async_parse_device_pages(link.async_iter_remote_device_pages())
+
+    posts = [post for _, post in link._protocol.requests]
+    assert count == 5
+    assert sorted(devices) == ["100", "101", "102", "103", "104"]
+    assert "o3.ID > 0 ORDER BY" in posts[0]
+    assert "(o3.ID > 1001 OR (o3.ID = 1001 AND o2.ID > 101))" in posts[1]
+    assert "(o3.ID > 1003 OR (o3.ID = 1003 AND o2.ID > 103))" in posts[2]
+    assert all("ORDER BY o3.ID, o2.ID" in post for post in posts)
+    assert link.keyset_paging
+
+
+async def test_key_ranges_are_fetched_concurrently(link, monkeypatch):
+    """After a count, all key ranges are requested at once and merged in key order."""
+    monkeypatch.setattr(vimarlink_module, "MAX_ROWS_PER_REQUEST", 2)
+    link._protocol.device_rows = make_rows(9)
+    await link.async_login()
+    request = link._protocol._request
+    in_flight = []
+    max_in_flight = 0
+
+    async def slow_request(url, post=None, headers=None, verify_ssl=True):
+        nonlocal max_in_flight
+        in_flight.append(post)
+        max_in_flight = max(max_in_flight, len(in_flight))
+        await asyncio.sleep(0.01)
+        in_flight.remove(post)
+        return await request(url, post, headers, verify_ssl)
+
+    link._protocol._request = slow_request
+    link._protocol.requests.clear()
+    pages = [page async for page in link.async_iter_remote_device_pages()]
+
+    assert [row["status_id"] for page in pages for row in page] == [str(1000 + i) for i in range(9)]
+    assert "COUNT(*)" in link._protocol.requests[0][1]
+    assert max_in_flight == 2
+
+
+async def test_key_range_pages_are_yielded_as_they_arrive(link, monkeypatch):
+    """A key range of several pages hands out each page, fetching at most one page ahead."""
+    monkeypatch.setattr(vimarlink_module, "MAX_ROWS_PER_REQUEST", 2)
+    link._protocol.device_rows = make_rows(9)
+    link._protocol.device_rows[8][4] = "2000"
+    await link.async_login()
+    link._protocol.requests.clear()
+
+    pages = link.async_iter_remote_device_pages()
+    first_page = await anext(pages)
+    for _ in range(5):
+        await asyncio.sleep(0)
+    first_range = [post for _, post in link._protocol.requests if " AND 1200" in post]
+    rows = first_page + [row async for page in pages for row in page]
+
+    # one page yielded, one waiting to be yielded and one requested - not all five
+    assert len(first_range) == 3
+    assert [row["status_id"] for row in rows] == [str(1000 + i) for i in range(8)] + ["2000"]
+
+
+async def test_stopped_parsing_cancels_pending_page_requests(link, monkeypatch):
+    """Key ranges still requested are cancelled once parsing fails or the poll is cancelled."""
+    monkeypatch.setattr(vimarlink_module, "MAX_ROWS_PER_REQUEST", 2)
+    link._protocol.device_rows = make_rows(9)
+    await link.async_login()
+    request = link._protocol._request
+    blocked = asyncio.Event()
+
+    async def hanging_request(url, post=None, headers=None, verify_ssl=True):
+        if "o3.ID BETWEEN " in (post or ""):
+            if int(post.split("o3.ID BETWEEN ")[1].split()[0]) >= 1004:
+                # only the first key ranges are served
+                blocked.set()
+                await asyncio.Event().wait()
+        return await request(url, post, headers, verify_ssl)
+
+    def broken_parse(payload, devices, onlyUpdate=False):
+        raise ValueError("broken page")
+
+    link._protocol._request = hanging_request
+    monkeypatch.setattr(link, "_parse_device_list", broken_parse)
+    with pytest.raises(ValueError):
+        await asyncio.wait_for(
+            link.async_parse_device_pages(link.async_iter_remote_device_pages()), 5
+        )
+    await asyncio.sleep(0)
+    assert asyncio.all_tasks() == {asyncio.current_task()}
+
+    monkeypatch.undo()
+    monkeypatch.setattr(vimarlink_module, "MAX_ROWS_PER_REQUEST", 2)
+    blocked.clear()
+    update = asyncio.ensure_future(VimarProjectAsync(link).async_update(forced=True))
+    await asyncio.wait_for(blocked.wait(), 5)
+    update.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await asyncio.wait_for(update, 5)
+    await asyncio.sleep(0)
+    assert asyncio.all_tasks() == {asyncio.current_task()}
+
+
+async def test_offset_paging_is_the_fallback(link, monkeypatch):
+    """A webserver answering keyset selects with nothing is paged by offset."""
+    monkeypatch.setattr(vimarlink_module, "MAX_ROWS_PER_REQUEST", 2)
+    link._protocol.keyset_support = False
+    await link.async_login()
+
+    devices, count = await link.async_parse_device_pages(link.async_iter_remote_device_pages())
+
+    assert count == 5
+    assert len(devices) == 5
+    assert not link.keyset_paging
+    assert "LIMIT 4, 2" in link._protocol.requests[-1][1]
+
+
+async def test_confirmed_keyset_paging_skips_the_fallback(link):
+    """Once keyset selects returned rows, an empty result is not checked with an offset select."""
+    link._max_parallel_pages = 1
+    await link.async_login()
+    await link.async_parse_device_pages(link.async_iter_remote_device_pages())
+    link._protocol.device_rows = []
+    link._protocol.requests.clear()
+
+    _, count = await link.async_parse_device_pages(link.async_iter_remote_device_pages())
+
+    assert count == 0
+    assert len(link._protocol.requests) == 1
+    assert link.keyset_paging
+
+
+async def test_project_update_parses_devices(link):
+    """Project update loads devices, rooms and parses device types."""
+    project = VimarProjectAsync(link)
+    await link.async_login()
+
+    devices = await project.async_update(forced=True)
+
+    assert len(devices) == 5
+    assert devices["100"]["device_type"] == "light"
+
+
+async def test_update_after_discovery_polls_states_only(link):
+    """Once devices are known, polls only read status values of known ids."""
+    project = VimarProjectAsync(link)
+    await link.async_login()
+    devices = await project.async_update(forced=True)
+
+    link._protocol.device_rows[2][7] = "0"
+    link._protocol.requests.clear()
+    await project.async_update()
+
+    assert len(link._protocol.requests) == 1
+    assert "o2." not in link._protocol.requests[0][1]
+    assert devices["102"]["status"]["on/off"]["status_value"] == "0"
+
+
+async def test_state_poll_reads_only_given_status_ids(link):
+    """A scheduled poll reads the due status ids, ids unknown after a discovery are skipped."""
+    project = VimarProjectAsync(link)
+    await link.async_login()
+    await project.async_update(forced=True)
+
+    link._protocol.requests.clear()
+    await project.async_update(status_ids=["1001", "1003", "9999"])
+
+    assert len(link._protocol.requests) == 1
+    assert "IN (1001,1003)" in link._protocol.requests[0][1]
+
+    link._protocol.requests.clear()
+    await project.async_update(status_ids=[])
+    assert link._protocol.requests == []
+
+
+async def test_expired_deadline_keeps_states_read_so_far(link, monkeypatch):
+    """Chunks read before the deadline are applied, the poll is flagged partial."""
+    project = VimarProjectAsync(link)
+    await link.async_login()
+    devices = await project.async_update(forced=True)
+    project.pop_changed_object_ids()
+    monkeypatch.setattr(link, "get_page_size", lambda query: 2)
+
+    for row in link._protocol.device_rows:
+        row[7] = "0"
+    link._protocol.requests.clear()
+    await project.async_update(deadline=RequestDeadline(1))
+
+    assert project.last_update_partial
+    assert len(link._protocol.requests) == 1
+    assert project.pop_changed_object_ids() == {"100", "101"}
+    assert devices["101"]["status"]["on/off"]["status_value"] == "0"
+    assert devices["102"]["status"]["on/off"]["status_value"] == "1"
+
+    await project.async_update(deadline=RequestDeadline(3))
+    assert not project.last_update_partial
+    assert devices["104"]["status"]["on/off"]["status_value"] == "0"
+
+
+async def test_expired_deadline_keeps_discovered_pages(link):
+    """A discovery cut short keeps the devices read so far and is not taken as done."""
+    project = VimarProjectAsync(link)
+    await link.async_login()
+    link.get_page_size = lambda query: 2
+
+    devices = await project.async_update(forced=True, deadline=RequestDeadline(4))
+
+    assert project.last_update_partial
+    assert not project.last_update_discovered
+    assert not project.has_fingerprint()
+    assert 0 < len(devices) < 5
+
+    devices = await project.async_update(forced=True, deadline=RequestDeadline(20))
+    assert project.last_update_discovered
+    assert len(devices) == 5
+
+
+async def test_refresh_devices_reads_states_of_written_devices(link):
+    """Devices are refreshed with one read request, changes are tracked like polls."""
+    project = VimarProjectAsync(link)
+    await link.async_login()
+    devices = await project.async_update(forced=True)
+    project.pop_changed_object_ids()
+
+    link._protocol.device_rows[1][7] = "0"
+    link._protocol.device_rows[3][7] = "0"
+    link._protocol.requests.clear()
+    changed = await project.async_refresh_devices(["101", "102"])
+
+    assert len(link._protocol.requests) == 1
+    assert "PARENTOBJ_ID IN (101,102)" in link._protocol.requests[0][1]
+    assert changed == {"101": {"on/off"}}
+    assert devices["103"]["status"]["on/off"]["status_value"] == "1"
+    assert project.pop_changed_object_ids() == {"101"}
+
+
+async def test_changed_devices_are_tracked_at_ingest(link):
+    """Discovery marks all devices as changed, later only devices with new values."""
+    project = VimarProjectAsync(link)
+    await link.async_login()
+    await project.async_update(forced=True)
+    assert project.pop_changed_object_ids() == {"100", "101", "102", "103", "104"}
+
+    link._protocol.device_rows[2][7] = "0"
+    await project.async_update()
+    assert project.pop_changed_object_ids() == {"102"}
+
+    link._protocol.device_rows[3][7] = "0"
+    await project.async_update(forced=True)
+    assert project.pop_changed_object_ids() == {"103"}
+    assert project.get_device_version("103") == 2
+
+
+async def test_page_sizes_are_tuned_per_query(link):
+    """Discovery pages and state polls are measured separately."""
+    project = VimarProjectAsync(link)
+    await link.async_login()
+    await project.async_update(forced=True)
+    await project.async_update()
+
+    metrics = link.get_page_size_metrics()
+    assert metrics["remote_devices"]["pages"] == 1
+    assert metrics["status_values"]["pages"] == 1
+    assert metrics["status_values"]["page_size"] == 300
+
+
+async def test_restored_discovery_polls_states_only(link):
+    """Devices restored from an exported discovery are polled without a new discovery."""
+    project = VimarProjectAsync(link)
+    await link.async_login()
+    await project.async_update(forced=True)
+    discovery = json.loads(json.dumps(project.export_discovery()))
+
+    restarted = VimarLinkAsync("http", "127.0.0.1", 80, "user", "pass")
+    restarted._protocol = link._protocol
+    restarted._session_id = link._session_id
+    restored = VimarProjectAsync(restarted)
+    assert restored.import_discovery(discovery)
+    assert restored.pop_changed_object_ids() == {"100", "101", "102", "103", "104"}
+
+    link._protocol.device_rows[1][7] = "0"
+    link._protocol.requests.clear()
+    devices = await restored.async_update()
+
+    assert len(link._protocol.requests) == 2
+    assert "object_count" in link._protocol.requests[0][1]
+    assert "WHERE o3.ID IN" in link._protocol.requests[1][1]
+    assert devices["101"]["status"]["on/off"]["status_value"] == "0"
+    assert devices["101"]["device_type"] == "light"
+    assert restored.platform_exists("light") == 5
+
+
+async def test_devices_are_read_each_interval_without_fingerprint(link):
+    """A webserver rejecting the fingerprint select still finds added devices after the interval."""
+    link._protocol.fingerprint_support = False
+    project = VimarProjectAsync(link)
+    await link.async_login()
+    await project.async_update(forced=True)
+    assert not project.has_fingerprint()
+
+    link._protocol.device_rows.append(make_rows(6)[5])
+    link._protocol.requests.clear()
+    devices = await project.async_update()
+    assert "105" not in devices
+    assert len(link._protocol.requests) == 1
+
+    project._fingerprint_checked -= project.fingerprint_interval
+    link._protocol.requests.clear()
+    devices = await project.async_update()
+
+    assert "105" in devices
+    assert sum("object_count" in post for _, post in link._protocol.requests) == 1
+
+
+async def test_update_falls_back_to_full_poll_on_removed_states(link):
+    """Missing status ids in a state poll trigger a full update."""
+    project = VimarProjectAsync(link)
+    await link.async_login()
+    await project.async_update(forced=True)
+
+    del link._protocol.device_rows[4]
+    link._protocol.requests.clear()
+    await project.async_update()
+
+    assert any("o2." in post for _, post in link._protocol.requests)
+
+
+async def test_set_device_status_sends_setvalue(link):
+    """Writes are sent as SETVALUE soap requests."""
+    await link.async_login()
+
+    assert await link.async_set_device_status("1000", "0") is None
+
+    url, post = link._protocol.requests[-1]
+    assert url.endswith("/cgi-bin/dpadws")
+    assert "<idobject>1000</idobject>" in post
+    assert "<payload>0</payload>" in post
+
+
+async def test_set_device_status_batch_reports_failed_writes(link):
+    """A batch sends every write and returns only the failed ones."""
+    await link.async_login()
+    request = link._protocol._request
+
+    async def fail_second(url, post=None, headers=None, verify_ssl=True):
+        if "<idobject>1001</idobject>" in (post or ""):
+            link._protocol.request_last_exception = TimeoutError("timeout")
+            return False
+        return await request(url, post, headers, verify_ssl)
+
+    link._protocol._request = fail_second
+    errors = await link.async_set_device_status_batch(
+        [("1000", "0", "NO-OPTIONALS"), ("1001", "1", "NO-OPTIONALS"), ("1002", "1", "SYNCDB")]
+    )
+
+    assert errors == {"1001": "timeout"}
+    assert [post.split("<idobject>")[1][:4] for _, post in link._protocol.requests[1:]] == [
+        "1000",
+        "1002",
+    ]
+
+
+async def test_close_closes_transport(link):
+    """Closing the link closes the aiohttp session."""
+    await link.async_close()
+    assert link._protocol.closed
+
+
+async def test_certificate_download_keeps_vimar_tls_settings(monkeypatch):
+    """Requests without verification still use the TLS version and cipher of the webserver."""
+    protocol = VimarProtocolAsync("https", "127.0.0.1", 443, "missing.crt")
+    session = await protocol._get_session()
+    used = {}
+
+    def fake_get(url, headers=None, **kwargs):
+        used.update(kwargs)
+        raise aiohttp.ClientError("offline")
+
+    monkeypatch.setattr(session, "get", fake_get)
+    assert await protocol._request("https://127.0.0.1/rootCA.crt", verify_ssl=False) is False
+    await protocol.close()
+
+    ssl_context = used["ssl"]
+    assert ssl_context.verify_mode == ssl.CERT_NONE
+    assert ssl_context.minimum_version == ssl.TLSVersion.TLSv1
+    assert "AES256-SHA" in [cipher["name"] for cipher in ssl_context.get_ciphers()]
+
+
+async def test_ssl_contexts_are_created_off_the_event_loop(monkeypatch):
+    """Loading certificates reads from disk, so it runs in the executor and only once."""
+    create_ssl_context = vimarlink_protocol_async.create_ssl_context
+    threads = []
+
+    def recording_create_ssl_context(certificate=None):
+        threads.append(threading.get_ident())
+        return create_ssl_context(certificate)
+
+    monkeypatch.setattr(
+        vimarlink_protocol_async, "create_ssl_context", recording_create_ssl_context
+    )
+    protocol = VimarProtocolAsync("https", "127.0.0.1", 443, "missing.crt")
+    sessions = await asyncio.gather(protocol._get_session(), protocol._get_session())
+    await protocol.close()
+
+    assert sessions[0] is sessions[1]
+    assert len(threads) == 2
+    assert threading.get_ident() not in threads
@@ -0,0 +1,87 @@
+"""Test renewal and lifetime of vimar sessions.
+
+NO Home Assistant dependencies required.
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(__file__), "..", "..", "custom_components", "vimar")
+)
+
+from vimarlink import vimarlink_auth
+from vimarlink.vimarlink_auth import VimarAuth
+
+pytestmark = pytest.mark.no_ha  # No HA required
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Monotonic clock that only moves when told to."""
+    now = [1000.0]
+    monkeypatch.setattr(vimarlink_auth.time, "monotonic", lambda: now[0])
+    return now
+
+
+def make_auth():
+    auth = VimarAuth("https", "192.168.1.1", 443, "user", "pass")
+    sessions = iter(["s1", "s2", "s3"])
+
+    def login():
+        auth.session_id = next(sessions)
+
+    return auth, login
+
+
+def test_expired_session_teaches_the_lifetime(clock):
+    """The age of an expired session is its lifetime, later sessions are renewed before it."""
+    auth, login = make_auth()
+    login()
+    assert auth.get_refresh_delay(30) is None
+
+    clock[0] += 600
+    assert auth.renew("s1", login)
+    assert not auth.renew("s1", login)
+    assert auth.session_id == "s2"
+    assert auth.lifetime == 600
+    assert auth.get_refresh_delay(30) == 570
+
+    clock[0] += 570
+    assert auth.get_refresh_delay(30) == 0
+    assert auth.renew("s2", login, expired=False)
+    assert (auth.lifetime, auth.renewals, auth.refreshes) == (600, 1, 1)
+
+
+def test_short_lifetime_is_not_renewed_right_away(clock):
+    """A lifetime below twice the margin is renewed once the margin passed, not in a loop."""
+    auth, login = make_auth()
+    login()
+    clock[0] += 0.2
+    auth.renew("s1", login)
+
+    assert auth.lifetime == pytest.approx(0.2)
+    assert auth.get_refresh_delay(30) == 30
+
+    auth.session_id = None
+    assert auth.get_refresh_delay(30) is None
+
+
+def test_lifetime_grows_with_sessions_outliving_it(clock):
+    """A session accepted or expiring after the learned lifetime raises it again."""
+    auth, login = make_auth()
+    login()
+    clock[0] += 100
+    auth.renew("s1", login)
+
+    clock[0] += 150
+    auth.confirm_session("s1")
+    assert auth.lifetime == 100
+    auth.confirm_session("s2")
+    assert auth.lifetime == 150
+
+    clock[0] += 450
+    auth.renew("s2", login)
+    assert auth.lifetime == 600
@@ -0,0 +1,91 @@
+"""Test the adaptive page size of paged selects.
+
+NO Home Assistant dependencies required.
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(__file__), "..", "..", "custom_components", "vimar")
+)
+
+from vimarlink.vimarlink_pagesize import VimarPageSizeTuner
+
+pytestmark = pytest.mark.no_ha  # No HA required
+
+
+def test_fast_full_pages_grow_slowly():
+    """Three fast full pages in a row grow the page size by a tenth."""
+    tuner = VimarPageSizeTuner(timeout=10)
+    for _ in range(2):
+        tuner.record("devices", 300, 300, 300, 0.2, 40_000)
+    assert tuner.get_page_size("devices", 300) == 300
+
+    tuner.record("devices", 300, 300, 300, 0.2, 40_000)
+    assert tuner.get_page_size("devices", 300) == 330
+    assert tuner.get_page_size("status_values", 300) == 300
+
+
+def test_last_page_does_not_count_as_fast():
+    """A page with fewer rows than requested says nothing about larger pages."""
+    tuner = VimarPageSizeTuner(timeout=10)
+    for _ in range(5):
+        tuner.record("devices", 300, 300, 120, 0.2, 10_000)
+
+    assert tuner.get_page_size("devices", 300) == 300
+
+
+def test_slow_pages_and_timeouts_shrink_quickly():
+    """Slow or large pages shrink by a quarter, timeouts halve the page size."""
+    tuner = VimarPageSizeTuner(timeout=10)
+    tuner.record("devices", 300, 300, 300, 5.0, 40_000)
+    assert tuner.get_page_size("devices", 300) == 225
+
+    tuner.record("devices", 300, 225, 225, 0.5, 1_000_000)
+    assert tuner.get_page_size("devices", 300) == 168
+
+    tuner.record_timeout("devices", 300)
+    assert tuner.get_page_size("devices", 300) == 84
+
+
+def test_page_size_stays_within_bounds():
+    """The page size never leaves a tenth and twice the default."""
+    tuner = VimarPageSizeTuner(timeout=10)
+    for _ in range(10):
+        tuner.record_timeout("devices", 300)
+    assert tuner.get_page_size("devices", 300) == 30
+
+    for _ in range(200):
+        page_size = tuner.get_page_size("devices", 300)
+        tuner.record("devices", 300, page_size, page_size, 0.1, 1000)
+    assert tuner.get_page_size("devices", 300) == 600
+
+
+def test_metrics_report_page_size_and_timings():
+    """Metrics hold the chosen page size and page statistics per query type."""
+    tuner = VimarPageSizeTuner(timeout=10)
+    tuner.record("devices", 300, 300, 300, 0.2, 30_000)
+    tuner.record("devices", 300, 300, 100, 0.4, 10_000)
+    tuner.record_timeout("status_values", 300)
+
+    assert tuner.get_metrics() == {
+        "devices": {
+            "page_size": 300,
+            "pages": 2,
+            "timeouts": 0,
+            "duration_avg": 0.3,
+            "duration_max": 0.4,
+            "bytes_avg": 20_000,
+        },
+        "status_values": {
+            "page_size": 150,
+            "pages": 0,
+            "timeouts": 1,
+            "duration_avg": 0.0,
+            "duration_max": 0.0,
+            "bytes_avg": 0,
+        },
+    }
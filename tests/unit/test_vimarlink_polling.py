@@ -0,0 +1,64 @@
+"""Test the poll intervals of status groups.
+
+NO Home Assistant dependencies required.
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(__file__), "..", "..", "custom_components", "vimar")
+)
+
+from vimarlink.vimarlink_polling import VimarPollScheduler, get_poll_interval
+
+pytestmark = pytest.mark.no_ha  # No HA required
+
+
+def test_override_wins_over_object_type_and_platform():
+    """A device_override interval beats the object_type, which beats the platform."""
+    intervals = {"scene": 60, "CH_Misuratore": 2, "sensor": 10}
+    scene = {"object_type": "CH_Scene", "device_type": "scene"}
+    meter = {"object_type": "CH_Misuratore", "device_type": "sensor"}
+    light = {"object_type": "CH_Main_Automation", "device_type": "light"}
+
+    assert get_poll_interval(scene, intervals, 8) == 60
+    assert get_poll_interval(meter, intervals, 8) == 2
+    assert get_poll_interval(light, intervals, 8) == 8
+    assert get_poll_interval({**light, "poll_interval": "1"}, intervals, 8) == 1
+
+
+def test_due_groups_are_merged_into_one_poll():
+    """Each tick reads the status ids of all due groups at once."""
+    scheduler = VimarPollScheduler()
+    assert not scheduler.has_groups()
+    assert scheduler.get_due(0.0) == []
+
+    scheduler.set_groups({"1": 2, "2": 8, "3": 60, "4": 2}, now=0.0)
+    assert scheduler.get_min_interval() == 2
+
+    due = scheduler.get_due(2.0)
+    assert scheduler.get_status_ids(due) == ["1", "4"]
+    scheduler.mark_polled(due, now=2.0)
+
+    # timer jitter - the 8 second group is still due on the tick before 8 seconds
+    due = scheduler.get_due(7.9)
+    assert scheduler.get_status_ids(due) == ["1", "4", "2"]
+    scheduler.mark_polled(due, now=7.9)
+
+    assert scheduler.get_due(8.5) == []
+    assert scheduler.get_status_ids(scheduler.get_due(60.0)) == ["1", "4", "2", "3"]
+
+
+def test_metrics_count_polls_per_group():
+    """Metrics hold the size and number of polls of every group."""
+    scheduler = VimarPollScheduler()
+    scheduler.set_groups({"1": 2, "2": 8, "3": 2}, now=0.0)
+    scheduler.mark_polled(scheduler.get_due(2.0), now=2.0)
+
+    assert scheduler.get_metrics() == {
+        "2.0": {"status_ids": 2, "polls": 1},
+        "8.0": {"status_ids": 1, "polls": 0},
+    }
@@ -0,0 +1,102 @@
+"""Test priority scheduling of webserver requests.
+
+NO Home Assistant dependencies required.
+"""
+
+import asyncio
+import os
+import sys
+
+import pytest
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(__file__), "..", "..", "custom_components", "vimar")
+)
+
+from vimarlink.vimarlink_scheduler import (
+    PRIORITY_DISCOVERY,
+    PRIORITY_POLL,
+    PRIORITY_WRITE,
+    VimarRequestScheduler,
+)
+
+pytestmark = pytest.mark.no_ha  # No HA required
+
+
+async def test_free_slot_goes_to_highest_priority():
+    """Waiting writes are served before waiting polls and discovery pages."""
+    scheduler = VimarRequestScheduler(max_in_flight=1)
+    release = asyncio.Event()
+    order = []
+
+    async def request(name, priority, wait=None):
+        async with scheduler.slot(priority):
+            order.append(name)
+            if wait is not None:
+                await wait.wait()
+
+    blocking = asyncio.ensure_future(request("running", PRIORITY_DISCOVERY, release))
+    await asyncio.sleep(0)
+    waiting = [
+        asyncio.ensure_future(request("discovery", PRIORITY_DISCOVERY)),
+        asyncio.ensure_future(request("poll", PRIORITY_POLL)),
+        asyncio.ensure_future(request("write", PRIORITY_WRITE)),
+    ]
+    await asyncio.sleep(0)
+    assert scheduler.get_metrics()["priorities"]["poll"]["queued"] == 1
+
+    release.set()
+    await asyncio.gather(blocking, *waiting)
+
+    assert order == ["running", "write", "poll", "discovery"]
+    assert scheduler.in_flight == 0
+    metrics = scheduler.get_metrics()
+    assert metrics["priorities"]["discovery"]["requests"] == 2
+    assert metrics["priorities"]["write"]["wait_max"] >= 0
+
+
+async def test_max_in_flight_is_respected():
+    """No more than max_in_flight requests run at once."""
+    scheduler = VimarRequestScheduler(max_in_flight=2)
+    running = 0
+    peak = 0
+
+    async def request():
+        nonlocal running, peak
+        async with scheduler.slot(PRIORITY_POLL):
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0)
+            running -= 1
+
+    await asyncio.gather(*(request() for _ in range(6)))
+
+    assert peak == 2
+    assert scheduler.in_flight == 0
+
+
+async def test_cancelled_waiter_does_not_leak_a_slot():
+    """A request cancelled while waiting leaves the slot count intact."""
+    scheduler = VimarRequestScheduler(max_in_flight=1)
+    release = asyncio.Event()
+
+    async def blocking():
+        async with scheduler.slot(PRIORITY_POLL):
+            await release.wait()
+
+    async def request():
+        async with scheduler.slot(PRIORITY_WRITE):
+            pass
+
+    first = asyncio.ensure_future(blocking())
+    await asyncio.sleep(0)
+    cancelled = asyncio.ensure_future(request())
+    await asyncio.sleep(0)
+    cancelled.cancel()
+    release.set()
+    await first
+
+    with pytest.raises(asyncio.CancelledError):
+        await cancelled
+    assert scheduler.in_flight == 0
+    await request()
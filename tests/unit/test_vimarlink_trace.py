@@ -0,0 +1,99 @@
+"""Test recording and replaying webserver traffic.
+
+NO Home Assistant dependencies required.
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(__file__), "..", "..", "custom_components", "vimar")
+)
+
+from vimarlink.vimarlink import VimarLink, VimarProject
+from vimarlink.vimarlink_async import VimarLinkAsync, VimarProjectAsync
+from vimarlink.vimarlink_trace import VimarTracePlayer, VimarTraceRecorder, normalize_url
+
+from tests.simulator import VimarSimulator
+
+pytestmark = pytest.mark.no_ha  # No HA required
+
+
+def test_credentials_and_session_are_not_recorded():
+    """Login urls are stored without username, password and session id."""
+    url = normalize_url(
+        "https://192.168.1.1:443/vimarbyweb/modules/system/user_login.php"
+        "?sessionid=abc&username=admin&password=secret&remember=0&op=login"
+    )
+
+    assert "secret" not in url
+    assert "admin" not in url
+    assert url.startswith("vimarbyweb/modules/system/user_login.php?sessionid=SESSIONID&")
+
+
+@pytest.fixture
+def recorded(tmp_path):
+    """Record discovery and one poll after some values changed on the bus."""
+    trace = str(tmp_path / "trace.jsonl.gz")
+    with VimarSimulator(devices=30, seed=2) as simulator:
+        link = VimarLink("http", simulator.host, simulator.port, "admin", "admin", None, 5)
+        link.trace_recorder = VimarTraceRecorder(trace)
+        project = VimarProject(link)
+        link.login()
+        project.update(forced=True)
+        project.pop_changed_object_ids()
+        simulator.change_random_values(2)
+        project.update()
+        changed = project.pop_changed_object_ids()
+        link.trace_recorder.close()
+        link.close()
+    return trace, project.devices, changed
+
+
+def test_replay_reproduces_recorded_updates(recorded):
+    """Replaying a trace returns the same devices and changes without the webserver."""
+    trace, devices, changed = recorded
+    link = VimarLink("http", "127.0.0.1", 1, "admin", "admin", None, 5)
+    link.trace_player = VimarTracePlayer(trace)
+    project = VimarProject(link)
+
+    link.login()
+    project.update(forced=True)
+    project.pop_changed_object_ids()
+    replayed = project.update()
+
+    assert link.trace_player.missing_count == 0
+    assert project.pop_changed_object_ids() == changed
+    assert replayed == devices
+
+
+async def test_async_replay_is_accelerated(recorded):
+    """Async replay waits the recorded duration divided by the speed."""
+    trace, devices, changed = recorded
+    link = VimarLinkAsync("http", "127.0.0.1", 1, "admin", "admin", None, 5)
+    link.trace_player = VimarTracePlayer(trace, speed=1000)
+    project = VimarProjectAsync(link)
+
+    await link.async_login()
+    await project.async_update(forced=True)
+    project.pop_changed_object_ids()
+    await project.async_update()
+
+    assert project.pop_changed_object_ids() == changed
+    response, delay, error = VimarTracePlayer(trace, speed=2).lookup(link._get_login_url(), None)
+    assert error is None
+    assert "<sessionid>" in response
+    assert delay >= 0
+
+
+def test_unknown_request_fails(tmp_path):
+    """Requests missing in the trace fail like an unreachable webserver."""
+    trace = str(tmp_path / "empty.jsonl.gz")
+    VimarTraceRecorder(trace).close()
+    link = VimarLink("http", "127.0.0.1", 1, "admin", "admin", None, 5)
+    link.trace_player = VimarTracePlayer(trace)
+
+    assert link._request("http://127.0.0.1:1/cgi-bin/dpadws", "<x/>") is False
+    assert "not found in trace" in str(link.request_last_exception)